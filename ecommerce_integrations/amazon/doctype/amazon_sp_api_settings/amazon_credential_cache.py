@@ -0,0 +1,117 @@
+# Copyright (c) 2022, Frappe and contributors
+# For license information, please see license.txt
+
+
+import hashlib
+import time
+
+import frappe
+
+# Refresh credentials this many seconds before they actually expire.
+EXPIRY_MARGIN = 300
+
+# LWA access tokens are valid for an hour unless the response says otherwise.
+DEFAULT_ACCESS_TOKEN_TTL = 3600
+
+CACHE_KEY_PREFIX = "amazon_sp_api_credentials"
+
+# process-local tier, shared by every SPAPI instance of a worker
+_local_cache = {}
+_stats = {}
+
+
+class SPAPICredentialCache:
+	"""Reuses LWA access tokens and STS role credentials of an Amazon SP API Settings
+	until shortly before they expire.
+
+	Credentials are looked up in a process-local dict first, then in the Frappe (redis)
+	cache so that other workers can reuse them, and only fetched from Amazon on a miss.
+	"""
+
+	def __init__(self, settings_name: str, expiry_margin: int = EXPIRY_MARGIN) -> None:
+		self.settings_name = settings_name
+		self.expiry_margin = expiry_margin
+
+	def get_access_token(self, api) -> str:
+		key = self._get_key("access_token", api.client_id, api.refresh_token)
+		cached = self._get(key)
+		if cached:
+			return cached["value"]
+
+		result = api.fetch_access_token()
+		expires_in = int(result.get("expires_in") or DEFAULT_ACCESS_TOKEN_TTL)
+		access_token = result.get("access_token")
+		self._set(key, access_token, time.time() + expires_in)
+		return access_token
+
+	def get_aws_credentials(self, api) -> dict:
+		key = self._get_key("aws_credentials", api.aws_access_key, api.iam_arn, api.region)
+		cached = self._get(key)
+		if cached:
+			return cached["value"]
+
+		credentials = api.fetch_aws_credentials()
+		value = {
+			"AccessKeyId": credentials["AccessKeyId"],
+			"SecretAccessKey": credentials["SecretAccessKey"],
+			"SessionToken": credentials["SessionToken"],
+		}
+		self._set(key, value, _get_timestamp(credentials.get("Expiration")))
+		return value
+
+	def get_stats(self) -> dict:
+		return dict(_stats.get(self.settings_name) or {"hits": 0, "misses": 0})
+
+	def clear(self) -> None:
+		clear_credential_cache(self.settings_name)
+
+	def _get_key(self, kind: str, *parts) -> str:
+		# credentials are part of the key so that changing them in settings never serves stale tokens
+		fingerprint = hashlib.sha256("|".join(str(p or "") for p in parts).encode()).hexdigest()[:16]
+		return f"{CACHE_KEY_PREFIX}|{self.settings_name}|{kind}|{fingerprint}"
+
+	def _get(self, key: str) -> dict | None:
+		cached = _local_cache.get(key)
+		if not self._is_valid(cached):
+			cached = frappe.cache().get_value(key)
+			if self._is_valid(cached):
+				_local_cache[key] = cached
+
+		if self._is_valid(cached):
+			self._record("hits")
+			return cached
+
+		_local_cache.pop(key, None)
+		self._record("misses")
+
+	def _set(self, key: str, value, expires_at: float) -> None:
+		cached = {"value": value, "expires_at": expires_at}
+		_local_cache[key] = cached
+
+		ttl = int(expires_at - time.time() - self.expiry_margin)
+		if ttl > 0:
+			frappe.cache().set_value(key, cached, expires_in_sec=ttl)
+
+	def _is_valid(self, cached: dict | None) -> bool:
+		return bool(cached) and cached.get("expires_at", 0) - self.expiry_margin > time.time()
+
+	def _record(self, event: str) -> None:
+		stats = _stats.setdefault(self.settings_name, {"hits": 0, "misses": 0})
+		stats[event] += 1
+		frappe.logger("amazon").debug(f"SP-API credential cache for {self.settings_name}: {stats}")
+
+
+def clear_credential_cache(settings_name: str) -> None:
+	prefix = f"{CACHE_KEY_PREFIX}|{settings_name}|"
+	for key in [k for k in _local_cache if k.startswith(prefix)]:
+		del _local_cache[key]
+
+	frappe.cache().delete_keys(prefix)
+
+
+def _get_timestamp(expiration) -> float:
+	if not expiration:
+		return time.time() + DEFAULT_ACCESS_TOKEN_TTL
+	if hasattr(expiration, "timestamp"):
+		return expiration.timestamp()
+	return float(expiration)
@@ -9,6 +9,9 @@ import dateutil
 import frappe
 from frappe import _
 
+from ecommerce_integrations.amazon.doctype.amazon_sp_api_settings.amazon_credential_cache import (
+	SPAPICredentialCache,
+)
 from ecommerce_integrations.amazon.doctype.amazon_sp_api_settings.amazon_sp_api import (
 	SPAPI,
 	CatalogItems,
@@ -35,6 +38,7 @@ class AmazonRepository:
 			aws_access_key=self.amz_setting.aws_access_key,
 			aws_secret_key=self.amz_setting.get_password("aws_secret_key"),
 			country_code=self.amz_setting.country,
+			credential_cache=SPAPICredentialCache(self.amz_setting.name),
 		)
 
 	def return_as_list(self, input) -> list:
@@ -7,10 +7,11 @@ import hashlib
 import hmac
 
 import boto3
-from requests import request
 from requests.auth import AuthBase
 from requests.compat import urlparse
 
+from ecommerce_integrations.utils.http import get_session
+
 __all__ = [
 	"SPAPIError",
 	"Finances",
@@ -224,6 +225,7 @@ class SPAPI(object):
 		aws_access_key: str,
 		aws_secret_key: str,
 		country_code: str = "US",
+		credential_cache=None,
 	) -> None:
 		self.iam_arn = iam_arn
 		self.client_id = client_id
@@ -232,9 +234,11 @@ class SPAPI(object):
 		self.aws_access_key = aws_access_key
 		self.aws_secret_key = aws_secret_key
 		self.country_code = country_code
+		self.credential_cache = credential_cache
 		self.region, self.endpoint, self.marketplace_id = Util.get_marketplace_data(country_code)
 
-	def get_access_token(self) -> str:
+	def fetch_access_token(self) -> dict:
+		""" Exchanges the refresh token for a new LWA access token, returns the raw LWA response. """
 		data = {
 			"grant_type": "refresh_token",
 			"client_id": self.client_id,
@@ -242,16 +246,17 @@ class SPAPI(object):
 			"refresh_token": self.refresh_token,
 		}
 
-		response = request(method="POST", url=self.AUTH_URL, data=data)
+		response = get_session("amazon").request(method="POST", url=self.AUTH_URL, data=data)
 		result = response.json()
 		if response.status_code == 200:
-			return result.get("access_token")
+			return result
 		exception = SPAPIError(
 			error=result.get("error"), error_description=result.get("error_description")
 		)
 		raise exception
 
-	def get_auth(self) -> AWSSigV4:
+	def fetch_aws_credentials(self) -> dict:
+		""" Assumes the IAM role, returns the temporary STS credentials. """
 		try:
 			client = boto3.client(
 				"sts",
@@ -261,22 +266,29 @@ class SPAPI(object):
 			)
 
 			response = client.assume_role(RoleArn=self.iam_arn, RoleSessionName="SellingPartnerAPI")
-
-			credentials = response["Credentials"]
-			access_key_id = credentials["AccessKeyId"]
-			secret_access_key = credentials["SecretAccessKey"]
-			session_token = credentials["SessionToken"]
-
-			return AWSSigV4(
-				service="execute-api",
-				aws_access_key_id=access_key_id,
-				aws_secret_access_key=secret_access_key,
-				aws_session_token=session_token,
-				region=self.region,
-			)
+			return response["Credentials"]
 		except Exception as e:
 			raise SPAPIError(error="invalid_aws_credentials", error_description=e)
 
+	def get_access_token(self) -> str:
+		if self.credential_cache:
+			return self.credential_cache.get_access_token(self)
+		return self.fetch_access_token().get("access_token")
+
+	def get_auth(self) -> AWSSigV4:
+		if self.credential_cache:
+			credentials = self.credential_cache.get_aws_credentials(self)
+		else:
+			credentials = self.fetch_aws_credentials()
+
+		return AWSSigV4(
+			service="execute-api",
+			aws_access_key_id=credentials["AccessKeyId"],
+			aws_secret_access_key=credentials["SecretAccessKey"],
+			aws_session_token=credentials["SessionToken"],
+			region=self.region,
+		)
+
 	def get_headers(self) -> dict:
 		return {"x-amz-access-token": self.get_access_token()}
 
@@ -290,7 +302,7 @@ class SPAPI(object):
 
 		url = self.endpoint + self.BASE_URI + append_to_base_uri
 
-		response = request(
+		response = get_session("amazon").request(
 			method=method,
 			url=url,
 			params=params,
@@ -31,6 +31,13 @@ class AmazonSPAPISettings(Document):
 		elif self.max_retry_limit and self.max_retry_limit > 5:
 			frappe.throw(frappe._("Value for <b>Max Retry Limit</b> must be less than or equal to 5."))
 
+	def on_update(self):
+		from ecommerce_integrations.amazon.doctype.amazon_sp_api_settings.amazon_credential_cache import (
+			clear_credential_cache,
+		)
+
+		clear_credential_cache(self.name)
+
 	def save(self):
 		super(AmazonSPAPISettings, self).save()
 
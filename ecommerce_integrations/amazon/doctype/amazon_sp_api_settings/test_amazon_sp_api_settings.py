@@ -6,6 +6,7 @@ import json
 import os
 import time
 import unittest
+from unittest.mock import patch
 
 import frappe
 import responses
@@ -13,6 +14,10 @@ from frappe.exceptions import ValidationError
 from requests import request
 from requests.exceptions import HTTPError
 
+from ecommerce_integrations.amazon.doctype.amazon_sp_api_settings.amazon_credential_cache import (
+	SPAPICredentialCache,
+	clear_credential_cache,
+)
 from ecommerce_integrations.amazon.doctype.amazon_sp_api_settings.amazon_repository import (
 	AmazonRepository,
 	validate_amazon_sp_api_credentials,
@@ -275,3 +280,38 @@ class TestAmazon(unittest.TestCase):
 		)
 
 		self.assertRaises(ValidationError, validate_amazon_sp_api_credentials, **credentials)
+
+	def test_credential_cache(self):
+		clear_credential_cache("_Test Amazon")
+		cache = SPAPICredentialCache("_Test Amazon")
+		api = SPAPI(
+			iam_arn="arn",
+			client_id="client",
+			client_secret="secret",
+			refresh_token="token",
+			aws_access_key="key",
+			aws_secret_key="secret",
+			country_code="US",
+			credential_cache=cache,
+		)
+		credentials = {
+			"AccessKeyId": "id",
+			"SecretAccessKey": "secret",
+			"SessionToken": "session",
+			"Expiration": time.time() + 3600,
+		}
+
+		with patch.object(
+			SPAPI, "fetch_access_token", return_value={"access_token": "Atza|1", "expires_in": 3600}
+		) as fetch_token, patch.object(
+			SPAPI, "fetch_aws_credentials", return_value=credentials
+		) as fetch_credentials:
+			for _ in range(3):
+				self.assertEqual(api.get_headers(), {"x-amz-access-token": "Atza|1"})
+				self.assertEqual(api.get_auth().aws_session_token, "session")
+
+			fetch_token.assert_called_once()
+			fetch_credentials.assert_called_once()
+
+		self.assertEqual(cache.get_stats(), {"hits": 4, "misses": 2})
+		clear_credential_cache("_Test Amazon")
@@ -1,10 +1,19 @@
-from typing import List, Tuple
+from typing import Iterable, List, Tuple
 
 import frappe
 from frappe import _dict
-from frappe.utils import now
+from frappe.utils import create_batch, now
 from frappe.utils.nestedset import get_descendants_of
 
+# Composite indexes for finding Ecommerce Items with updated Bin, see `add_inventory_indexes`.
+# doctype: (index name, columns)
+INVENTORY_INDEXES = {
+	"Ecommerce Item": (
+		"integration_erpnext_item_code_inventory_synced_on",
+		["integration", "erpnext_item_code", "inventory_synced_on"],
+	),
+}
+
 
 def get_inventory_levels(warehouses: Tuple[str], integration: str) -> List[_dict]:
 	"""
@@ -14,23 +23,27 @@ def get_inventory_levels(warehouses: Tuple[str], integration: str) -> List[_dict
 	so ensure that if you sync the inventory with integration, you have also
 	updated `inventory_synced_on` field in related Ecommerce Item.
 
-	returns: list of _dict containing ecom_item, item_code, integration_item_code, variant_id, actual_qty, warehouse, reserved_qty
+	returns: list of _dict containing ecom_item, item_code, integration_item_code, variant_id, inventory_item_id, actual_qty, warehouse, reserved_qty
 	"""
 	data = frappe.db.sql(
-		f"""
-			SELECT ei.name as ecom_item, bin.item_code as item_code, integration_item_code, variant_id, actual_qty, warehouse, reserved_qty
+		_get_inventory_levels_query(warehouses),
+		values=warehouses + (integration,),
+		as_dict=1,
+	)
+
+	return data
+
+
+def _get_inventory_levels_query(warehouses: Tuple[str]) -> str:
+	return f"""
+			SELECT ei.name as ecom_item, bin.item_code as item_code, integration_item_code, variant_id, inventory_item_id, actual_qty, warehouse, reserved_qty
 			FROM `tabEcommerce Item` ei
 				JOIN tabBin bin
 				ON ei.erpnext_item_code = bin.item_code
 			WHERE bin.warehouse in ({', '.join('%s' for _ in warehouses)})
 				AND bin.modified > ei.inventory_synced_on
 				AND ei.integration = %s
-		""",
-		values=warehouses + (integration,),
-		as_dict=1,
-	)
-
-	return data
+		"""
 
 
 def get_inventory_levels_of_group_warehouse(warehouse: str, integration: str):
@@ -47,6 +60,7 @@ def get_inventory_levels_of_group_warehouse(warehouse: str, integration: str):
 			SELECT ei.name as ecom_item, bin.item_code as item_code,
 				integration_item_code,
 				variant_id,
+				inventory_item_id,
 				sum(actual_qty) as actual_qty,
 				sum(reserved_qty) as reserved_qty,
 				max(bin.modified) as last_updated,
@@ -81,3 +95,26 @@ def update_inventory_sync_status(ecommerce_item, time=None):
 		time = now()
 
 	frappe.db.set_value("Ecommerce Item", ecommerce_item, "inventory_synced_on", time)
+
+
+def bulk_update_inventory_sync_status(ecommerce_items: Iterable[str], time=None, batch_size=1000):
+	"""Update `inventory_synced_on` of multiple Ecommerce Items to specified time or current time.
+
+	Same as `update_inventory_sync_status` but issues one UPDATE per `batch_size` items.
+	"""
+	if time is None:
+		time = now()
+
+	for batch in create_batch(list(ecommerce_items), batch_size):
+		frappe.db.set_value("Ecommerce Item", {"name": ("in", batch)}, "inventory_synced_on", time)
+
+
+def add_inventory_indexes() -> None:
+	"""Add indexes used by `get_inventory_levels` and `get_inventory_levels_of_group_warehouse`.
+
+	Ecommerce Items are filtered by integration and read from the index along with their
+	timestamp. Bin is joined on (item_code, warehouse) and compared with each item's
+	timestamp, ERPNext's unique index on these columns is enough for it.
+	"""
+	for doctype, (index_name, columns) in INVENTORY_INDEXES.items():
+		frappe.db.add_index(doctype, columns, index_name)
@@ -0,0 +1,125 @@
+"""Benchmark for inventory delta query (`get_inventory_levels`).
+
+Creates Ecommerce Items and Bins for them in every warehouse, prints query plan and
+timing with and without the indexes added by `add_inventory_indexes` and then deletes
+the generated data. Use a scratch site, index changes commit the transaction.
+
+	bench --site test_site execute \\
+		ecommerce_integrations.controllers.tests.benchmark_inventory.run \\
+		--kwargs "{'items': 100000, 'warehouses': 50}"
+"""
+
+import time
+from typing import List
+
+import frappe
+from frappe.utils import add_to_date, now_datetime
+
+from ecommerce_integrations.controllers.inventory import (
+	INVENTORY_INDEXES,
+	_get_inventory_levels_query,
+	add_inventory_indexes,
+	get_inventory_levels,
+)
+
+INTEGRATION = "benchmark"
+PREFIX = "_BENCH-"
+BATCH_SIZE = 10000
+
+
+def run(items: int = 100000, warehouses: int = 50, changed_percent: float = 1.0, runs: int = 3):
+	warehouse_names = tuple(f"{PREFIX}WH-{i}" for i in range(warehouses))
+
+	try:
+		_make_data(items, warehouse_names, changed_percent)
+
+		add_inventory_indexes()
+		_report("with indexes", warehouse_names, runs)
+
+		_drop_indexes()
+		_report("without indexes", warehouse_names, runs)
+	finally:
+		add_inventory_indexes()
+		_delete_data()
+
+
+def _report(label: str, warehouses, runs: int) -> None:
+	values = warehouses + (INTEGRATION,)
+	plan = frappe.db.sql("EXPLAIN " + _get_inventory_levels_query(warehouses), values, as_dict=True)
+
+	timings = []
+	for _ in range(runs):
+		start = time.perf_counter()
+		rows = get_inventory_levels(warehouses, INTEGRATION)
+		timings.append(time.perf_counter() - start)
+
+	print(f"\n{label}: {len(rows)} rows, best of {runs}: {min(timings):.3f}s")
+	for row in plan:
+		print(
+			f"  {row.get('table')}: type={row.get('type')} key={row.get('key')} "
+			f"rows={row.get('rows')} extra={row.get('Extra')}"
+		)
+
+
+def _make_data(items: int, warehouses, changed_percent: float) -> None:
+	synced_on = now_datetime()
+	bin_modified = add_to_date(synced_on, hours=-1)
+	changed_modified = add_to_date(synced_on, hours=1)
+	changed_every = int(100 / changed_percent) if changed_percent else 0
+
+	ecom_items = []
+	bins = []
+	for i in range(items):
+		item_code = f"{PREFIX}ITEM-{i}"
+		ecom_items.append(
+			(f"{PREFIX}{i}", item_code, INTEGRATION, item_code, synced_on, synced_on, synced_on)
+		)
+		for warehouse in warehouses:
+			modified = changed_modified if changed_every and not i % changed_every else bin_modified
+			bins.append((f"{PREFIX}{i}-{warehouse}", item_code, warehouse, 10, 0, modified, modified))
+
+		if len(bins) >= BATCH_SIZE:
+			_insert_bins(bins)
+			bins = []
+
+	_insert_bins(bins)
+	for batch in _chunks(ecom_items):
+		frappe.db.bulk_insert(
+			"Ecommerce Item",
+			fields=[
+				"name",
+				"erpnext_item_code",
+				"integration",
+				"integration_item_code",
+				"inventory_synced_on",
+				"creation",
+				"modified",
+			],
+			values=batch,
+		)
+	frappe.db.commit()
+
+
+def _insert_bins(bins: List) -> None:
+	frappe.db.bulk_insert(
+		"Bin",
+		fields=["name", "item_code", "warehouse", "actual_qty", "reserved_qty", "creation", "modified"],
+		values=bins,
+	)
+
+
+def _chunks(values: List):
+	for i in range(0, len(values), BATCH_SIZE):
+		yield values[i : i + BATCH_SIZE]
+
+
+def _drop_indexes() -> None:
+	for doctype, (index_name, _columns) in INVENTORY_INDEXES.items():
+		if frappe.db.has_index(f"tab{doctype}", index_name):
+			frappe.db.sql_ddl(f"ALTER TABLE `tab{doctype}` DROP INDEX `{index_name}`")
+
+
+def _delete_data() -> None:
+	frappe.db.sql("DELETE FROM `tabEcommerce Item` WHERE integration = %s", INTEGRATION)
+	frappe.db.sql("DELETE FROM `tabBin` WHERE name LIKE %s", f"{PREFIX}%")
+	frappe.db.commit()
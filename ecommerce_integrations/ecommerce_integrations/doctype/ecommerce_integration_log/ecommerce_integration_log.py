@@ -1,40 +1,100 @@
 # Copyright (c) 2021, Frappe and contributors
 # For license information, please see LICENSE
 
+import base64
 import json
+import zlib
+from typing import Dict, List, Optional
 
 import frappe
 from frappe import _
 from frappe.model.document import Document
+from frappe.model.naming import make_autoname
 from frappe.query_builder import Interval
 from frappe.query_builder.functions import Now
-from frappe.utils import strip_html
+from frappe.utils import cint, now, strip_html
 from frappe.utils.data import cstr
 
+DOCTYPE = "Ecommerce Integration Log"
+
+# In background jobs logs with these statuses are only written with next commit. Other
+# statuses are committed immediately, callers rely on it for committing synced records.
+BUFFERED_STATUSES = ("Queued",)
+
+# fields written by `create_log`
+LOG_FIELDS = (
+	"status",
+	"method",
+	"message",
+	"traceback",
+	"request_data",
+	"response_data",
+	"title",
+	"external_type",
+	"external_id",
+)
+
+# payloads longer than this are stored compressed, see `compress_payload`
+PAYLOAD_COMPRESSION_THRESHOLD = 4096
+COMPRESSED_PAYLOAD_PREFIX = "zlib:"
+
+# old logs are deleted in chunks of this size, one transaction per chunk
+LOG_PURGE_CHUNK_SIZE = 1000
+
+# site_config key, days after which Error logs are also cleared. Kept forever if not set.
+ERROR_LOG_RETENTION_KEY = "ecommerce_error_log_retention_days"
+
 
 class EcommerceIntegrationLog(Document):
+	def insert(self, *args, **kwargs):
+		if self.flags.buffered:
+			return self  # snapshot of a buffered log, it's written by `flush_logs`
+		return super().insert(*args, **kwargs)
+
+	def save(self, *args, **kwargs):
+		if self.flags.buffered:
+			return self
+		return super().save(*args, **kwargs)
+
 	def validate(self):
 		self._set_title()
+		self.request_data = compress_payload(self.request_data)
+		self.response_data = compress_payload(self.response_data)
 
-	def _set_title(self):
-		title = None
-		if self.message != "None":
-			title = self.message
-
-		if not title and self.method:
-			method = self.method.split(".")[-1]
-			title = method
+	def onload(self):
+		# payloads are only decompressed for showing them in form
+		self.request_data = decompress_payload(self.request_data)
+		self.response_data = decompress_payload(self.response_data)
 
+	def _set_title(self):
+		title = _get_title(self.message, self.method)
 		if title:
-			title = strip_html(title)
-			self.title = title if len(title) < 100 else title[:100] + "..."
+			self.title = title
 
 	@staticmethod
 	def clear_old_logs(days=90):
-		table = frappe.qb.DocType("Ecommerce Integration Log")
-		frappe.db.delete(
-			table, filters=((table.modified < (Now() - Interval(days=days)))) & (table.status == "Success")
-		)
+		_purge_logs(days, "Success")
+
+		error_log_retention = cint(frappe.conf.get(ERROR_LOG_RETENTION_KEY))
+		if error_log_retention:
+			_purge_logs(error_log_retention, "Error")
+
+
+def _purge_logs(days: int, status: str) -> None:
+	table = frappe.qb.DocType(DOCTYPE)
+	while True:
+		names = (
+			frappe.qb.from_(table)
+			.select(table.name)
+			.where((table.modified < (Now() - Interval(days=days))) & (table.status == status))
+			.limit(LOG_PURGE_CHUNK_SIZE)
+		).run(pluck=True)
+
+		if not names:
+			break
+
+		frappe.db.delete(DOCTYPE, {"name": ("in", names)})
+		frappe.db.commit()
 
 
 def create_log(
@@ -47,30 +107,54 @@ def create_log(
 	method=None,
 	message=None,
 	make_new=False,
+	external_id=None,
+	external_type=None,
 ):
+	"""Create new log or update log of current request (`frappe.flags.request_id`).
+
+	external_id: primary id of synced object on integration e.g. order id, used for finding logs.
+	external_type: type of object, e.g. Order
+
+	In background jobs status changes are buffered and written in bulk, see `BUFFERED_STATUSES`."""
 	make_new = make_new or not bool(frappe.flags.request_id)
+	buffer = _get_log_buffer()
 
 	if rollback:
 		frappe.db.rollback()
+		if buffer is not None:
+			buffer.flush_on_commit = False  # rollback clears commit hooks
 
-	if make_new:
-		log = frappe.get_doc({"doctype": "Ecommerce Integration Log", "integration": cstr(module_def)})
-		log.insert(ignore_permissions=True)
-	else:
-		log = frappe.get_doc("Ecommerce Integration Log", frappe.flags.request_id)
+	values = frappe._dict(
+		message=message or _get_message(exception),
+		method=method,
+		response_data=_dump_payload(response_data),
+		request_data=_dump_payload(request_data),
+		traceback=frappe.get_traceback(),
+		status=status,
+		external_id=cstr(external_id) or None,
+		external_type=external_type,
+	)
 
-	if response_data and not isinstance(response_data, str):
-		response_data = json.dumps(response_data, sort_keys=True, indent=4)
+	if buffer is not None:
+		log = _buffer_log(buffer, module_def, values, make_new)
+		if status not in BUFFERED_STATUSES:
+			flush_logs()
+			frappe.db.commit()
+		return log
 
-	if request_data and not isinstance(request_data, str):
-		request_data = json.dumps(request_data, sort_keys=True, indent=4)
+	if make_new:
+		log = frappe.get_doc({"doctype": DOCTYPE, "integration": cstr(module_def)})
+	else:
+		log = frappe.get_doc(DOCTYPE, frappe.flags.request_id)
 
-	log.message = message or _get_message(exception)
+	log.message = values.message
 	log.method = log.method or method
-	log.response_data = response_data or log.response_data
-	log.request_data = request_data or log.request_data
-	log.traceback = log.traceback or frappe.get_traceback()
+	log.response_data = values.response_data or log.response_data
+	log.request_data = values.request_data or log.request_data
+	log.traceback = log.traceback or values.traceback
 	log.status = status
+	log.external_id = values.external_id or log.external_id
+	log.external_type = values.external_type or log.external_type
 	log.save(ignore_permissions=True)
 
 	frappe.db.commit()
@@ -78,6 +162,151 @@ def create_log(
 	return log
 
 
+def start_log_buffer():
+	"""Buffer logs created in background job, called by `before_job` hook."""
+	frappe.local.ecommerce_log_buffer = frappe._dict(logs={}, flush_on_commit=False)
+
+
+def end_log_buffer():
+	"""Write and commit logs buffered in background job, called by `after_job` hook.
+
+	Job's transaction is already committed or rolled back at this point."""
+	buffer = _get_log_buffer()
+	if buffer is None:
+		return
+
+	if buffer.logs:
+		flush_logs()
+		frappe.db.commit()
+
+	del frappe.local.ecommerce_log_buffer
+
+
+def flush_logs():
+	"""Write buffered logs in current transaction."""
+	buffer = _get_log_buffer()
+	if not buffer or not buffer.logs:
+		return
+
+	logs, buffer.logs = buffer.logs, {}
+	buffer.flush_on_commit = False
+
+	new_logs = [log for log in logs.values() if log.is_new]
+	updates = {name: log for name, log in logs.items() if not log.is_new}
+
+	if updates:
+		existing = frappe.get_all(
+			DOCTYPE,
+			filters={"name": ("in", list(updates))},
+			fields=["name", "method", "traceback"],
+		)
+		for row in existing:
+			update = updates.pop(row.name)
+			update.method = row.method or update.method
+			update.traceback = row.traceback or update.traceback
+			update.title = _get_title(update.message, update.method)
+			frappe.db.set_value(
+				DOCTYPE,
+				row.name,
+				{f: update[f] for f in LOG_FIELDS if update.get(f) is not None},
+			)
+
+		# log of `request_id` isn't written yet, e.g. it's still buffered by another job
+		new_logs += updates.values()
+
+	if new_logs:
+		timestamp = now()
+		user = frappe.session.user
+		frappe.db.bulk_insert(
+			DOCTYPE,
+			fields=["name", "creation", "modified", "owner", "modified_by", "integration", *LOG_FIELDS],
+			values=[
+				(log.name, timestamp, timestamp, user, user, log.integration)
+				+ tuple(log.get(f) for f in LOG_FIELDS)
+				for log in new_logs
+			],
+			# a log inserted for missing `request_id` can also be inserted by the job buffering it
+			ignore_duplicates=True,
+		)
+
+
+def _get_log_buffer():
+	return getattr(frappe.local, "ecommerce_log_buffer", None)
+
+
+def _buffer_log(buffer, module_def, values, make_new) -> Document:
+	if make_new:
+		name = make_autoname("hash", DOCTYPE)
+		log = buffer.logs[name] = frappe._dict(
+			values, name=name, integration=cstr(module_def), is_new=True
+		)
+	else:
+		name = frappe.flags.request_id
+		log = buffer.logs.get(name)
+		if log is None:
+			log = buffer.logs[name] = frappe._dict(
+				name=name, integration=cstr(module_def), is_new=False
+			)
+
+		log.message = values.message
+		log.method = log.method or values.method
+		log.response_data = values.response_data or log.response_data
+		log.request_data = values.request_data or log.request_data
+		log.traceback = log.traceback or values.traceback
+		log.status = values.status
+		log.external_id = values.external_id or log.external_id
+		log.external_type = values.external_type or log.external_type
+
+	log.title = _get_title(log.message, log.method)
+
+	if not buffer.flush_on_commit:
+		frappe.db.before_commit.add(flush_logs)
+		buffer.flush_on_commit = True
+
+	# snapshot of buffered log, only meant for reading e.g. `log.name`. It's never inserted,
+	# `save` and `insert` do nothing on it so callers can't create a duplicate.
+	snapshot = frappe.get_doc({"doctype": DOCTYPE, **{k: v for k, v in log.items() if k != "is_new"}})
+	snapshot.flags.buffered = True
+	return snapshot
+
+
+def _dump_payload(data):
+	if data and not isinstance(data, str):
+		data = json.dumps(data, separators=(",", ":"), default=str)
+	return compress_payload(data)
+
+
+def compress_payload(data):
+	"""Compress large payloads, use `decompress_payload` for reading them."""
+	if (
+		not data
+		or len(data) <= PAYLOAD_COMPRESSION_THRESHOLD
+		or data.startswith(COMPRESSED_PAYLOAD_PREFIX)
+	):
+		return data
+
+	return COMPRESSED_PAYLOAD_PREFIX + base64.b64encode(zlib.compress(data.encode())).decode()
+
+
+def decompress_payload(data):
+	if data and data.startswith(COMPRESSED_PAYLOAD_PREFIX):
+		return zlib.decompress(base64.b64decode(data[len(COMPRESSED_PAYLOAD_PREFIX) :])).decode()
+	return data
+
+
+def _get_title(message, method):
+	title = None
+	if message != "None":
+		title = message
+
+	if not title and method:
+		title = method.split(".")[-1]
+
+	if title:
+		title = strip_html(title)
+		return title if len(title) < 100 else title[:100] + "..."
+
+
 def _get_message(exception):
 	if hasattr(exception, "message"):
 		return strip_html(exception.message)
@@ -107,15 +336,58 @@ def _retry_job(job: str):
 		queue="short",
 		timeout=300,
 		is_async=True,
-		payload=json.loads(doc.request_data),
+		payload=json.loads(decompress_payload(doc.request_data)),
 		request_id=doc.name,
 		enqueue_after_commit=True,
 	)
 
 
 @frappe.whitelist()
-def bulk_retry(names):
+def bulk_retry(names, latest_only=False):
+	"""Retry failed logs.
+
+	If `latest_only` is set, only the latest failed log of each external id is retried."""
 	if isinstance(names, str):
 		names = json.loads(names)
+
+	if cint(latest_only):
+		names = _get_latest_failed_logs(names)
+
 	for name in names:
 		_retry_job(name)
+
+
+@frappe.whitelist()
+def get_logs_by_external_id(external_id: str, integration: Optional[str] = None) -> List[Dict]:
+	frappe.only_for("System Manager")
+
+	filters = {"external_id": external_id}
+	if integration:
+		filters["integration"] = integration
+
+	return frappe.get_all(
+		DOCTYPE,
+		filters=filters,
+		fields=["name", "integration", "status", "method", "title", "external_type", "creation"],
+		order_by="creation desc",
+	)
+
+
+def _get_latest_failed_logs(names: List[str]) -> List[str]:
+	logs = frappe.get_all(
+		DOCTYPE,
+		filters={"name": ("in", names), "status": "Error"},
+		fields=["name", "integration", "external_id"],
+		order_by="creation desc",
+	)
+
+	latest = []
+	seen = set()
+	for log in logs:
+		key = (log.integration, log.external_id)
+		if log.external_id and key in seen:
+			continue
+		seen.add(key)
+		latest.append(log.name)
+
+	return latest
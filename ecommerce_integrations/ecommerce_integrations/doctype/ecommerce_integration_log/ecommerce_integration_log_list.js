@@ -17,5 +17,12 @@ frappe.listview_settings["Ecommerce Integration Log"] = {
 				"ecommerce_integrations.ecommerce_integrations.doctype.ecommerce_integration_log.ecommerce_integration_log.bulk_retry"
 			);
 		});
+		listview.page.add_action_item(__("Retry Latest per External ID"), () => {
+			frappe.call({
+				method: "ecommerce_integrations.ecommerce_integrations.doctype.ecommerce_integration_log.ecommerce_integration_log.bulk_retry",
+				args: { names: listview.get_checked_items(true), latest_only: 1 },
+				callback: () => listview.refresh(),
+			});
+		});
 	},
 };
@@ -1,9 +1,73 @@
 # Copyright (c) 2021, Frappe and Contributors
 # See LICENSE
 
-# import frappe
+import json
 import unittest
 
+import frappe
+
+from ecommerce_integrations.ecommerce_integrations.doctype.ecommerce_integration_log.ecommerce_integration_log import (
+	COMPRESSED_PAYLOAD_PREFIX,
+	_get_latest_failed_logs,
+	create_log,
+	decompress_payload,
+	end_log_buffer,
+	start_log_buffer,
+)
+
 
 class TestEcommerceIntegrationLog(unittest.TestCase):
-	pass
+	def tearDown(self):
+		frappe.flags.request_id = None
+		end_log_buffer()
+
+	def test_buffered_log(self):
+		start_log_buffer()
+
+		log = create_log(module_def="shopify", request_data={"id": 1}, make_new=True)
+		self.assertFalse(frappe.db.exists("Ecommerce Integration Log", log.name))
+
+		frappe.flags.request_id = log.name
+		create_log(status="Success", message="synced")
+
+		log = frappe.get_doc("Ecommerce Integration Log", log.name)
+		self.assertEqual(log.status, "Success")
+		self.assertEqual(log.message, "synced")
+		self.assertEqual(log.request_data, '{"id":1}')
+
+	def test_buffered_update_of_missing_log(self):
+		start_log_buffer()
+
+		frappe.flags.request_id = frappe.generate_hash(length=10)
+		snapshot = create_log(module_def="shopify", status="Queued", message="retried")
+
+		# snapshot is never written by callers
+		snapshot.save()
+		self.assertFalse(frappe.db.exists("Ecommerce Integration Log", snapshot.name))
+
+		end_log_buffer()
+		log = frappe.get_doc("Ecommerce Integration Log", snapshot.name)
+		self.assertEqual(log.message, "retried")
+		self.assertEqual(log.integration, "shopify")
+
+	def test_compressed_payload(self):
+		order = {"id": 1, "line_items": [{"sku": f"SKU-{i}", "quantity": 1} for i in range(500)]}
+
+		log = create_log(module_def="shopify", request_data=order, make_new=True)
+		log = frappe.get_doc("Ecommerce Integration Log", log.name)
+
+		self.assertTrue(log.request_data.startswith(COMPRESSED_PAYLOAD_PREFIX))
+		self.assertEqual(json.loads(decompress_payload(log.request_data)), order)
+
+		log.run_method("onload")
+		self.assertEqual(json.loads(log.request_data), order)
+
+	def test_latest_failed_logs(self):
+		logs = [
+			create_log(module_def="shopify", status="Error", make_new=True, external_id=order_id)
+			for order_id in ("1001", "1001", "1002")
+		]
+		frappe.db.set_value("Ecommerce Integration Log", logs[0].name, "creation", "2021-01-01")
+
+		latest = _get_latest_failed_logs([log.name for log in logs])
+		self.assertEqual(sorted(latest), sorted([logs[1].name, logs[2].name]))
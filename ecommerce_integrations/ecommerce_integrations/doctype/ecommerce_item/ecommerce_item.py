@@ -1,20 +1,33 @@
 # Copyright (c) 2021, Frappe and contributors
 # For license information, please see LICENSE
 
-from typing import Dict, Optional
+import hashlib
+import json
+from typing import Dict, List, Optional, Set, Tuple
 
 import frappe
 from erpnext import get_default_company
-from frappe import _
+from frappe import _, _dict
 from frappe.model.document import Document
 from frappe.utils import cstr, get_datetime, now
 
+from ecommerce_integrations.controllers.inventory import add_inventory_indexes
+
+ITEM_CACHE_KEY = "ecommerce_item_lookup"
+ITEM_CACHE_TTL = 6 * 60 * 60
+# items that don't exist yet are usually created soon after, so misses expire quickly
+ITEM_CACHE_MISS_TTL = 60
+
+# (integration_item_code, variant_id, sku)
+ItemKey = Tuple[str, Optional[str], Optional[str]]
+
 
 class EcommerceItem(Document):
 	erpnext_item_code: str  # item_code in ERPNext
 	integration: str  # name of integration
 	integration_item_code: str  # unique id of product on integration
 	variant_id: str  # unique id of product variant on integration
+	inventory_item_id: str  # id used by integration for stock levels of variant (if different)
 	has_variants: int  # is the product a template, i.e. does it have varients
 	variant_of: str  # template id of ERPNext item
 	sku: str  # SKU
@@ -25,6 +38,17 @@ class EcommerceItem(Document):
 	def before_insert(self):
 		self.check_unique_constraints()
 
+	def on_update(self):
+		self.clear_lookup_cache()
+
+	def on_trash(self):
+		self.clear_lookup_cache()
+
+	def clear_lookup_cache(self):
+		for doc in (self, self.get_doc_before_save()):
+			if doc:
+				clear_item_cache(doc.integration, doc.integration_item_code, doc.sku)
+
 	def check_unique_constraints(self) -> None:
 		filters = []
 
@@ -53,6 +77,10 @@ class EcommerceItem(Document):
 			self.inventory_synced_on = get_datetime("1970-01-01")
 
 
+def on_doctype_update():
+	add_inventory_indexes()
+
+
 def is_synced(
 	integration: str,
 	integration_item_code: str,
@@ -66,21 +94,62 @@ def is_synced(
 	        integration: shopify,
 	        integration_item_code: TSHIRT
 	"""
-	filter = {"integration": integration, "integration_item_code": integration_item_code}
-
-	if variant_id:
-		filter.update({"variant_id": variant_id})
-
-	item_exists = bool(frappe.db.exists("Ecommerce Item", filter))
+	rows = _get_item_rows(integration, [integration_item_code])[integration_item_code]
+	item_exists = _match_item_code(rows, variant_id) is not None
 
 	if not item_exists and sku:
 		return _is_sku_synced(integration, sku)
 	return item_exists
 
 
+def get_synced_item_codes(integration: str) -> Set[str]:
+	"""Get all synced integration item codes of integration (casefolded) in one query.
+
+	Used by full imports to skip synced products without checking them one by one."""
+	codes = frappe.get_all(
+		"Ecommerce Item",
+		filters={"integration": integration},
+		pluck="integration_item_code",
+		distinct=True,
+	)
+	return {cstr(code).casefold() for code in codes}
+
+
+def get_payload_hash(payload) -> str:
+	"""Stable hash of data pushed to integration, used to skip pushing unchanged items."""
+	data = json.dumps(payload, sort_keys=True, default=str, separators=(",", ":"))
+	return hashlib.sha256(data.encode()).hexdigest()
+
+
+def get_payload_hashes(integration: str, erpnext_item_codes: List[str]) -> Dict[str, str]:
+	"""Get hash of last pushed payload of each item that has it."""
+	if not erpnext_item_codes:
+		return {}
+
+	rows = frappe.get_all(
+		"Ecommerce Item",
+		filters={
+			"integration": integration,
+			"erpnext_item_code": ("in", erpnext_item_codes),
+			"payload_hash": ("is", "set"),
+		},
+		fields=["erpnext_item_code", "payload_hash"],
+	)
+	return {d.erpnext_item_code: d.payload_hash for d in rows}
+
+
+def set_payload_hash(integration: str, erpnext_item_code: str, payload_hash: str) -> None:
+	frappe.db.set_value(
+		"Ecommerce Item",
+		{"integration": integration, "erpnext_item_code": erpnext_item_code},
+		"payload_hash",
+		payload_hash,
+		update_modified=False,
+	)
+
+
 def _is_sku_synced(integration: str, sku: str) -> bool:
-	filter = {"integration": integration, "sku": sku}
-	return bool(frappe.db.exists("Ecommerce Item", filter))
+	return bool(_get_sku_item_codes(integration, [sku])[sku])
 
 
 def get_erpnext_item_code(
@@ -89,13 +158,8 @@ def get_erpnext_item_code(
 	variant_id: Optional[str] = None,
 	has_variants: Optional[int] = 0,
 ) -> Optional[str]:
-	filters = {"integration": integration, "integration_item_code": integration_item_code}
-	if variant_id:
-		filters.update({"variant_id": variant_id})
-	elif has_variants:
-		filters.update({"has_variants": 1})
-
-	return frappe.db.get_value("Ecommerce Item", filters, fieldname="erpnext_item_code")
+	rows = _get_item_rows(integration, [integration_item_code])[integration_item_code]
+	return _match_item_code(rows, variant_id, has_variants)
 
 
 def get_erpnext_item(
@@ -110,18 +174,160 @@ def get_erpnext_item(
 	Note: If variant_id is not specified then item is assumed to be single OR template.
 	"""
 
-	item_code = None
+	item = (integration_item_code, variant_id, sku)
+	item_code = resolve_many(integration, [item], has_variants)[item]
+
+	if item_code:
+		return frappe.get_doc("Item", item_code)
+
+
+def resolve_many(
+	integration: str, items: List[ItemKey], has_variants: int = 0
+) -> Dict[ItemKey, Optional[str]]:
+	"""Get ERPNext item code of each (integration_item_code, variant_id, sku) in at most two queries.
+
+	Items are matched like `get_erpnext_item`, by SKU first and then by item code and variant."""
+	sku_item_codes = _get_sku_item_codes(integration, [sku for _code, _variant, sku in items if sku])
+	item_rows = _get_item_rows(integration, [code for code, _variant, _sku in items])
+
+	item_codes = {}
+	for item in items:
+		code, variant_id, sku = item
+		matched_skus = sku_item_codes.get(sku) if sku else None
+		if matched_skus:
+			item_codes[item] = matched_skus[0]
+		else:
+			item_codes[item] = _match_item_code(item_rows[code], variant_id, has_variants)
+
+	return item_codes
+
+
+def clear_item_cache(
+	integration: str, integration_item_code: Optional[str] = None, sku: Optional[str] = None
+) -> None:
+	keys = []
+	if integration_item_code:
+		keys.append(_make_cache_key("item", integration, integration_item_code))
 	if sku:
-		item_code = frappe.db.get_value(
-			"Ecommerce Item", {"sku": sku, "integration": integration}, fieldname="erpnext_item_code"
+		keys.append(_make_cache_key("sku", integration, sku))
+
+	_delete_cached(keys)
+
+	# changes are not visible to other workers until commit and might be rolled back, so
+	# skip cache for these keys in this request and clear them again after commit.
+	_get_local_cache().dirty.update(keys)
+	frappe.db.after_commit.add(lambda: _delete_cached(keys))
+
+
+def clear_cache_on_item_rename(doc, method=None, old=None, new=None, merge=False):
+	"""Item rename updates `erpnext_item_code` of Ecommerce Items without saving them."""
+	ecommerce_items = frappe.get_all(
+		"Ecommerce Item",
+		filters={"erpnext_item_code": ("in", [old, new])},
+		fields=["integration", "integration_item_code", "sku"],
+	)
+	for ecommerce_item in ecommerce_items:
+		clear_item_cache(
+			ecommerce_item.integration, ecommerce_item.integration_item_code, ecommerce_item.sku
 		)
-	if not item_code:
-		item_code = get_erpnext_item_code(
-			integration, integration_item_code, variant_id=variant_id, has_variants=has_variants
+
+
+def _match_item_code(rows: List[_dict], variant_id=None, has_variants=0) -> Optional[str]:
+	for row in rows:
+		if variant_id and cstr(row.variant_id).casefold() != cstr(variant_id).casefold():
+			continue
+		if not variant_id and has_variants and not row.has_variants:
+			continue
+		return row.erpnext_item_code
+
+
+def _get_item_rows(integration: str, integration_item_codes: List[str]) -> Dict[str, List[_dict]]:
+	"""Get Ecommerce Items of each integration item code, latest first."""
+
+	def fetch(codes):
+		rows = frappe.get_all(
+			"Ecommerce Item",
+			filters={"integration": integration, "integration_item_code": ("in", codes)},
+			fields=["integration_item_code", "variant_id", "has_variants", "erpnext_item_code"],
+			order_by="modified desc",
 		)
+		return _group_rows(rows, "integration_item_code")
 
-	if item_code:
-		return frappe.get_doc("Item", item_code)
+	return _get_cached("item", integration, integration_item_codes, fetch)
+
+
+def _get_sku_item_codes(integration: str, skus: List[str]) -> Dict[str, List[str]]:
+	def fetch(skus):
+		rows = frappe.get_all(
+			"Ecommerce Item",
+			filters={"integration": integration, "sku": ("in", skus)},
+			fields=["sku", "erpnext_item_code"],
+			order_by="modified desc",
+		)
+		grouped = _group_rows(rows, "sku")
+		return {sku: [row.erpnext_item_code for row in group] for sku, group in grouped.items()}
+
+	return _get_cached("sku", integration, skus, fetch)
+
+
+def _group_rows(rows: List[_dict], field: str) -> Dict[str, List[_dict]]:
+	# database comparison is case insensitive, so are the lookups
+	grouped = {}
+	for row in rows:
+		grouped.setdefault(cstr(row.pop(field)).casefold(), []).append(row)
+	return grouped
+
+
+def _get_cached(kind: str, integration: str, values: List, fetch) -> Dict:
+	"""Read-through cache of lookups, tiers: current request (frappe.local) -> redis -> `fetch`.
+
+	`fetch(missing_values)` returns results keyed by casefolded value, values without results
+	are cached as empty list for a short time."""
+	local_cache = _get_local_cache()
+	results = {}
+	missing = {}
+
+	for value in set(values):
+		key = _make_cache_key(kind, integration, value)
+		if key in local_cache.values:
+			results[value] = local_cache.values[key]
+			continue
+
+		if key not in local_cache.dirty:
+			cached = frappe.cache().get_value(key, expires=True)
+			if cached is not None:
+				results[value] = local_cache.values[key] = cached
+				continue
+
+		missing[value] = key
+
+	if missing:
+		fetched = fetch([cstr(value) for value in missing])
+		for value, key in missing.items():
+			results[value] = fetched.get(cstr(value).casefold()) or []
+			if key not in local_cache.dirty:
+				local_cache.values[key] = results[value]
+				ttl = ITEM_CACHE_TTL if results[value] else ITEM_CACHE_MISS_TTL
+				frappe.cache().set_value(key, results[value], expires_in_sec=ttl)
+
+	return results
+
+
+def _get_local_cache() -> _dict:
+	if not getattr(frappe.local, "ecommerce_item_cache", None):
+		frappe.local.ecommerce_item_cache = _dict(values={}, dirty=set())
+	return frappe.local.ecommerce_item_cache
+
+
+def _make_cache_key(kind: str, integration: str, value) -> str:
+	return f"{ITEM_CACHE_KEY}|{integration}|{kind}|{cstr(value).casefold()}"
+
+
+def _delete_cached(keys: List[str]) -> None:
+	local_cache = _get_local_cache()
+	for key in keys:
+		local_cache.values.pop(key, None)
+		frappe.cache().delete_value(key)
 
 
 def create_ecommerce_item(
@@ -132,6 +338,7 @@ def create_ecommerce_item(
 	sku: Optional[str] = None,
 	variant_of: Optional[str] = None,
 	has_variants=0,
+	inventory_item_id: Optional[str] = None,
 ) -> None:
 	"""Create Item in erpnext and link it with Ecommerce item doctype.
 
@@ -168,6 +375,7 @@ def create_ecommerce_item(
 			"variant_id": cstr(variant_id),
 			"variant_of": cstr(variant_of),
 			"sku": sku,
+			"inventory_item_id": cstr(inventory_item_id),
 			"item_synced_on": now(),
 		}
 	)
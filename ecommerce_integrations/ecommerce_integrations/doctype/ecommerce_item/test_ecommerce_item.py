@@ -40,6 +40,27 @@ class TestEcommerceItem(unittest.TestCase):
 		self.assertTrue(ecommerce_item.is_synced("shopify", "T-SHIRT", sku="TEST_ITEM_1"))
 		self.assertFalse(ecommerce_item.is_synced("shopify", "T-SHIRTX", sku="UNKNOWNSKU"))
 
+	def test_get_synced_item_codes(self):
+		self._create_doc()
+		self._create_variant_doc()
+		self.assertEqual(ecommerce_item.get_synced_item_codes("shopify"), {"t-shirt"})
+		self.assertEqual(ecommerce_item.get_synced_item_codes("unknown"), set())
+
+	def test_payload_hash(self):
+		payload = {"title": "T-Shirt", "variant": {"sku": "TS", "price": 10}}
+		reordered = {"variant": {"price": 10, "sku": "TS"}, "title": "T-Shirt"}
+		self.assertEqual(
+			ecommerce_item.get_payload_hash(payload), ecommerce_item.get_payload_hash(reordered)
+		)
+
+		self._create_doc()
+		payload_hash = ecommerce_item.get_payload_hash(payload)
+		ecommerce_item.set_payload_hash("shopify", "_Test Item", payload_hash)
+		self.assertEqual(
+			ecommerce_item.get_payload_hashes("shopify", ["_Test Item", "_Test Item 2"]),
+			{"_Test Item": payload_hash},
+		)
+
 	def test_get_erpnext_item(self):
 		self._create_doc()
 		a = ecommerce_item.get_erpnext_item("shopify", "T-SHIRT")
@@ -64,6 +85,45 @@ class TestEcommerceItem(unittest.TestCase):
 		self.assertEqual(a.name, b.name)
 		self.assertEqual(a.item_code, b.item_code)
 
+	def test_resolve_many(self):
+		self._create_variant_doc()
+		self._create_doc_with_sku()
+
+		items = [
+			("T-SHIRT", "T-SHIRT-RED", None),
+			("T-SHIRTX", None, "TEST_ITEM_1"),
+			("UNKNOWN", None, None),
+		]
+		self.assertEqual(
+			ecommerce_item.resolve_many("shopify", items),
+			{items[0]: "_Test Item 2", items[1]: "_Test Item", items[2]: None},
+		)
+
+	def test_lookup_cache_invalidation(self):
+		self.assertFalse(ecommerce_item.is_synced("shopify", "T-SHIRT"))
+
+		self._create_doc()
+		self.assertTrue(ecommerce_item.is_synced("shopify", "T-SHIRT"))
+
+		frappe.get_doc("Ecommerce Item", {"integration_item_code": "T-SHIRT"}).delete()
+		self.assertFalse(ecommerce_item.is_synced("shopify", "T-SHIRT"))
+
+	def test_lookup_cache_item_rename(self):
+		self._create_doc()
+		self.assertEqual(ecommerce_item.get_erpnext_item_code("shopify", "T-SHIRT"), "_Test Item")
+
+		# rename updates links without saving Ecommerce Item
+		frappe.db.set_value(
+			"Ecommerce Item",
+			{"integration_item_code": "T-SHIRT"},
+			"erpnext_item_code",
+			"_Test Item 2",
+			update_modified=False,
+		)
+		ecommerce_item.clear_cache_on_item_rename(None, old="_Test Item", new="_Test Item 2")
+
+		self.assertEqual(ecommerce_item.get_erpnext_item_code("shopify", "T-SHIRT"), "_Test Item 2")
+
 	def _create_doc(self):
 		"""basic test for creation of ecommerce item"""
 		frappe.get_doc(
@@ -109,6 +109,7 @@ doc_events = {
 	"Item": {
 		"after_insert": "ecommerce_integrations.shopify.product.upload_erpnext_item",
 		"on_update": "ecommerce_integrations.shopify.product.upload_erpnext_item",
+		"after_rename": "ecommerce_integrations.ecommerce_integrations.doctype.ecommerce_item.ecommerce_item.clear_cache_on_item_rename",
 		"validate": [
 			"ecommerce_integrations.utils.taxation.validate_tax_template",
 			"ecommerce_integrations.unicommerce.product.validate_item",
@@ -141,7 +142,7 @@ scheduler_events = {
 		"ecommerce_integrations.zenoti.doctype.zenoti_settings.zenoti_settings.sync_stocks"
 	],
 	"hourly": [
-		"ecommerce_integrations.shopify.order.sync_old_orders",
+		"ecommerce_integrations.shopify.old_orders.sync_old_orders",
 		"ecommerce_integrations.amazon.doctype.amazon_sp_api_settings.amazon_sp_api_settings.schedule_get_order_details",
 	],
 	"hourly_long": [
@@ -153,11 +154,17 @@ scheduler_events = {
 	"weekly": [],
 	"monthly": [],
 	"cron": {
+		# Every minute
+		"* * * * *": [
+			"ecommerce_integrations.shopify.webhook_queue.enqueue_drain",
+			"ecommerce_integrations.shopify.upload_queue.enqueue_upload",
+		],
 		# Every five minutes
 		"*/5 * * * *": [
 			"ecommerce_integrations.unicommerce.order.sync_new_orders",
 			"ecommerce_integrations.unicommerce.inventory.update_inventory_on_unicommerce",
 			"ecommerce_integrations.unicommerce.delivery_note.prepare_delivery_note",
+			"ecommerce_integrations.unicommerce.item_import.resolve_item_import_jobs",
 		],
 	},
 }
@@ -171,6 +178,16 @@ extend_bootinfo = "ecommerce_integrations.boot.boot_session"
 
 before_tests = "ecommerce_integrations.utils.before_test.before_tests"
 
+# Job Events
+# ----------
+
+before_job = [
+	"ecommerce_integrations.ecommerce_integrations.doctype.ecommerce_integration_log.ecommerce_integration_log.start_log_buffer"
+]
+after_job = [
+	"ecommerce_integrations.ecommerce_integrations.doctype.ecommerce_integration_log.ecommerce_integration_log.end_log_buffer"
+]
+
 # Overriding Methods
 # ------------------------------
 #
@@ -0,0 +1,8 @@
+import frappe
+
+from ecommerce_integrations.controllers.inventory import add_inventory_indexes
+
+
+def execute():
+	frappe.reload_doc("ecommerce_integrations", "doctype", "ecommerce_item")
+	add_inventory_indexes()
@@ -0,0 +1,16 @@
+import frappe
+
+from ecommerce_integrations.shopify.constants import SETTING_DOCTYPE
+
+
+def execute():
+	frappe.reload_doc("ecommerce_integrations", "doctype", "ecommerce_item")
+
+	settings = frappe.get_doc(SETTING_DOCTYPE)
+	if settings.is_enabled():
+		frappe.enqueue(
+			"ecommerce_integrations.shopify.inventory.backfill_inventory_item_ids",
+			queue="long",
+			timeout=3600,
+			enqueue_after_commit=True,
+		)
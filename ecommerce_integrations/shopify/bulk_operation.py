@@ -0,0 +1,270 @@
+"""Shopify GraphQL bulk operations.
+
+A bulk operation runs a query on Shopify's side and returns a JSONL file. The file is
+streamed line by line, nested connections in it are flat lines with `__parentId`
+which are attached back to their parent so every record can be processed on its own."""
+
+import json
+import time
+from itertools import islice
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
+
+import frappe
+from frappe.utils import get_datetime
+
+from ecommerce_integrations.shopify.constants import MODULE_NAME
+from ecommerce_integrations.shopify.utils import execute_graphql, from_gid
+from ecommerce_integrations.utils.http import get_session
+
+POLL_INTERVAL = 5
+POLL_TIMEOUT = 60 * 60
+# jobs don't wait longer than this for a running bulk operation of the site
+LOCK_WAIT_TIMEOUT = 30
+DOWNLOAD_TIMEOUT = 60
+
+# number of orders fetched in one REST call by ids
+ORDER_BATCH_SIZE = 250
+
+WEIGHT_UNITS = {"KILOGRAMS": "kg", "GRAMS": "g", "OUNCES": "oz", "POUNDS": "lb"}
+
+RUN_BULK_QUERY = """
+mutation bulkOperationRunQuery($query: String!) {
+	bulkOperationRunQuery(query: $query) {
+		bulkOperation {
+			id
+			status
+		}
+		userErrors {
+			field
+			message
+		}
+	}
+}
+"""
+
+CURRENT_BULK_OPERATION = """
+query {
+	currentBulkOperation {
+		id
+		status
+		errorCode
+		objectCount
+		url
+	}
+}
+"""
+
+PRODUCTS_QUERY = """
+{
+	products {
+		edges {
+			node {
+				id
+				title
+				descriptionHtml
+				productType
+				vendor
+				options {
+					name
+					values
+				}
+				featuredImage {
+					url
+				}
+				variants {
+					edges {
+						node {
+							id
+							title
+							sku
+							price
+							weight
+							weightUnit
+							selectedOptions {
+								name
+								value
+							}
+							inventoryItem {
+								id
+							}
+						}
+					}
+				}
+			}
+		}
+	}
+}
+"""
+
+ORDERS_QUERY = """
+{
+	orders(query: "status:open AND created_at:>='%s' AND created_at:<='%s'", sortKey: CREATED_AT) {
+		edges {
+			node {
+				id
+			}
+		}
+	}
+}
+"""
+
+
+class BulkOperationBusy(Exception):
+	"""Another bulk operation of the site is running."""
+
+
+def run_bulk_query(query: str) -> Optional[str]:
+	"""Start a bulk query, wait for it to finish and return URL of the result file.
+
+	URL is None if query didn't return any object. Shopify runs one bulk query of an app
+	at a time, `BulkOperationBusy` is raised if another one doesn't finish shortly so
+	callers can retry later instead of holding a worker."""
+	cache = frappe.cache()
+	lock = cache.lock(
+		cache.make_key("shopify_bulk_operation_lock"),
+		timeout=POLL_TIMEOUT,
+		blocking_timeout=LOCK_WAIT_TIMEOUT,
+	)
+	if not lock.acquire():
+		raise BulkOperationBusy("Another Shopify bulk operation is running")
+
+	try:
+		return _run_bulk_query(query)
+	finally:
+		lock.release()
+
+
+def _run_bulk_query(query: str) -> Optional[str]:
+	response = execute_graphql(RUN_BULK_QUERY, {"query": query})
+	result = response["data"]["bulkOperationRunQuery"]
+	if result["userErrors"]:
+		raise Exception(", ".join(e.get("message", "") for e in result["userErrors"]))
+
+	operation_id = result["bulkOperation"]["id"]
+	started = time.monotonic()
+
+	while time.monotonic() - started < POLL_TIMEOUT:
+		operation = execute_graphql(CURRENT_BULK_OPERATION, {})["data"]["currentBulkOperation"]
+		if not operation or operation["id"] != operation_id:
+			raise Exception(f"Bulk operation {operation_id} not found")
+
+		if operation["status"] == "COMPLETED":
+			return operation.get("url")
+		elif operation["status"] in ("FAILED", "CANCELED", "EXPIRED"):
+			raise Exception(
+				f"Bulk operation {operation_id} {operation['status'].lower()}: {operation.get('errorCode')}"
+			)
+
+		time.sleep(POLL_INTERVAL)
+
+	raise Exception(f"Bulk operation {operation_id} did not finish in {POLL_TIMEOUT} seconds")
+
+
+def stream_bulk_query(query: str) -> Iterator[Dict]:
+	"""Run bulk query and yield records from its result one by one."""
+	yield from stream_bulk_result(run_bulk_query(query))
+
+
+def stream_bulk_result(url: Optional[str]) -> Iterator[Dict]:
+	"""Yield records from result file of a bulk query one by one."""
+	if not url:
+		return
+
+	with get_session(MODULE_NAME).get(url, stream=True, timeout=DOWNLOAD_TIMEOUT) as response:
+		response.raise_for_status()
+		yield from iter_records(response.iter_lines())
+
+
+def iter_records(lines: Iterable) -> Iterator[Dict]:
+	"""Yield top level objects from JSONL lines with their children attached.
+
+	Shopify writes children right after their parent, so only the current record is kept
+	in memory. Children are added to `children` list of their parent."""
+	record = None
+	nodes = {}
+
+	for line in lines:
+		if not line or not line.strip():
+			continue
+
+		node = json.loads(line)
+		parent_id = node.pop("__parentId", None)
+
+		if parent_id is None:
+			if record is not None:
+				yield record
+			record = node
+			nodes = {node.get("id"): node}
+			continue
+
+		parent = nodes.get(parent_id)
+		if parent is None:
+			raise ValueError(f"Parent {parent_id} of {node.get('id')} not found before it")
+
+		parent.setdefault("children", []).append(node)
+		nodes[node.get("id")] = node
+
+	if record is not None:
+		yield record
+
+
+def iter_products(records: Iterable[Dict]) -> Iterator[Dict]:
+	"""Convert product records of `PRODUCTS_QUERY` to the format of Shopify's REST API."""
+	for record in records:
+		yield product_to_rest(record)
+
+
+def product_to_rest(product: Dict) -> Dict:
+	options = product.get("options") or []
+	option_names = [option["name"] for option in options]
+
+	variants = []
+	for variant in product.get("children") or []:
+		rest_variant = {
+			"id": int(from_gid(variant["id"])),
+			"title": variant.get("title"),
+			"sku": variant.get("sku"),
+			"price": variant.get("price"),
+			"weight": variant.get("weight"),
+			"weight_unit": WEIGHT_UNITS.get(variant.get("weightUnit")),
+			"inventory_item_id": int(from_gid(variant["inventoryItem"]["id"]))
+			if variant.get("inventoryItem")
+			else None,
+		}
+		for selected in variant.get("selectedOptions") or []:
+			if selected["name"] in option_names:
+				rest_variant[f"option{option_names.index(selected['name']) + 1}"] = selected["value"]
+		variants.append(rest_variant)
+
+	image = product.get("featuredImage")
+	return {
+		"id": int(from_gid(product["id"])),
+		"title": product.get("title"),
+		"body_html": product.get("descriptionHtml"),
+		"product_type": product.get("productType"),
+		"vendor": product.get("vendor"),
+		"options": [{"name": o["name"], "values": o.get("values") or []} for o in options],
+		"image": {"src": image["url"]} if image else None,
+		"variants": variants,
+	}
+
+
+def iter_bulk_order_ids(from_time, to_time) -> Iterator[str]:
+	"""Yield ids of orders created in range, listed by a bulk operation."""
+	query = ORDERS_QUERY % (
+		get_datetime(from_time).astimezone().isoformat(),
+		get_datetime(to_time).astimezone().isoformat(),
+	)
+	for record in stream_bulk_query(query):
+		yield from_gid(record["id"])
+
+
+def iter_order_batches(
+	order_ids: Iterable[str], fetch: Callable[[List[str]], List[Dict]]
+) -> Iterator[List[Dict]]:
+	"""Fetch full orders by ids in batches of `ORDER_BATCH_SIZE` using `fetch(ids)`.
+
+	Orders should be fetched by REST API, so payloads are same as the ones received in webhooks."""
+	order_ids = iter(order_ids)
+	while batch := list(islice(order_ids, ORDER_BATCH_SIZE)):
+		yield fetch(batch)
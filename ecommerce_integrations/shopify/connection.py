@@ -2,7 +2,6 @@ import base64
 import functools
 import hashlib
 import hmac
-import json
 from typing import List
 
 import frappe
@@ -10,14 +9,12 @@ from frappe import _
 from shopify.resources import Webhook
 from shopify.session import Session
 
-from ecommerce_integrations.shopify.constants import (
-	API_VERSION,
-	EVENT_MAPPER,
-	SETTING_DOCTYPE,
-	WEBHOOK_EVENTS,
-)
+from ecommerce_integrations.shopify import webhook_queue
+from ecommerce_integrations.shopify.constants import API_VERSION, SETTING_DOCTYPE, WEBHOOK_EVENTS
 from ecommerce_integrations.shopify.utils import create_shopify_log
 
+SHARED_SECRET_CACHE_KEY = "shopify_webhook_shared_secret"
+
 
 def temp_shopify_session(func):
 	"""Any function that needs to access shopify api needs this decorator. The decorator starts a temp session that's destroyed when function returns."""
@@ -99,33 +96,31 @@ def store_request_data() -> None:
 
 		_validate_request(frappe.request, hmac_header)
 
-		data = json.loads(frappe.request.data)
+		# only queue the webhook here, Shopify retries if it isn't acknowledged quickly
 		event = frappe.request.headers.get("X-Shopify-Topic")
+		webhook_id = frappe.request.headers.get("X-Shopify-Webhook-Id")
 
-		process_request(data, event)
-
-
-def process_request(data, event):
-
-	# create log
-	log = create_shopify_log(method=EVENT_MAPPER[event], request_data=data)
-
-	# enqueue backround job
-	frappe.enqueue(
-		method=EVENT_MAPPER[event],
-		queue="short",
-		timeout=300,
-		is_async=True,
-		**{"payload": data, "request_id": log.name},
-	)
+		shard = webhook_queue.push(event, frappe.request.data, webhook_id)
+		if shard is not None:
+			webhook_queue.enqueue_drain(shard)
 
 
 def _validate_request(req, hmac_header):
-	settings = frappe.get_doc(SETTING_DOCTYPE)
-	secret_key = settings.shared_secret
+	secret_key = get_shared_secret()
 
 	sig = base64.b64encode(hmac.new(secret_key.encode("utf8"), req.data, hashlib.sha256).digest())
 
-	if sig != bytes(hmac_header.encode()):
+	if not hmac_header or not hmac.compare_digest(sig, hmac_header.encode()):
 		create_shopify_log(status="Error", request_data=req.data)
 		frappe.throw(_("Unverified Webhook Data"))
+
+
+def get_shared_secret() -> str:
+	return frappe.cache().get_value(
+		SHARED_SECRET_CACHE_KEY,
+		generator=lambda: frappe.db.get_single_value(SETTING_DOCTYPE, "shared_secret") or "",
+	)
+
+
+def clear_shared_secret_cache() -> None:
+	frappe.cache().delete_value(SHARED_SECRET_CACHE_KEY)
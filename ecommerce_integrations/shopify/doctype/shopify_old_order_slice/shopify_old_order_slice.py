@@ -0,0 +1,9 @@
+# Copyright (c) 2026, Frappe and contributors
+# For license information, please see LICENSE
+
+# import frappe
+from frappe.model.document import Document
+
+
+class ShopifyOldOrderSlice(Document):
+	pass
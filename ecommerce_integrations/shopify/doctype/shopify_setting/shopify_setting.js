@@ -35,6 +35,35 @@ frappe.ui.form.on("Shopify Setting", {
 			});
 		});
 		frm.trigger("setup_queries");
+		frm.trigger("show_old_orders_sync_progress");
+	},
+
+	show_old_orders_sync_progress: function (frm) {
+		if (!frm.doc.old_order_slices || !frm.doc.old_order_slices.length) return;
+
+		frappe.call({
+			doc: frm.doc,
+			method: "get_old_orders_sync_progress",
+			callback: (r) => {
+				const progress = r.message;
+				if (!progress || !progress.total_slices) return;
+
+				frm.dashboard.add_progress(
+					__("Old Orders Sync"),
+					(progress.completed_slices * 100) / progress.total_slices,
+					__(
+						"{0} of {1} slices synced, {2} running. {3} orders synced at {4} orders per minute.",
+						[
+							progress.completed_slices,
+							progress.total_slices,
+							progress.running_slices,
+							progress.orders_synced,
+							progress.orders_per_minute,
+						]
+					)
+				);
+			},
+		});
 	},
 
 	setup_queries: function (frm) {
@@ -15,7 +15,7 @@ from ecommerce_integrations.controllers.setting import (
 	IntegrationWarehouse,
 	SettingController,
 )
-from ecommerce_integrations.shopify import connection
+from ecommerce_integrations.shopify import connection, old_orders
 from ecommerce_integrations.shopify.constants import (
 	ADDRESS_ID_FIELD,
 	CUSTOMER_ID_FIELD,
@@ -45,14 +45,23 @@ class ShopifySetting(SettingController):
 		self._handle_webhooks()
 		self._validate_warehouse_links()
 		self._initalize_default_values()
+		self._plan_old_order_sync()
 
 		if self.is_enabled():
 			setup_custom_fields()
 
 	def on_update(self):
+		from ecommerce_integrations.shopify.order import clear_tax_account_map_cache
+
+		connection.clear_shared_secret_cache()
+		clear_tax_account_map_cache()
+
 		if self.is_enabled() and not self.is_old_data_migrated:
 			migrate_from_old_connector()
 
+		if self.is_enabled() and self.sync_old_orders:
+			old_orders.enqueue_slice_jobs(enqueue_after_commit=True)
+
 	def _handle_webhooks(self):
 		if self.is_enabled() and not self.webhooks:
 			new_webhooks = connection.register_webhooks(self.shopify_url, self.get_password("password"))
@@ -76,6 +85,31 @@ class ShopifySetting(SettingController):
 			if not wh_map.erpnext_warehouse:
 				frappe.throw(_("ERPNext warehouse required in warehouse map table."))
 
+	def _plan_old_order_sync(self):
+		"""Split old order range in slices when sync is started or range is changed."""
+		if not self.sync_old_orders:
+			return
+
+		if get_datetime(self.old_orders_from) >= get_datetime(self.old_orders_to):
+			frappe.throw(_("Old orders 'From' date should be before 'To' date."))
+
+		range_changed = any(
+			self.has_value_changed(field)
+			for field in ("sync_old_orders", "old_orders_from", "old_orders_to")
+		)
+		if self.old_order_slices and not range_changed:
+			# progress is written by sync jobs, don't overwrite it with values loaded in form
+			saved = {d.name: d for d in old_orders.get_slices()}
+			for row in self.old_order_slices:
+				for field, value in (saved.get(row.name) or {}).items():
+					if field != "name":
+						row.set(field, value)
+			return
+
+		self.old_order_slices = []
+		for values in old_orders.make_slices(self.old_orders_from, self.old_orders_to):
+			self.append("old_order_slices", values)
+
 	def _initalize_default_values(self):
 		if not self.last_inventory_sync:
 			self.last_inventory_sync = get_datetime("1970-01-01")
@@ -94,6 +128,10 @@ class ShopifySetting(SettingController):
 					{"shopify_location_id": location.id, "shopify_location_name": location.name},
 				)
 
+	@frappe.whitelist()
+	def get_old_orders_sync_progress(self):
+		return old_orders.get_progress()
+
 	def get_erpnext_warehouses(self) -> List[ERPNextWarehouse]:
 		return [wh_map.erpnext_warehouse for wh_map in self.shopify_warehouse_mapping]
 
@@ -1,18 +1,54 @@
 from collections import Counter
+from typing import Dict, List
 
 import frappe
+from frappe import _dict
 from frappe.utils import cint, create_batch, now
-from pyactiveresource.connection import ResourceNotFound
-from shopify.resources import InventoryLevel, Variant
 
 from ecommerce_integrations.controllers.inventory import (
+	bulk_update_inventory_sync_status,
 	get_inventory_levels,
-	update_inventory_sync_status,
 )
 from ecommerce_integrations.controllers.scheduling import need_to_run
 from ecommerce_integrations.shopify.connection import temp_shopify_session
 from ecommerce_integrations.shopify.constants import MODULE_NAME, SETTING_DOCTYPE
-from ecommerce_integrations.shopify.utils import create_shopify_log
+from ecommerce_integrations.shopify.utils import (
+	create_shopify_log,
+	execute_graphql,
+	from_gid,
+	to_gid,
+)
+
+# Maximum quantities (and node ids) accepted by Shopify in a single GraphQL call.
+INVENTORY_BATCH_SIZE = 250
+
+# userErrors returned for deleted variants or locations, these are ignored like before.
+NOT_FOUND_ERROR_CODES = ("INVALID_INVENTORY_ITEM", "INVALID_LOCATION")
+
+INVENTORY_SET_QUANTITIES = """
+mutation inventorySetQuantities($input: InventorySetQuantitiesInput!) {
+	inventorySetQuantities(input: $input) {
+		userErrors {
+			code
+			field
+			message
+		}
+	}
+}
+"""
+
+INVENTORY_ITEM_IDS = """
+query inventoryItemIds($ids: [ID!]!) {
+	nodes(ids: $ids) {
+		... on ProductVariant {
+			id
+			inventoryItem {
+				id
+			}
+		}
+	}
+}
+"""
 
 
 def update_inventory_on_shopify() -> None:
@@ -39,35 +75,166 @@ def update_inventory_on_shopify() -> None:
 def upload_inventory_data_to_shopify(inventory_levels, warehous_map) -> None:
 	synced_on = now()
 
-	for inventory_sync_batch in create_batch(inventory_levels, 50):
+	for inventory_sync_batch in create_batch(inventory_levels, INVENTORY_BATCH_SIZE):
 		for d in inventory_sync_batch:
 			d.shopify_location_id = warehous_map[d.warehouse]
 
-			try:
-				variant = Variant.find(d.variant_id)
-				inventory_id = variant.inventory_item_id
+		try:
+			_set_inventory_item_ids(inventory_sync_batch)
+			_set_inventory_quantities(
+				[d for d in inventory_sync_batch if d.inventory_item_id and not d.status]
+			)
+		except Exception as e:
+			for d in inventory_sync_batch:
+				if not d.status:
+					d.status = "Failed"
+					d.failure_reason = str(e)
 
-				InventoryLevel.set(
-					location_id=d.shopify_location_id,
-					inventory_item_id=inventory_id,
-					# shopify doesn't support fractional quantity
-					available=cint(d.actual_qty) - cint(d.reserved_qty),
-				)
-				update_inventory_sync_status(d.ecom_item, time=synced_on)
-				d.status = "Success"
-			except ResourceNotFound:
-				# Variant or location is deleted, mark as last synced and ignore.
-				update_inventory_sync_status(d.ecom_item, time=synced_on)
-				d.status = "Not Found"
-			except Exception as e:
-				d.status = "Failed"
-				d.failure_reason = str(e)
+		# "Not Found": Variant or location is deleted, mark as last synced and ignore.
+		bulk_update_inventory_sync_status(
+			[d.ecom_item for d in inventory_sync_batch if d.status in ("Success", "Not Found")],
+			time=synced_on,
+		)
 
-			frappe.db.commit()
+		frappe.db.commit()
 
 		_log_inventory_update_status(inventory_sync_batch)
 
 
+def _set_inventory_item_ids(inventory_levels: List[_dict]) -> None:
+	"""Fetch `inventory_item_id` for rows that don't have it yet in one call and save it on Ecommerce Item.
+
+	Usually this is already set when item is synced, so no calls are required."""
+
+	missing_variants = {d.variant_id for d in inventory_levels if not d.inventory_item_id}
+	if not missing_variants:
+		return
+
+	fetched_ids = get_inventory_item_ids(list(missing_variants))
+
+	for d in inventory_levels:
+		if d.inventory_item_id:
+			continue
+		elif fetched_ids.get(d.variant_id):
+			d.inventory_item_id = fetched_ids[d.variant_id]
+			_save_inventory_item_id(d.ecom_item, d.inventory_item_id)
+		else:
+			d.status = "Not Found"
+
+
+@temp_shopify_session
+def backfill_inventory_item_ids() -> None:
+	"""Set `inventory_item_id` on all Shopify Ecommerce Items that don't have it.
+
+	Enqueued once by patch, items synced afterwards get it during sync."""
+
+	ecom_items = frappe.get_all(
+		"Ecommerce Item",
+		filters={
+			"integration": MODULE_NAME,
+			"variant_id": ("is", "set"),
+			"inventory_item_id": ("is", "not set"),
+		},
+		fields=["name", "variant_id"],
+	)
+
+	for batch in create_batch(ecom_items, INVENTORY_BATCH_SIZE):
+		inventory_item_ids = get_inventory_item_ids([d.variant_id for d in batch])
+		for d in batch:
+			if inventory_item_ids.get(d.variant_id):
+				_save_inventory_item_id(d.name, inventory_item_ids[d.variant_id])
+		frappe.db.commit()
+
+
+def _save_inventory_item_id(ecom_item: str, inventory_item_id: str) -> None:
+	frappe.db.set_value(
+		"Ecommerce Item", ecom_item, "inventory_item_id", inventory_item_id, update_modified=False
+	)
+
+
+def get_inventory_item_ids(variant_ids: List[str]) -> Dict[str, str]:
+	"""Get inventory item id of each variant, deleted variants are omitted."""
+	inventory_item_ids = {}
+
+	for batch in create_batch(variant_ids, INVENTORY_BATCH_SIZE):
+		ids = [to_gid("ProductVariant", variant_id) for variant_id in batch]
+		response = execute_graphql(INVENTORY_ITEM_IDS, {"ids": ids})
+
+		for node in response.get("data", {}).get("nodes") or []:
+			if node and node.get("inventoryItem"):
+				inventory_item_ids[from_gid(node["id"])] = from_gid(node["inventoryItem"]["id"])
+
+	return inventory_item_ids
+
+
+def _set_inventory_quantities(inventory_levels: List[_dict]) -> None:
+	"""Set available quantities of all rows in a single mutation and set status on each row.
+
+	Shopify rejects the whole mutation if any row has an error, so on errors the
+	failing rows are marked and the rest are retried once."""
+
+	if not inventory_levels:
+		return
+
+	user_errors = _execute_inventory_mutation(inventory_levels)
+	if user_errors:
+		failed_rows = _mark_failed_rows(inventory_levels, user_errors)
+		remaining = [d for i, d in enumerate(inventory_levels) if i not in failed_rows]
+		if remaining and _execute_inventory_mutation(remaining):
+			for d in remaining:
+				d.status = "Failed"
+				d.failure_reason = "Inventory update rejected by Shopify"
+			return
+		inventory_levels = remaining
+
+	for d in inventory_levels:
+		d.status = "Success"
+
+
+def _execute_inventory_mutation(inventory_levels: List[_dict]) -> List[Dict]:
+	variables = {
+		"input": {
+			"name": "available",
+			"reason": "correction",
+			"ignoreCompareQuantity": True,
+			"quantities": [
+				{
+					"inventoryItemId": to_gid("InventoryItem", d.inventory_item_id),
+					"locationId": to_gid("Location", d.shopify_location_id),
+					# shopify doesn't support fractional quantity
+					"quantity": cint(d.actual_qty) - cint(d.reserved_qty),
+				}
+				for d in inventory_levels
+			],
+		}
+	}
+
+	response = execute_graphql(INVENTORY_SET_QUANTITIES, variables)
+	return response["data"]["inventorySetQuantities"]["userErrors"]
+
+
+def _mark_failed_rows(inventory_levels: List[_dict], user_errors: List[Dict]) -> set:
+	"""Mark rows referred by userErrors, field is of form ["input", "quantities", "<idx>", ...]"""
+	failed_rows = set()
+
+	for error in user_errors:
+		field = error.get("field") or []
+		if len(field) < 3 or not str(field[2]).isdigit() or int(field[2]) >= len(inventory_levels):
+			continue
+
+		idx = int(field[2])
+
+		d = inventory_levels[idx]
+		if error.get("code") in NOT_FOUND_ERROR_CODES:
+			d.status = "Not Found"
+		else:
+			d.status = "Failed"
+			d.failure_reason = error.get("message")
+		failed_rows.add(idx)
+
+	return failed_rows
+
+
 def _log_inventory_update_status(inventory_levels) -> None:
 	"""Create log of inventory update."""
 	log_message = "variant_id,location_id,status,failure_reason\n"
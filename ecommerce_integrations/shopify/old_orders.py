@@ -0,0 +1,255 @@
+"""Sync of Shopify orders created before the integration was set up.
+
+Selected range is split into time slices that are synced by separate background jobs.
+Every slice records the last synced order id, an interrupted job resumes from there."""
+
+import time
+from datetime import timedelta
+from typing import Dict, Iterator, List, Optional
+
+import frappe
+from frappe import _dict
+from frappe.utils import cint, get_datetime, now_datetime, time_diff_in_seconds
+from pyactiveresource.connection import ClientError
+from shopify.resources import Order
+
+from ecommerce_integrations.shopify.bulk_operation import (
+	ORDER_BATCH_SIZE,
+	BulkOperationBusy,
+	iter_bulk_order_ids,
+	iter_order_batches,
+)
+from ecommerce_integrations.shopify.connection import temp_shopify_session
+from ecommerce_integrations.shopify.constants import EVENT_MAPPER, SETTING_DOCTYPE
+from ecommerce_integrations.shopify.order import sync_sales_order
+from ecommerce_integrations.shopify.utils import create_shopify_log
+from ecommerce_integrations.utils.concurrency import RateLimiter
+
+SLICE_DOCTYPE = "Shopify Old Order Slice"
+SLICE_FIELDS = [
+	"name",
+	"from_time",
+	"to_time",
+	"status",
+	"orders_synced",
+	"last_order_id",
+	"started_at",
+	"finished_at",
+]
+
+# range is split in these many slices, a slice is never shorter than an hour
+SLICE_COUNT = 50
+MIN_SLICE_DURATION = timedelta(hours=1)
+
+PAGE_SIZE = 250
+SLICE_JOB_TIMEOUT = 4 * 60 * 60
+
+# REST API allows 2 requests per second per store, this is shared by all workers
+REST_RATE_LIMIT = 2.0
+RATE_LIMIT_RETRIES = 5
+
+
+def sync_old_orders():
+	"""Start jobs for slices that are not synced yet.
+
+	Called by scheduler, this also resumes slices whose jobs were killed."""
+	setting = frappe.get_cached_doc(SETTING_DOCTYPE)
+	if not cint(setting.sync_old_orders):
+		return
+
+	enqueue_slice_jobs()
+
+
+def make_slices(from_time, to_time) -> List[Dict]:
+	from_time, to_time = get_datetime(from_time), get_datetime(to_time)
+	step = max(
+		timedelta(seconds=int((to_time - from_time).total_seconds() / SLICE_COUNT)),
+		MIN_SLICE_DURATION,
+	)
+
+	slices = []
+	start = from_time
+	while start < to_time:
+		end = min(start + step, to_time)
+		slices.append({"from_time": start, "to_time": end, "status": "Pending"})
+		start = end
+
+	return slices
+
+
+def get_slices() -> List[_dict]:
+	return frappe.get_all(
+		SLICE_DOCTYPE,
+		filters={"parent": SETTING_DOCTYPE, "parenttype": SETTING_DOCTYPE},
+		fields=SLICE_FIELDS,
+		order_by="idx asc",
+	)
+
+
+def enqueue_slice_jobs(enqueue_after_commit: bool = False) -> None:
+	"""Keep `old_orders_workers` slice jobs running, finish the sync when all slices are done.
+
+	Jobs are deduplicated by slice, so slices that are already running are skipped."""
+	remaining = [s for s in get_slices() if s.status != "Completed"]
+	if not remaining:
+		_finish_sync()
+		return
+
+	workers = get_worker_count()
+	for order_slice in remaining[:workers]:
+		frappe.enqueue(
+			"ecommerce_integrations.shopify.old_orders.sync_slice",
+			queue="long",
+			timeout=SLICE_JOB_TIMEOUT,
+			job_id=f"shopify_old_orders_{order_slice.name}",
+			deduplicate=True,
+			enqueue_after_commit=enqueue_after_commit,
+			slice_name=order_slice.name,
+		)
+
+
+@temp_shopify_session
+def sync_slice(slice_name: str) -> None:
+	order_slice = frappe.db.get_value(SLICE_DOCTYPE, slice_name, SLICE_FIELDS, as_dict=True)
+	setting = frappe.get_doc(SETTING_DOCTYPE)
+	if not order_slice or order_slice.status == "Completed" or not cint(setting.sync_old_orders):
+		return
+
+	if order_slice.status == "Pending":
+		_update_slice(slice_name, status="In Progress", started_at=now_datetime())
+		frappe.db.commit()
+
+	limiter = RateLimiter(REST_RATE_LIMIT / get_worker_count())
+	orders_synced = cint(order_slice.orders_synced)
+	last_order_id = order_slice.last_order_id
+
+	if cint(setting.old_orders_use_bulk_operation):
+		pages = _iter_bulk_pages(order_slice, last_order_id, limiter)
+	else:
+		pages = _iter_pages(order_slice, last_order_id, limiter)
+
+	try:
+		for orders in pages:
+			for order in orders:
+				log = create_shopify_log(
+					method=EVENT_MAPPER["orders/create"],
+					request_data=order,
+					make_new=True,
+					external_id=order["id"],
+					external_type="Order",
+				)
+				sync_sales_order(order, request_id=log.name, setting=setting)
+
+			orders_synced += len(orders)
+			last_order_id = orders[-1]["id"]
+			_update_slice(slice_name, orders_synced=orders_synced, last_order_id=last_order_id)
+			frappe.db.commit()
+
+			if not cint(frappe.db.get_single_value(SETTING_DOCTYPE, "sync_old_orders")):
+				return  # disabled while syncing, rest of the slice is synced if enabled again
+	except BulkOperationBusy:
+		# slice is enqueued again when the slice holding the bulk operation finishes,
+		# or by the scheduler, see `enqueue_slice_jobs`
+		return
+
+	_update_slice(slice_name, status="Completed", finished_at=now_datetime())
+	frappe.db.commit()
+
+	enqueue_slice_jobs()
+
+
+def _iter_pages(
+	order_slice, since_id: Optional[str], limiter: RateLimiter
+) -> Iterator[List[Dict]]:
+	"""Yield non-empty pages of orders in slice after `since_id`, in ascending order of id."""
+	while True:
+		limiter.wait()
+		orders = _fetch_orders(order_slice.from_time, order_slice.to_time, since_id)
+		if orders:
+			yield orders
+			since_id = orders[-1]["id"]
+
+		if len(orders) < PAGE_SIZE:
+			return
+
+
+def _iter_bulk_pages(
+	order_slice, since_id: Optional[str], limiter: RateLimiter
+) -> Iterator[List[Dict]]:
+	"""Same as `_iter_pages`, but order ids of the slice are listed by a bulk operation.
+
+	Ids are sorted so `since_id` can be used as cursor just like REST pages."""
+	order_ids = sorted(
+		int(order_id) for order_id in iter_bulk_order_ids(order_slice.from_time, order_slice.to_time)
+	)
+	order_ids = [str(order_id) for order_id in order_ids if order_id > cint(since_id)]
+
+	def fetch(ids):
+		limiter.wait()
+		# same status filter as bulk query and REST pages, only open orders are synced
+		orders = _find_orders(ids=",".join(ids), limit=ORDER_BATCH_SIZE)
+		return sorted(orders, key=lambda order: int(order["id"]))
+
+	for orders in iter_order_batches(order_ids, fetch=fetch):
+		if orders:
+			yield orders
+
+
+def _fetch_orders(from_time, to_time, since_id: Optional[str] = None) -> List[Dict]:
+	"""Fetch one page of orders in range, `since_id` returns orders in ascending order of id."""
+	return _find_orders(
+		created_at_min=get_datetime(from_time).astimezone().isoformat(),
+		created_at_max=get_datetime(to_time).astimezone().isoformat(),
+		since_id=since_id or 0,
+		limit=PAGE_SIZE,
+	)
+
+
+def _find_orders(**params) -> List[Dict]:
+	"""Find orders, requests that hit rate limit are retried after `Retry-After`."""
+	for attempt in range(RATE_LIMIT_RETRIES + 1):
+		try:
+			return [order.to_dict() for order in Order.find(**params)]
+		except ClientError as e:
+			if e.code != 429 or attempt == RATE_LIMIT_RETRIES:
+				raise
+			time.sleep(float(e.response.get("Retry-After") or 2))
+
+
+def _update_slice(slice_name: str, **values) -> None:
+	frappe.db.set_value(SLICE_DOCTYPE, slice_name, values, update_modified=False)
+
+
+def _finish_sync() -> None:
+	frappe.db.set_single_value(SETTING_DOCTYPE, "sync_old_orders", 0)
+	frappe.db.commit()
+
+
+def get_worker_count() -> int:
+	return max(cint(frappe.db.get_single_value(SETTING_DOCTYPE, "old_orders_workers")), 1)
+
+
+def get_progress() -> Dict:
+	"""Summary of slice progress along with throughput in orders per minute."""
+	slices = get_slices()
+	started = [get_datetime(s.started_at) for s in slices if s.started_at]
+	orders_synced = sum(cint(s.orders_synced) for s in slices)
+	completed = len([s for s in slices if s.status == "Completed"])
+
+	throughput = 0.0
+	if started:
+		if completed == len(slices):
+			end = max(get_datetime(s.finished_at) for s in slices if s.finished_at)
+		else:
+			end = now_datetime()
+		elapsed = time_diff_in_seconds(end, min(started))
+		if elapsed > 0:
+			throughput = orders_synced * 60 / elapsed
+
+	return {
+		"total_slices": len(slices),
+		"completed_slices": completed,
+		"running_slices": len([s for s in slices if s.status == "In Progress"]),
+		"orders_synced": orders_synced,
+		"orders_per_minute": round(throughput, 1),
+	}
@@ -1,16 +1,12 @@
 import json
-from typing import Literal, Optional
+from typing import Dict, Literal, Optional
 
 import frappe
 from frappe import _
-from frappe.utils import cint, cstr, flt, get_datetime, getdate, nowdate
-from shopify.collection import PaginatedIterator
-from shopify.resources import Order
+from frappe.utils import cint, cstr, flt, getdate, nowdate
 
-from ecommerce_integrations.shopify.connection import temp_shopify_session
 from ecommerce_integrations.shopify.constants import (
 	CUSTOMER_ID_FIELD,
-	EVENT_MAPPER,
 	ORDER_ID_FIELD,
 	ORDER_ITEM_DISCOUNT_FIELD,
 	ORDER_NUMBER_FIELD,
@@ -28,8 +24,10 @@ DEFAULT_TAX_FIELDS = {
 	"shipping": "default_shipping_charges_account",
 }
 
+TAX_ACCOUNT_MAP_CACHE_KEY = "shopify_tax_account_map"
 
-def sync_sales_order(payload, request_id=None):
+
+def sync_sales_order(payload, request_id=None, setting=None):
 	order = payload
 	frappe.set_user("Administrator")
 	frappe.flags.request_id = request_id
@@ -51,7 +49,7 @@ def sync_sales_order(payload, request_id=None):
 
 		create_items_if_not_exist(order)
 
-		setting = frappe.get_doc(SETTING_DOCTYPE)
+		setting = setting or frappe.get_doc(SETTING_DOCTYPE)
 		create_order(order, setting)
 	except Exception as e:
 		create_shopify_log(status="Error", exception=e, rollback=True)
@@ -197,6 +195,7 @@ def _get_total_discount(line_item) -> float:
 def get_order_taxes(shopify_order, setting, items):
 	taxes = []
 	line_items = shopify_order.get("line_items")
+	tax_account_map = get_tax_account_map()
 
 	for line_item in line_items:
 		item_code = get_item_code(line_item)
@@ -204,9 +203,10 @@ def get_order_taxes(shopify_order, setting, items):
 			taxes.append(
 				{
 					"charge_type": "Actual",
-					"account_head": get_tax_account_head(tax, charge_type="sales_tax"),
+					"account_head": tax_account_map.get_account_head(tax, charge_type="sales_tax"),
 					"description": (
-						get_tax_account_description(tax) or f"{tax.get('title')} - {tax.get('rate') * 100.0:.2f}%"
+						tax_account_map.get_description(tax)
+						or f"{tax.get('title')} - {tax.get('rate') * 100.0:.2f}%"
 					),
 					"tax_amount": tax.get("price"),
 					"included_in_print_rate": 0,
@@ -222,6 +222,7 @@ def get_order_taxes(shopify_order, setting, items):
 		setting,
 		items,
 		taxes_inclusive=shopify_order.get("taxes_included"),
+		tax_account_map=tax_account_map,
 	)
 
 	if cint(setting.consolidate_taxes):
@@ -259,35 +260,80 @@ def consolidate_order_taxes(taxes):
 	return tax_account_wise_data.values()
 
 
-def get_tax_account_head(tax, charge_type: Optional[Literal["shipping", "sales_tax"]] = None):
-	tax_title = str(tax.get("title"))
+class TaxAccountMap:
+	"""Accounts and descriptions of Shopify taxes as configured in Shopify Setting.
 
-	tax_account = frappe.db.get_value(
-		"Shopify Tax Account", {"parent": SETTING_DOCTYPE, "shopify_tax": tax_title}, "tax_account",
-	)
+	Built once and cached, see `get_tax_account_map`."""
 
-	if not tax_account and charge_type:
-		tax_account = frappe.db.get_single_value(SETTING_DOCTYPE, DEFAULT_TAX_FIELDS[charge_type])
+	def __init__(self, accounts: Dict[str, Dict], defaults: Dict[str, Optional[str]]):
+		self.accounts = accounts  # casefolded shopify tax title -> {tax_account, tax_description}
+		self.defaults = defaults  # charge type -> default account
 
-	if not tax_account:
-		frappe.throw(_("Tax Account not specified for Shopify Tax {0}").format(tax.get("title")))
+	def get_account_head(self, tax, charge_type: Optional[Literal["shipping", "sales_tax"]] = None):
+		tax_account = self._get(tax).get("tax_account")
 
-	return tax_account
+		if not tax_account and charge_type:
+			tax_account = self.defaults.get(charge_type)
 
+		if not tax_account:
+			frappe.throw(_("Tax Account not specified for Shopify Tax {0}").format(tax.get("title")))
 
-def get_tax_account_description(tax):
-	tax_title = tax.get("title")
+		return tax_account
 
-	tax_description = frappe.db.get_value(
-		"Shopify Tax Account", {"parent": SETTING_DOCTYPE, "shopify_tax": tax_title}, "tax_description",
+	def get_description(self, tax):
+		return self._get(tax).get("tax_description")
+
+	def _get(self, tax) -> Dict:
+		# same as database lookups, titles are case insensitive
+		return self.accounts.get(str(tax.get("title")).casefold()) or {}
+
+
+def get_tax_account_map() -> TaxAccountMap:
+	return TaxAccountMap(
+		**frappe.cache().get_value(TAX_ACCOUNT_MAP_CACHE_KEY, generator=_get_tax_account_map_data)
 	)
 
-	return tax_description
+
+def clear_tax_account_map_cache() -> None:
+	frappe.cache().delete_value(TAX_ACCOUNT_MAP_CACHE_KEY)
+
+
+def _get_tax_account_map_data() -> Dict:
+	accounts = {}
+	for row in frappe.get_all(
+		"Shopify Tax Account",
+		filters={"parent": SETTING_DOCTYPE},
+		fields=["shopify_tax", "tax_account", "tax_description"],
+		order_by="idx",
+	):
+		# first row wins, like get_value
+		accounts.setdefault(
+			cstr(row.shopify_tax).casefold(),
+			{"tax_account": row.tax_account, "tax_description": row.tax_description},
+		)
+
+	defaults = {
+		charge_type: frappe.db.get_single_value(SETTING_DOCTYPE, fieldname)
+		for charge_type, fieldname in DEFAULT_TAX_FIELDS.items()
+	}
+
+	return {"accounts": accounts, "defaults": defaults}
+
+
+def get_tax_account_head(tax, charge_type: Optional[Literal["shipping", "sales_tax"]] = None):
+	return get_tax_account_map().get_account_head(tax, charge_type)
 
 
-def update_taxes_with_shipping_lines(taxes, shipping_lines, setting, items, taxes_inclusive=False):
+def get_tax_account_description(tax):
+	return get_tax_account_map().get_description(tax)
+
+
+def update_taxes_with_shipping_lines(
+	taxes, shipping_lines, setting, items, taxes_inclusive=False, tax_account_map=None
+):
 	"""Shipping lines represents the shipping details,
 	each such shipping detail consists of a list of tax_lines"""
+	tax_account_map = tax_account_map or get_tax_account_map()
 	shipping_as_item = cint(setting.add_shipping_as_item) and setting.shipping_item
 	for shipping_charge in shipping_lines:
 		if shipping_charge.get("price"):
@@ -316,8 +362,10 @@ def update_taxes_with_shipping_lines(taxes, shipping_lines, setting, items, taxe
 				taxes.append(
 					{
 						"charge_type": "Actual",
-						"account_head": get_tax_account_head(shipping_charge, charge_type="shipping"),
-						"description": get_tax_account_description(shipping_charge) or shipping_charge["title"],
+						"account_head": tax_account_map.get_account_head(shipping_charge, charge_type="shipping"),
+						"description": (
+							tax_account_map.get_description(shipping_charge) or shipping_charge["title"]
+						),
 						"tax_amount": shipping_charge_amount,
 						"cost_center": setting.cost_center,
 					}
@@ -327,9 +375,10 @@ def update_taxes_with_shipping_lines(taxes, shipping_lines, setting, items, taxe
 			taxes.append(
 				{
 					"charge_type": "Actual",
-					"account_head": get_tax_account_head(tax, charge_type="sales_tax"),
+					"account_head": tax_account_map.get_account_head(tax, charge_type="sales_tax"),
 					"description": (
-						get_tax_account_description(tax) or f"{tax.get('title')} - {tax.get('rate') * 100.0:.2f}%"
+						tax_account_map.get_description(tax)
+						or f"{tax.get('title')} - {tax.get('rate') * 100.0:.2f}%"
 					),
 					"tax_amount": tax["price"],
 					"cost_center": setting.cost_center,
@@ -392,38 +441,3 @@ def cancel_order(payload, request_id=None):
 		create_shopify_log(status="Error", exception=e)
 	else:
 		create_shopify_log(status="Success")
-
-
-@temp_shopify_session
-def sync_old_orders():
-	shopify_setting = frappe.get_cached_doc(SETTING_DOCTYPE)
-	if not cint(shopify_setting.sync_old_orders):
-		return
-
-	orders = _fetch_old_orders(shopify_setting.old_orders_from, shopify_setting.old_orders_to)
-
-	for order in orders:
-		log = create_shopify_log(
-			method=EVENT_MAPPER["orders/create"], request_data=json.dumps(order), make_new=True
-		)
-		sync_sales_order(order, request_id=log.name)
-
-	shopify_setting = frappe.get_doc(SETTING_DOCTYPE)
-	shopify_setting.sync_old_orders = 0
-	shopify_setting.save()
-
-
-def _fetch_old_orders(from_time, to_time):
-	"""Fetch all shopify orders in specified range and return an iterator on fetched orders."""
-
-	from_time = get_datetime(from_time).astimezone().isoformat()
-	to_time = get_datetime(to_time).astimezone().isoformat()
-	orders_iterator = PaginatedIterator(
-		Order.find(created_at_min=from_time, created_at_max=to_time, limit=250)
-	)
-
-	for orders in orders_iterator:
-		for order in orders:
-			# Using generator instead of fetching all at once is better for
-			# avoiding rate limits and reducing resource usage.
-			yield order.to_dict()
@@ -312,7 +312,10 @@ shopify.ProductImporter = class {
 		if (this.syncRunning) {
 			frappe.msgprint(__('Sync already in progress'));
 		} else {
-			frappe.call({ method: 'ecommerce_integrations.shopify.page.shopify_import_products.shopify_import_products.import_all_products' })
+			frappe.call({
+				method: 'ecommerce_integrations.shopify.page.shopify_import_products.shopify_import_products.import_all_products',
+				args: { use_bulk_operation: 1 },
+			});
 		}
 
 		// sync progress
@@ -336,7 +339,7 @@ shopify.ProductImporter = class {
 			_log.append(message);
 			_log.scrollTop(_log[0].scrollHeight)
 
-			if (synced) this.updateSyncedCount(_syncedCounter, _erpnextCounter);
+			if (synced) this.updateSyncedCount(_syncedCounter, _erpnextCounter, synced);
 
 			if (done) {
 				frappe.realtime.off('shopify.key.sync.all.products');
@@ -363,12 +366,12 @@ shopify.ProductImporter = class {
 
 	}
 
-	updateSyncedCount(_syncedCounter, _erpnextCounter) {
+	updateSyncedCount(_syncedCounter, _erpnextCounter, count = 1) {
 		let _synced = parseFloat(_syncedCounter.text());
 		let _erpnext = parseFloat(_erpnextCounter.text());
 
-		_syncedCounter.text(_synced + 1);
-		_erpnextCounter.text(_erpnext + 1);
+		_syncedCounter.text(_synced + count);
+		_erpnextCounter.text(_erpnext + count);
 
 	}
 }
@@ -1,10 +1,11 @@
-from time import process_time
+from time import monotonic, process_time
 
 import frappe
-from frappe.exceptions import UniqueValidationError
+from frappe.utils import cint, cstr
 from shopify.resources import Product
 
 from ecommerce_integrations.ecommerce_integrations.doctype.ecommerce_item import ecommerce_item
+from ecommerce_integrations.shopify import bulk_operation
 from ecommerce_integrations.shopify.connection import temp_shopify_session
 from ecommerce_integrations.shopify.constants import MODULE_NAME
 from ecommerce_integrations.shopify.product import ShopifyProduct
@@ -12,6 +13,9 @@ from ecommerce_integrations.shopify.product import ShopifyProduct
 # constants
 SYNC_JOB_NAME = "shopify.job.sync.all.products"
 REALTIME_KEY = "shopify.key.sync.all.products"
+COMMIT_BATCH_SIZE = 100
+# progress of full import is sent at most once in these many seconds
+PUBLISH_INTERVAL = 2
 
 
 @frappe.whitelist()
@@ -117,13 +121,17 @@ def is_synced(product):
 
 
 @frappe.whitelist()
-def import_all_products():
+def import_all_products(use_bulk_operation=0):
 	frappe.enqueue(
-		queue_sync_all_products, queue="long", job_name=SYNC_JOB_NAME, key=REALTIME_KEY,
+		queue_sync_all_products,
+		queue="long",
+		job_name=SYNC_JOB_NAME,
+		key=REALTIME_KEY,
+		use_bulk_operation=cint(use_bulk_operation),
 	)
 
 
-def queue_sync_all_products(*args, **kwargs):
+def queue_sync_all_products(*args, use_bulk_operation=0, **kwargs):
 	start_time = process_time()
 
 	counts = get_product_count()
@@ -132,49 +140,114 @@ def queue_sync_all_products(*args, **kwargs):
 	if counts["shopifyCount"] < counts["syncedCount"]:
 		publish("⚠ Shopify has less products than ERPNext.")
 
-	_sync = True
-	collection = _fetch_products_from_shopify(limit=100)
-	savepoint = "shopify_product_sync"
-	while _sync:
-		for product in collection:
-			try:
-				publish(f"Syncing product {product.id}", br=False)
-				frappe.db.savepoint(savepoint)
-				if is_synced(product.id):
-					publish(f"Product {product.id} already synced. Skipping...")
-					continue
-
-				shopify_product = ShopifyProduct(product.id)
-				shopify_product.sync_product()
-
-				publish(f"✅ Synced Product {product.id}", synced=True)
-
-			except UniqueValidationError as e:
-				publish(f"❌ Error Syncing Product {product.id} : {str(e)}", error=True)
-				frappe.db.rollback(save_point=savepoint)
-				continue
-
-			except Exception as e:
-				publish(f"❌ Error Syncing Product {product.id} : {str(e)}", error=True)
-				frappe.db.rollback(save_point=savepoint)
-				continue
-
-		if collection.has_next_page():
-			frappe.db.commit()  # prevents too many write request error
-			collection = _fetch_products_from_shopify(from_=collection.next_page_url)
-		else:
-			_sync = False
+	if use_bulk_operation:
+		publish("Waiting for Shopify to export products...")
+		products = _iter_bulk_products()
+	else:
+		products = _iter_products()
+
+	_sync_products(products)
 
 	end_time = process_time()
 	publish(f"🎉 Done in {end_time - start_time}s", done=True)
 	return True
 
 
+def _iter_products():
+	"""Yield products of all pages, these already contain everything needed to create items."""
+	collection = _fetch_products_from_shopify(limit=100)
+	while True:
+		for product in collection:
+			yield product.to_dict()
+
+		if not collection.has_next_page():
+			break
+
+		collection = _fetch_products_from_shopify(from_=collection.next_page_url)
+
+
+def _iter_bulk_products():
+	"""Yield products exported by a bulk operation, or page by page if one is already running."""
+	try:
+		url = bulk_operation.run_bulk_query(bulk_operation.PRODUCTS_QUERY)
+	except bulk_operation.BulkOperationBusy:
+		publish("Another bulk operation is running, importing products page by page...")
+		yield from _iter_products()
+		return
+
+	yield from bulk_operation.iter_products(bulk_operation.stream_bulk_result(url))
+
+
+@temp_shopify_session
+def _sync_products(products):
+	"""Create items for products, products are fetched lazily while iterating."""
+	synced_products = ecommerce_item.get_synced_item_codes(MODULE_NAME)
+	progress = SyncProgress()
+	savepoint = "shopify_product_sync"
+
+	for count, product in enumerate(products, start=1):
+		product_id = product["id"]
+		if cstr(product_id).casefold() in synced_products:
+			progress.add(skipped=True)
+			continue
+
+		try:
+			frappe.db.savepoint(savepoint)
+			shopify_product = ShopifyProduct(product_id)
+			shopify_product.sync_product(product)
+
+			progress.add(f"✅ Synced Product {product_id}", synced=True)
+
+		except Exception as e:
+			progress.add(f"❌ Error Syncing Product {product_id} : {str(e)}", error=True)
+			frappe.db.rollback(save_point=savepoint)
+
+		finally:
+			if not count % COMMIT_BATCH_SIZE:
+				frappe.db.commit()  # prevents too many write request error
+
+	progress.publish()
+
+
+class SyncProgress:
+	"""Aggregates progress of full import and publishes it every `PUBLISH_INTERVAL` seconds."""
+
+	def __init__(self):
+		self._reset()
+
+	def _reset(self):
+		self.messages = []
+		self.synced = 0
+		self.skipped = 0
+		self.error = False
+		self.last_published = monotonic()
+
+	def add(self, message=None, synced=False, skipped=False, error=False):
+		if message:
+			self.messages.append(message)
+		self.synced += int(synced)
+		self.skipped += int(skipped)
+		self.error = self.error or error
+
+		if monotonic() - self.last_published >= PUBLISH_INTERVAL:
+			self.publish()
+
+	def publish(self):
+		if self.skipped:
+			self.messages.append(f"Skipped {self.skipped} already synced products")
+
+		if self.messages:
+			publish("\n".join(self.messages), synced=self.synced, error=self.error)
+
+		self._reset()
+
+
 def publish(message, synced=False, error=False, done=False, br=True):
+	"""Publish import progress, `synced` is the number of products synced since last message."""
 	frappe.publish_realtime(
 		REALTIME_KEY,
 		{
-			"synced": synced,
+			"synced": cint(synced),
 			"error": error,
 			"message": message + ("<br /><br />" if br else ""),
 			"done": done,
@@ -1,4 +1,4 @@
-from typing import Optional
+from typing import Dict, List, Optional
 
 import frappe
 from frappe import _, msgprint
@@ -7,6 +7,7 @@ from frappe.utils.nestedset import get_root_of
 from shopify.resources import Product, Variant
 
 from ecommerce_integrations.ecommerce_integrations.doctype.ecommerce_item import ecommerce_item
+from ecommerce_integrations.shopify import upload_queue
 from ecommerce_integrations.shopify.connection import temp_shopify_session
 from ecommerce_integrations.shopify.constants import (
 	ITEM_SELLING_RATE_FIELD,
@@ -51,10 +52,11 @@ class ShopifyProduct:
 		)
 
 	@temp_shopify_session
-	def sync_product(self):
+	def sync_product(self, product_dict=None):
+		"""Create item if not synced, `product_dict` can be passed if product is already fetched."""
 		if not self.is_synced():
-			shopify_product = Product.find(self.product_id)
-			product_dict = shopify_product.to_dict()
+			if not product_dict:
+				product_dict = Product.find(self.product_id).to_dict()
 			self._make_item(product_dict)
 
 	def _make_item(self, product_dict):
@@ -70,6 +72,7 @@ class ShopifyProduct:
 
 		else:
 			product_dict["variant_id"] = product_dict["variants"][0]["id"]
+			product_dict["inventory_item_id"] = product_dict["variants"][0].get("inventory_item_id")
 			self._create_item(product_dict, warehouse)
 
 	def _create_attribute(self, product_dict):
@@ -137,10 +140,16 @@ class ShopifyProduct:
 
 		integration_item_code = product_dict["id"]  # shopify product_id
 		variant_id = product_dict.get("variant_id", "")  # shopify variant_id if has variants
+		inventory_item_id = product_dict.get("inventory_item_id")
 		sku = item_dict["sku"]
 
 		if not _match_sku_and_link_item(
-			item_dict, integration_item_code, variant_id, variant_of=variant_of, has_variant=has_variant
+			item_dict,
+			integration_item_code,
+			variant_id,
+			variant_of=variant_of,
+			has_variant=has_variant,
+			inventory_item_id=inventory_item_id,
 		):
 			ecommerce_item.create_ecommerce_item(
 				MODULE_NAME,
@@ -150,6 +159,7 @@ class ShopifyProduct:
 				sku=sku,
 				variant_of=variant_of,
 				has_variants=has_variant,
+				inventory_item_id=inventory_item_id,
 			)
 
 	def _create_item_variants(self, product_dict, warehouse, attributes):
@@ -162,6 +172,7 @@ class ShopifyProduct:
 				shopify_item_variant = {
 					"id": product_dict.get("id"),
 					"variant_id": variant.get("id"),
+					"inventory_item_id": variant.get("inventory_item_id"),
 					"item_code": variant.get("id"),
 					"title": product_dict.get("title", "").strip() + "-" + variant.get("title"),
 					"product_type": product_dict.get("product_type"),
@@ -264,7 +275,7 @@ def _get_item_image(product_dict):
 
 
 def _match_sku_and_link_item(
-	item_dict, product_id, variant_id, variant_of=None, has_variant=False
+	item_dict, product_id, variant_id, variant_of=None, has_variant=False, inventory_item_id=None
 ) -> bool:
 	"""Tries to match new item with existing item using Shopify SKU == item_code.
 
@@ -285,6 +296,7 @@ def _match_sku_and_link_item(
 					"integration_item_code": product_id,
 					"has_variants": 0,
 					"variant_id": cstr(variant_id),
+					"inventory_item_id": cstr(inventory_item_id),
 					"sku": sku,
 				}
 			)
@@ -297,7 +309,12 @@ def _match_sku_and_link_item(
 
 def create_items_if_not_exist(order):
 	"""Using shopify order, sync all items that are not already synced."""
-	for item in order.get("line_items", []):
+	line_items = order.get("line_items", [])
+
+	# fetch all items in bulk, lookups of individual items below are cached
+	ecommerce_item.resolve_many(MODULE_NAME, [_get_item_key(item) for item in line_items])
+
+	for item in line_items:
 
 		product_id = item["product_id"]
 		variant_id = item.get("variant_id")
@@ -313,45 +330,69 @@ def get_item_code(shopify_item):
 
 	Item should contain both product_id and variant_id."""
 
-	item = ecommerce_item.get_erpnext_item(
-		integration=MODULE_NAME,
-		integration_item_code=shopify_item.get("product_id"),
-		variant_id=shopify_item.get("variant_id"),
-		sku=shopify_item.get("sku"),
+	item_key = _get_item_key(shopify_item)
+	return ecommerce_item.resolve_many(MODULE_NAME, [item_key])[item_key]
+
+
+def _get_item_key(shopify_item):
+	return (
+		cstr(shopify_item.get("product_id")),
+		cstr(shopify_item.get("variant_id")) or None,
+		cstr(shopify_item.get("sku")) or None,
 	)
-	if item:
-		return item.item_code
 
 
-@temp_shopify_session
 def upload_erpnext_item(doc, method=None):
 	"""This hook is called when inserting new or updating existing `Item`.
 
-	New items are pushed to shopify and changes to existing items are
+	Item is only queued here, it's pushed to shopify in background by `upload_item`.
+	New items are created on shopify and changes to existing items are
 	updated depending on what is configured in "Shopify Setting" doctype.
 	"""
-	template_item = item = doc  # alias for readability
+	item = doc
 	# a new item recieved from ecommerce_integrations is being inserted
 	if item.flags.from_integration:
 		return
 
-	setting = frappe.get_doc(SETTING_DOCTYPE)
+	setting = frappe.get_cached_doc(SETTING_DOCTYPE)
 
-	if not setting.is_enabled() or not setting.upload_erpnext_items:
+	if not _can_upload_item(item, setting, notify=True):
 		return
 
+	upload_queue.mark_dirty(item.name)
+
+
+def _can_upload_item(item, setting, notify=False) -> bool:
+	if not setting.is_enabled() or not setting.upload_erpnext_items:
+		return False
+
 	if frappe.flags.in_import:
-		return
+		return False
 
 	if item.has_variants:
-		return
+		return False
 
 	if len(item.attributes) > 3:
-		msgprint(_("Template items/Items with 4 or more attributes can not be uploaded to Shopify."))
-		return
+		if notify:
+			msgprint(_("Template items/Items with 4 or more attributes can not be uploaded to Shopify."))
+		return False
+
+	if item.variant_of and not setting.upload_variants_as_items:
+		if notify:
+			msgprint(_("Enable variant sync in setting to upload item to Shopify."))
+		return False
+
+	return True
+
 
-	if doc.variant_of and not setting.upload_variants_as_items:
-		msgprint(_("Enable variant sync in setting to upload item to Shopify."))
+@temp_shopify_session
+def upload_item(item_code: str, setting=None) -> None:
+	"""Create or update shopify product of item, called by `upload_queue` for queued items."""
+	template_item = item = frappe.get_doc("Item", item_code)
+	setting = setting or frappe.get_doc(SETTING_DOCTYPE)
+
+	# settings or item might have changed after item was queued
+	if not _can_upload_item(item, setting):
 		return
 
 	if item.variant_of:
@@ -363,6 +404,8 @@ def upload_erpnext_item(doc, method=None):
 		"integration_item_code",
 	)
 	is_new_product = not bool(product_id)
+	product_options = _get_product_options(template_item) if item.variant_of else []
+	payload_hash = _get_payload_hash(template_item, item, product_options)
 
 	if is_new_product:
 		product = Product()
@@ -387,17 +430,9 @@ def upload_erpnext_item(doc, method=None):
 					"sku": item.item_code,
 					"price": item.get(ITEM_SELLING_RATE_FIELD),
 				}
-				max_index_range = min(3, len(template_item.attributes))
-				for i in range(0, max_index_range):
+				for i, option in enumerate(product_options):
 					attr = template_item.attributes[i]
-					product.options.append(
-						{
-							"name": attr.attribute,
-							"values": frappe.db.get_all(
-								"Item Attribute Value", {"parent": attr.attribute}, pluck="attribute_value"
-							),
-						}
-					)
+					product.options.append(option)
 					try:
 						variant_attributes[f"option{i+1}"] = item.attributes[i].attribute_value
 					except IndexError:
@@ -415,6 +450,9 @@ def upload_erpnext_item(doc, method=None):
 						"integration": MODULE_NAME,
 						"integration_item_code": str(product.id),
 						"variant_id": "" if d.has_variants else str(product.variants[0].id),
+						"inventory_item_id": ""
+						if d.has_variants
+						else cstr(product.variants[0].attributes.get("inventory_item_id")),
 						"sku": "" if d.has_variants else str(product.variants[0].sku),
 						"has_variants": d.has_variants,
 						"variant_of": d.variant_of,
@@ -422,8 +460,13 @@ def upload_erpnext_item(doc, method=None):
 				)
 				ecom_item.insert()
 
+		if is_successful:
+			_save_payload_hash(item, payload_hash)
 		write_upload_log(status=is_successful, product=product, item=item)
 	elif setting.update_shopify_item_on_update:
+		if payload_hash == ecommerce_item.get_payload_hashes(MODULE_NAME, [item.name]).get(item.name):
+			return  # nothing that is uploaded has changed since last upload
+
 		product = Product.find(product_id)
 		if product:
 			map_erpnext_item_to_shopify(shopify_product=product, erpnext_item=template_item)
@@ -434,17 +477,9 @@ def upload_erpnext_item(doc, method=None):
 			else:
 				variant_attributes = {"sku": item.item_code, "price": item.get(ITEM_SELLING_RATE_FIELD)}
 				product.options = []
-				max_index_range = min(3, len(template_item.attributes))
-				for i in range(0, max_index_range):
+				for i, option in enumerate(product_options):
 					attr = template_item.attributes[i]
-					product.options.append(
-						{
-							"name": attr.attribute,
-							"values": frappe.db.get_all(
-								"Item Attribute Value", {"parent": attr.attribute}, pluck="attribute_value"
-							),
-						}
-					)
+					product.options.append(option)
 					try:
 						variant_attributes[f"option{i+1}"] = item.attributes[i].attribute_value
 					except IndexError:
@@ -454,6 +489,8 @@ def upload_erpnext_item(doc, method=None):
 			is_successful = product.save()
 			if is_successful and item.variant_of:
 				map_erpnext_variant_to_shopify_variant(product, item, variant_attributes)
+			if is_successful:
+				_save_payload_hash(item, payload_hash)
 
 			write_upload_log(status=is_successful, product=product, item=item, action="Updated")
 
@@ -482,6 +519,7 @@ def map_erpnext_variant_to_shopify_variant(
 							"integration": MODULE_NAME,
 							"integration_item_code": str(shopify_product.id),
 							"variant_id": variant_product_id,
+							"inventory_item_id": cstr(variant.attributes.get("inventory_item_id")),
 							"sku": str(variant.sku),
 							"variant_of": erpnext_item.variant_of,
 						}
@@ -495,20 +533,61 @@ def map_erpnext_variant_to_shopify_variant(
 def map_erpnext_item_to_shopify(shopify_product: Product, erpnext_item):
 	"""Map erpnext fields to shopify, called both when updating and creating new products."""
 
-	shopify_product.title = erpnext_item.item_name
-	shopify_product.body_html = erpnext_item.description
-	shopify_product.product_type = erpnext_item.item_group
+	for field, value in get_shopify_product_fields(erpnext_item).items():
+		setattr(shopify_product, field, value)
+
+	if erpnext_item.disabled:
+		msgprint(_("Status of linked Shopify product is changed to Draft."))
+
+
+def get_shopify_product_fields(erpnext_item) -> dict:
+	"""Shopify product fields mapped from erpnext item."""
+	fields = {
+		"title": erpnext_item.item_name,
+		"body_html": erpnext_item.description,
+		"product_type": erpnext_item.item_group,
+	}
 
 	if erpnext_item.weight_uom in WEIGHT_TO_ERPNEXT_UOM_MAP.values():
 		# reverse lookup for key
-		uom = get_shopify_weight_uom(erpnext_weight_uom=erpnext_item.weight_uom)
-		shopify_product.weight = erpnext_item.weight_per_unit
-		shopify_product.weight_unit = uom
+		fields["weight"] = erpnext_item.weight_per_unit
+		fields["weight_unit"] = get_shopify_weight_uom(erpnext_weight_uom=erpnext_item.weight_uom)
 
 	if erpnext_item.disabled:
-		shopify_product.status = "draft"
-		shopify_product.published = False
-		msgprint(_("Status of linked Shopify product is changed to Draft."))
+		fields["status"] = "draft"
+		fields["published"] = False
+
+	return fields
+
+
+def _get_product_options(template_item) -> List[Dict]:
+	"""Product options of template with all values of its first three attributes."""
+	return [
+		{
+			"name": attr.attribute,
+			"values": frappe.db.get_all(
+				"Item Attribute Value", {"parent": attr.attribute}, pluck="attribute_value"
+			),
+		}
+		for attr in template_item.attributes[:3]
+	]
+
+
+def _get_payload_hash(template_item, item, product_options: List[Dict]) -> str:
+	"""Hash of everything that is uploaded for item, see `upload_item`."""
+	payload = get_shopify_product_fields(template_item)
+	payload["options"] = product_options
+	payload["variant"] = {
+		"sku": item.item_code,
+		"price": item.get(ITEM_SELLING_RATE_FIELD),
+		"is_stock_item": template_item.is_stock_item,
+		"options": [d.attribute_value for d in item.attributes[:3]],
+	}
+	return ecommerce_item.get_payload_hash(payload)
+
+
+def _save_payload_hash(item, payload_hash: str) -> None:
+	ecommerce_item.set_payload_hash(MODULE_NAME, item.name, payload_hash)
 
 
 def get_shopify_weight_uom(erpnext_weight_uom: str) -> str:
@@ -547,7 +626,12 @@ def write_upload_log(status: bool, product: Product, item, action="Created") ->
 		msgprint(msg, title="Note", indicator="orange")
 
 		create_shopify_log(
-			status="Error", request_data=product.to_dict(), message=msg, method="upload_erpnext_item",
+			status="Error",
+			request_data=product.to_dict(),
+			message=msg,
+			method="upload_erpnext_item",
+			external_id=product.id,
+			external_type="Product",
 		)
 	else:
 		create_shopify_log(
@@ -555,4 +639,6 @@ def write_upload_log(status: bool, product: Product, item, action="Created") ->
 			request_data=product.to_dict(),
 			message=f"{action} Item: {item.name}, shopify product: {product.id}",
 			method="upload_erpnext_item",
+			external_id=product.id,
+			external_type="Product",
 		)
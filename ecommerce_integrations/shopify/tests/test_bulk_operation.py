@@ -0,0 +1,59 @@
+# Copyright (c) 2026, Frappe and Contributors
+# See LICENSE
+
+import json
+import os
+import unittest
+
+from ecommerce_integrations.shopify.bulk_operation import (
+	ORDER_BATCH_SIZE,
+	iter_order_batches,
+	iter_products,
+	iter_records,
+)
+
+FIXTURE = os.path.join(os.path.dirname(__file__), "data", "bulk_products.jsonl")
+
+
+class TestBulkOperation(unittest.TestCase):
+	def test_iter_records(self):
+		with open(FIXTURE, "rb") as f:
+			records = list(iter_records(f))
+
+		self.assertEqual(len(records), 2)
+		self.assertEqual(len(records[0]["children"]), 2)
+		self.assertEqual(len(records[1]["children"]), 1)
+		self.assertNotIn("__parentId", records[0]["children"][0])
+
+	def test_orphan_child(self):
+		lines = [json.dumps({"id": "gid://shopify/ProductVariant/1", "__parentId": "missing"})]
+		self.assertRaises(ValueError, list, iter_records(lines))
+
+	def test_products_to_rest_format(self):
+		with open(FIXTURE, "rb") as f:
+			products = list(iter_products(iter_records(f)))
+
+		shirt, gift_card = products
+		self.assertEqual(shirt["id"], 6808908169263)
+		self.assertEqual(shirt["body_html"], "<p>Soft cotton t-shirt</p>")
+		self.assertEqual(shirt["image"]["src"], "https://cdn.shopify.com/s/files/tshirt.png")
+		self.assertEqual(shirt["options"][1], {"name": "Color", "values": ["Red", "Blue"]})
+
+		variant = shirt["variants"][1]
+		self.assertEqual(variant["id"], 40279118282799)
+		self.assertEqual(variant["inventory_item_id"], 42373425397807)
+		self.assertEqual(variant["weight_unit"], "kg")
+		self.assertEqual((variant["option1"], variant["option2"]), ("M", "Blue"))
+
+		self.assertIsNone(gift_card["image"])
+		self.assertEqual(gift_card["variants"][0]["weight_unit"], "g")
+
+	def test_iter_order_batches(self):
+		def fetch(ids):
+			return [{"id": order_id} for order_id in ids]
+
+		order_ids = (str(i) for i in range(ORDER_BATCH_SIZE + 1))
+		batches = list(iter_order_batches(order_ids, fetch=fetch))
+
+		self.assertEqual([len(b) for b in batches], [ORDER_BATCH_SIZE, 1])
+		self.assertEqual(batches[1], [{"id": str(ORDER_BATCH_SIZE)}])
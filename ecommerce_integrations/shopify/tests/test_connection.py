@@ -2,12 +2,13 @@
 # See LICENSE
 
 import unittest
+from unittest.mock import patch
 
 import frappe
 from shopify.resources import Webhook
 from shopify.session import Session
 
-from ecommerce_integrations.shopify import connection
+from ecommerce_integrations.shopify import connection, webhook_queue
 from ecommerce_integrations.shopify.constants import API_VERSION, SETTING_DOCTYPE
 
 
@@ -38,3 +39,71 @@ class TestShopifyConnection(unittest.TestCase):
 		with Session.temp(self.setting.shopify_url, API_VERSION, self.setting.get_password("password")):
 			for wh in Webhook.find():
 				self.assertNotEqual(wh.address, callback_url)
+
+
+class TestWebhookQueue(unittest.TestCase):
+	def setUp(self):
+		self.conn = webhook_queue.get_redis_conn()
+		self.shard = webhook_queue.get_shard(b'{"id": 1}')
+		self.queue_key = webhook_queue._queue_key(self.shard)
+		self.processing_key = webhook_queue._processing_key(self.shard)
+		self.conn.delete(self.queue_key, self.processing_key)
+
+	def tearDown(self):
+		self.conn.delete(self.queue_key, self.processing_key)
+		self.conn.delete(webhook_queue._make_key(f"{webhook_queue.WEBHOOK_ID_KEY}|test-webhook-id"))
+
+	def test_duplicate_webhooks_are_dropped(self):
+		body = b'{"id": 1}'
+
+		self.assertEqual(webhook_queue.push("orders/create", body, "test-webhook-id"), self.shard)
+		self.assertIsNone(webhook_queue.push("orders/create", body, "test-webhook-id"))
+
+		entries = self.conn.lrange(self.queue_key, 0, -1)
+		self.assertEqual(len(entries), 1)
+		self.assertEqual(
+			webhook_queue.parse_entry(entries[0]), ("orders/create", "test-webhook-id", body)
+		)
+
+	def test_events_of_an_order_share_a_shard(self):
+		self.assertEqual(
+			webhook_queue.get_shard(b'{"id": 42, "financial_status": "paid"}'),
+			webhook_queue.get_shard(b'{"id": 42}'),
+		)
+		self.assertEqual(webhook_queue.get_shard(b'{"id":42}'), webhook_queue.get_shard(b'{"id": 42}'))
+
+		# body isn't parsed, only order id at start of it is used
+		self.assertEqual(webhook_queue.get_shard(b"not json"), 0)
+		self.assertEqual(webhook_queue.get_shard(b'{"line_items": [{"id": 42}]}'), 0)
+
+	@patch("ecommerce_integrations.shopify.webhook_queue.process_events")
+	def test_entries_are_kept_until_processed(self, process_events):
+		webhook_queue.push("orders/paid", b'{"id": 1}')
+		process_events.side_effect = Exception("worker died")
+
+		with self.assertRaises(Exception):
+			webhook_queue.drain_webhook_queue(self.shard)
+
+		# entry survives a failed drain and is picked up by the next one
+		self.assertEqual(self.conn.llen(self.processing_key), 1)
+
+		process_events.side_effect = None
+		webhook_queue.drain_webhook_queue(self.shard)
+
+		self.assertEqual(process_events.call_count, 2)
+		self.assertEqual(self.conn.llen(self.processing_key), 0)
+		self.assertEqual(self.conn.llen(self.queue_key), 0)
+
+	def test_sort_events(self):
+		events = [
+			frappe._dict(topic="orders/paid", data={"id": 1}),
+			frappe._dict(topic="orders/create", data={"id": 2}),
+			frappe._dict(topic="orders/cancelled", data={"id": 1}),
+			frappe._dict(topic="orders/create", data={"id": 1}),
+		]
+
+		ordered = [(e.data["id"], e.topic) for e in webhook_queue.sort_events(events)]
+		self.assertEqual(
+			ordered,
+			[(1, "orders/create"), (1, "orders/paid"), (1, "orders/cancelled"), (2, "orders/create")],
+		)
@@ -0,0 +1,53 @@
+# Copyright (c) 2021, Frappe and Contributors
+# See LICENSE
+
+import unittest
+from unittest.mock import patch
+
+from frappe import _dict
+
+from ecommerce_integrations.shopify.inventory import _set_inventory_quantities
+
+
+def _graphql_response(user_errors):
+	return {"data": {"inventorySetQuantities": {"userErrors": user_errors}}}
+
+
+class TestInventory(unittest.TestCase):
+	def setUp(self):
+		self.inventory_levels = [
+			_dict(variant_id=str(i), inventory_item_id=str(100 + i), shopify_location_id="1", actual_qty=i)
+			for i in range(3)
+		]
+
+	@patch("ecommerce_integrations.shopify.inventory.execute_graphql")
+	def test_set_inventory_quantities(self, execute):
+		execute.return_value = _graphql_response([])
+
+		_set_inventory_quantities(self.inventory_levels)
+
+		execute.assert_called_once()
+		quantities = execute.call_args[0][1]["input"]["quantities"]
+		self.assertEqual(len(quantities), 3)
+		self.assertEqual(quantities[2]["inventoryItemId"], "gid://shopify/InventoryItem/102")
+		self.assertEqual(quantities[2]["quantity"], 2)
+		self.assertEqual({d.status for d in self.inventory_levels}, {"Success"})
+
+	@patch("ecommerce_integrations.shopify.inventory.execute_graphql")
+	def test_set_inventory_quantities_with_errors(self, execute):
+		execute.side_effect = [
+			_graphql_response(
+				[
+					{"code": "INVALID_INVENTORY_ITEM", "field": ["input", "quantities", "0"], "message": "x"},
+					{"code": "INVALID_QUANTITY", "field": ["input", "quantities", "2"], "message": "Bad qty"},
+				]
+			),
+			_graphql_response([]),
+		]
+
+		_set_inventory_quantities(self.inventory_levels)
+
+		# failed rows are excluded in retry
+		self.assertEqual(len(execute.call_args[0][1]["input"]["quantities"]), 1)
+		self.assertEqual([d.status for d in self.inventory_levels], ["Not Found", "Success", "Failed"])
+		self.assertEqual(self.inventory_levels[2].failure_reason, "Bad qty")
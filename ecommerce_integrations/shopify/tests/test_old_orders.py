@@ -0,0 +1,46 @@
+# Copyright (c) 2026, Frappe and Contributors
+# See LICENSE
+
+import unittest
+from unittest.mock import patch
+
+from frappe import _dict
+from frappe.utils import get_datetime
+
+from ecommerce_integrations.shopify.old_orders import (
+	MIN_SLICE_DURATION,
+	SLICE_COUNT,
+	_iter_bulk_pages,
+	make_slices,
+)
+from ecommerce_integrations.utils.concurrency import RateLimiter
+
+
+class TestOldOrders(unittest.TestCase):
+	def test_make_slices(self):
+		slices = make_slices("2021-01-01 00:00:00", "2021-03-01 00:00:00")
+
+		self.assertEqual(len(slices), SLICE_COUNT)
+		self.assertEqual(slices[0]["from_time"], get_datetime("2021-01-01 00:00:00"))
+		self.assertEqual(slices[-1]["to_time"], get_datetime("2021-03-01 00:00:00"))
+		for previous, current in zip(slices, slices[1:]):
+			self.assertEqual(previous["to_time"], current["from_time"])
+
+		# short ranges are not split below minimum duration
+		slices = make_slices("2021-01-01 00:00:00", "2021-01-01 02:30:00")
+		self.assertEqual(len(slices), 3)
+		self.assertEqual(slices[0]["to_time"] - slices[0]["from_time"], MIN_SLICE_DURATION)
+
+	@patch("ecommerce_integrations.shopify.old_orders._find_orders")
+	@patch("ecommerce_integrations.shopify.old_orders.iter_bulk_order_ids")
+	def test_bulk_pages_resume_after_cursor(self, iter_bulk_order_ids, find_orders):
+		iter_bulk_order_ids.return_value = iter(["30", "10", "20", "40"])
+		find_orders.side_effect = lambda ids, **kwargs: [{"id": int(i)} for i in ids.split(",")][::-1]
+
+		order_slice = _dict(from_time="2021-01-01 00:00:00", to_time="2021-01-02 00:00:00")
+		pages = list(_iter_bulk_pages(order_slice, "20", RateLimiter(0)))
+
+		self.assertEqual(pages, [[{"id": 30}, {"id": 40}]])
+		self.assertEqual(find_orders.call_args.kwargs["ids"], "30,40")
+		# same status policy as REST pages, only open orders
+		self.assertNotIn("status", find_orders.call_args.kwargs)
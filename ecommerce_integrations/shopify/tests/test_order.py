@@ -4,9 +4,32 @@
 import json
 import unittest
 
-from ecommerce_integrations.shopify.order import sync_sales_order
+import frappe
+
+from ecommerce_integrations.shopify.order import TaxAccountMap, sync_sales_order
 
 
 class TestOrder(unittest.TestCase):
 	def test_sync_with_variants(self):
 		pass
+
+
+class TestTaxAccountMap(unittest.TestCase):
+	def test_tax_account_map(self):
+		tax_account_map = TaxAccountMap(
+			accounts={"vat": {"tax_account": "VAT - _TC", "tax_description": "Value Added Tax"}},
+			defaults={"shipping": "Freight - _TC", "sales_tax": None},
+		)
+
+		self.assertEqual(tax_account_map.get_account_head({"title": "VAT"}), "VAT - _TC")
+		self.assertEqual(tax_account_map.get_description({"title": "VAT"}), "Value Added Tax")
+		self.assertEqual(
+			tax_account_map.get_account_head({"title": "Standard"}, charge_type="shipping"),
+			"Freight - _TC",
+		)
+		self.assertRaises(
+			frappe.ValidationError,
+			tax_account_map.get_account_head,
+			{"title": "Unknown"},
+			charge_type="sales_tax",
+		)
@@ -25,6 +25,11 @@ class TestProduct(TestCase):
 		ecommerce_item_exists = frappe.db.exists("Ecommerce Item", {"erpnext_item_code": item.name})
 		self.assertTrue(bool(ecommerce_item_exists))
 
+		inventory_item_id = frappe.db.get_value(
+			"Ecommerce Item", {"erpnext_item_code": item.name}, "inventory_item_id"
+		)
+		self.assertEqual(inventory_item_id, "42028371214489")
+
 	def test_sync_product_with_variants(self):
 		self.fake("products/6704435495065", body=self.load_fixture("variant_product"))
 
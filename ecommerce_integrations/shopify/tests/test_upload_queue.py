@@ -0,0 +1,57 @@
+# Copyright (c) 2026, Frappe and Contributors
+# See LICENSE
+
+import unittest
+from unittest.mock import patch
+
+from ecommerce_integrations.shopify import upload_queue
+from ecommerce_integrations.shopify.upload_queue import upload_items
+
+
+class TestUploadQueue(unittest.TestCase):
+	@patch("ecommerce_integrations.shopify.upload_queue.frappe.db.commit")
+	@patch("ecommerce_integrations.shopify.product.upload_item")
+	@patch("ecommerce_integrations.shopify.upload_queue._get_templates")
+	def test_variants_are_uploaded_together(self, get_templates, upload_item, _commit):
+		get_templates.return_value = [
+			("T-SHIRT", "T-SHIRT-RED"),
+			("MUG", "MUG"),
+			("T-SHIRT", "T-SHIRT-BLUE"),
+		]
+
+		upload_items(["T-SHIRT-RED", "MUG", "T-SHIRT-BLUE"])
+
+		uploaded = [c.args[0] for c in upload_item.call_args_list]
+		self.assertEqual(uploaded, ["MUG", "T-SHIRT-BLUE", "T-SHIRT-RED"])
+
+	@patch("ecommerce_integrations.shopify.upload_queue._should_retry", return_value=True)
+	@patch("ecommerce_integrations.shopify.upload_queue._upload_item")
+	@patch("ecommerce_integrations.shopify.upload_queue._get_templates")
+	def test_failed_and_locked_items_are_retried(self, get_templates, upload_item, _should_retry):
+		get_templates.return_value = [("MUG", "MUG"), ("CAP", "CAP"), ("T-SHIRT", "T-SHIRT-RED")]
+		upload_item.side_effect = lambda item_code, setting: item_code != "MUG"
+
+		lock = upload_queue._template_lock("T-SHIRT")
+		lock.acquire()
+		try:
+			retry = upload_items(["MUG", "CAP", "T-SHIRT-RED"])
+		finally:
+			lock.release()
+
+		self.assertEqual(sorted(retry), ["MUG", "T-SHIRT-RED"])
+
+	@patch("ecommerce_integrations.shopify.upload_queue.upload_items", return_value=[])
+	def test_items_of_killed_job_are_uploaded(self, upload_items):
+		conn = upload_queue.get_redis_conn()
+		queue_key = upload_queue._make_key(upload_queue.QUEUE_KEY)
+		processing_key = upload_queue._make_key(f"{upload_queue.PROCESSING_KEY}|0")
+		self.addCleanup(conn.delete, queue_key, processing_key)
+
+		conn.sadd(processing_key, "LEFT-BEHIND")
+		conn.sadd(queue_key, "QUEUED")
+
+		upload_queue.upload_queued_items(worker=0)
+
+		uploaded = [c.args[0] for c in upload_items.call_args_list]
+		self.assertEqual(uploaded, [["LEFT-BEHIND"], ["QUEUED"]])
+		self.assertFalse(conn.exists(queue_key, processing_key))
@@ -0,0 +1,164 @@
+"""Queue of ERPNext items to be uploaded to Shopify.
+
+Item hooks only add the item to a redis set, so repeated saves of an item before it's
+uploaded result in a single upload. The set is consumed by `upload_queued_items` jobs."""
+
+import time
+from itertools import groupby
+from typing import List
+
+import frappe
+from frappe.utils.background_jobs import get_redis_conn
+
+from ecommerce_integrations.shopify.constants import SETTING_DOCTYPE
+from ecommerce_integrations.shopify.utils import create_shopify_log
+
+QUEUE_KEY = "shopify_item_upload_queue"
+# items taken by a worker, these are put back in queue if the worker dies
+PROCESSING_KEY = "shopify_item_upload_processing"
+ATTEMPTS_KEY = "shopify_item_upload_attempts"
+
+# number of jobs uploading items at the same time
+UPLOAD_WORKERS = 2
+UPLOAD_BATCH_SIZE = 50
+UPLOAD_JOB_TIMEOUT = 25 * 60
+# no new batch is started after this many seconds, rest is left for next job
+UPLOAD_TIME_BUDGET = 10 * 60
+
+# failed uploads are retried in following jobs, at most these many times
+MAX_UPLOAD_ATTEMPTS = 3
+ATTEMPTS_EXPIRY = 24 * 60 * 60
+
+
+def mark_dirty(item_code: str) -> None:
+	"""Queue item for upload once current transaction is committed."""
+
+	def push():
+		get_redis_conn().sadd(_make_key(QUEUE_KEY), item_code)
+		enqueue_upload()
+
+	frappe.db.after_commit.add(push)
+
+
+def enqueue_upload() -> None:
+	"""Start upload jobs, also called by scheduler to pick up items left in queue."""
+	for worker in range(UPLOAD_WORKERS):
+		frappe.enqueue(
+			"ecommerce_integrations.shopify.upload_queue.upload_queued_items",
+			queue="short",
+			timeout=UPLOAD_JOB_TIMEOUT,
+			job_id=f"shopify_item_upload_{worker}",
+			deduplicate=True,
+			worker=worker,
+		)
+
+
+def upload_queued_items(worker: int = 0) -> None:
+	"""Upload queued items in batches until the queue is empty.
+
+	A batch is moved to processing set of the worker and is removed from it only after
+	all its items are handled, so items of a killed job are uploaded by the next one."""
+	conn = get_redis_conn()
+	queue_key = _make_key(QUEUE_KEY)
+	processing_key = _make_key(f"{PROCESSING_KEY}|{worker}")
+	setting = frappe.get_doc(SETTING_DOCTYPE)
+
+	retry = []
+	started = time.monotonic()
+	try:
+		while time.monotonic() - started < UPLOAD_TIME_BUDGET:
+			item_codes = conn.smembers(processing_key) or _move_batch(conn, queue_key, processing_key)
+			if not item_codes:
+				break
+
+			retry += upload_items([d.decode() for d in item_codes], setting)
+			conn.delete(processing_key)
+	finally:
+		# retried in next job, not in this loop
+		if retry:
+			conn.sadd(queue_key, *retry)
+
+
+def upload_items(item_codes: List[str], setting=None) -> List[str]:
+	"""Upload items, variants of a template one after another.
+
+	Returns item codes that should be uploaded again later."""
+	frappe.set_user("Administrator")
+	retry = []
+
+	for template, items in groupby(sorted(_get_templates(item_codes)), key=lambda d: d[0]):
+		template_items = [item_code for _template, item_code in items]
+
+		lock = _template_lock(template)
+		if not lock.acquire(blocking=False):
+			# another job is uploading this template, retry these later
+			retry += template_items
+			continue
+
+		try:
+			for item_code in template_items:
+				if not _upload_item(item_code, setting) and _should_retry(item_code):
+					retry.append(item_code)
+		finally:
+			lock.release()
+
+	return retry
+
+
+def _upload_item(item_code: str, setting) -> bool:
+	from ecommerce_integrations.shopify.product import upload_item
+
+	try:
+		upload_item(item_code, setting=setting)
+		frappe.db.commit()
+		get_redis_conn().delete(_make_key(f"{ATTEMPTS_KEY}|{item_code}"))
+		return True
+	except Exception as e:
+		create_shopify_log(
+			status="Error",
+			exception=e,
+			method="upload_erpnext_item",
+			message=f"Failed to upload Item: {item_code}",
+			rollback=True,
+		)
+		return False
+
+
+def _should_retry(item_code: str) -> bool:
+	conn = get_redis_conn()
+	attempts_key = _make_key(f"{ATTEMPTS_KEY}|{item_code}")
+	attempts = conn.incr(attempts_key)
+	conn.expire(attempts_key, ATTEMPTS_EXPIRY)
+	if attempts >= MAX_UPLOAD_ATTEMPTS:
+		conn.delete(attempts_key)
+		return False
+	return True
+
+
+def _move_batch(conn, queue_key: str, processing_key: str) -> List[bytes]:
+	item_codes = conn.srandmember(queue_key, UPLOAD_BATCH_SIZE)
+	if not item_codes:
+		return []
+
+	# items picked by another worker in the meantime are not moved
+	pipe = conn.pipeline()
+	for item_code in item_codes:
+		pipe.smove(queue_key, processing_key, item_code)
+	return [d for d, moved in zip(item_codes, pipe.execute()) if moved]
+
+
+def _get_templates(item_codes: List[str]):
+	"""Get (template, item_code) for items that still exist."""
+	items = frappe.get_all(
+		"Item", filters={"name": ("in", item_codes)}, fields=["name", "variant_of"]
+	)
+	return [(d.variant_of or d.name, d.name) for d in items]
+
+
+def _template_lock(template: str):
+	cache = frappe.cache()
+	return cache.lock(cache.make_key(f"{QUEUE_KEY}_lock|{template}"), timeout=UPLOAD_JOB_TIMEOUT)
+
+
+def _make_key(key: str) -> str:
+	return f"{frappe.local.site}|{key}"
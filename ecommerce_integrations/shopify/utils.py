@@ -1,9 +1,11 @@
 # Copyright (c) 2021, Frappe and contributors
 # For license information, please see LICENSE
-from typing import List
+import json
+from typing import Dict, List
 
 import frappe
 from frappe import _, _dict
+from shopify.resources import GraphQL
 
 from ecommerce_integrations.ecommerce_integrations.doctype.ecommerce_integration_log.ecommerce_integration_log import (
 	create_log,
@@ -19,6 +21,23 @@ def create_shopify_log(**kwargs):
 	return create_log(module_def=MODULE_NAME, **kwargs)
 
 
+def execute_graphql(query: str, variables: Dict) -> Dict:
+	response = json.loads(GraphQL().execute(query=query, variables=variables))
+
+	if response.get("errors"):
+		raise Exception(", ".join(e.get("message", "") for e in response["errors"]))
+
+	return response
+
+
+def to_gid(resource: str, id) -> str:
+	return f"gid://shopify/{resource}/{id}"
+
+
+def from_gid(gid: str) -> str:
+	return gid.rsplit("/", 1)[-1]
+
+
 def migrate_from_old_connector(payload=None, request_id=None):
 	"""This function is called to migrate data from old connector to new connector."""
 
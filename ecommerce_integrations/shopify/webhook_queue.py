@@ -0,0 +1,220 @@
+"""Queue of received Shopify webhooks.
+
+Webhook requests only append the raw body to a redis list on the same redis as
+background jobs, logs are created and events are processed by `drain_webhook_queue`.
+
+Queue is split in shards by order id, so events of an order are always processed in
+order by a single consumer while different orders are processed in parallel."""
+
+import json
+import re
+import time
+import zlib
+from typing import List, Optional
+
+import frappe
+from frappe import _dict
+from frappe.utils.background_jobs import get_redis_conn
+
+from ecommerce_integrations.shopify.constants import EVENT_MAPPER, SETTING_DOCTYPE
+from ecommerce_integrations.shopify.utils import create_shopify_log
+
+QUEUE_KEY = "shopify_webhook_queue"
+PROCESSING_KEY = "shopify_webhook_queue_processing"
+WEBHOOK_ID_KEY = "shopify_webhook_id"
+
+# number of queues (and drain jobs running in parallel)
+QUEUE_SHARDS = 4
+
+# Shopify retries failed deliveries for 48 hours
+WEBHOOK_ID_EXPIRY = 48 * 60 * 60
+
+# Shopify sends the order id as first key of the body, only this many bytes are
+# searched for it so webhook requests don't parse the body
+SHARD_ID_PREFIX_BYTES = 64
+SHARD_ID_PATTERN = re.compile(rb'^\s*\{\s*"id"\s*:\s*(\d+)')
+
+# events processed in one batch
+DRAIN_BATCH_SIZE = 50
+DRAIN_JOB_TIMEOUT = 25 * 60
+# no new batch is started after this many seconds, rest is left for next job
+DRAIN_TIME_BUDGET = 10 * 60
+
+# orders/create must be processed before other events of the same order
+TOPIC_PRIORITY = {"orders/create": 0, "orders/cancelled": 2}
+
+# handlers that accept Shopify Setting loaded once for the batch
+SETTING_HANDLER_TOPICS = (
+	"orders/create",
+	"orders/paid",
+	"orders/fulfilled",
+	"orders/partially_fulfilled",
+)
+
+
+def push(topic: str, body: bytes, webhook_id: Optional[str] = None) -> Optional[int]:
+	"""Append webhook to queue of its order and return the shard.
+
+	Returns None if webhook with same id was already received."""
+	conn = get_redis_conn()
+
+	seen_key = _make_key(f"{WEBHOOK_ID_KEY}|{webhook_id}")
+	if webhook_id and not conn.set(seen_key, 1, nx=True, ex=WEBHOOK_ID_EXPIRY):
+		return None
+
+	shard = get_shard(body)
+	try:
+		# body is stored as is, it's only parsed again when queue is drained
+		conn.rpush(_queue_key(shard), f"{topic}\n{webhook_id or ''}\n".encode() + body)
+	except Exception:
+		if webhook_id:
+			conn.delete(seen_key)
+		raise
+
+	return shard
+
+
+def get_shard(body: bytes) -> int:
+	"""Get shard of order id found at start of body.
+
+	Bodies without it all go to first shard, so events of an order are never split."""
+	match = SHARD_ID_PATTERN.match(body[:SHARD_ID_PREFIX_BYTES])
+	if not match:
+		return 0
+
+	return zlib.crc32(match.group(1)) % QUEUE_SHARDS
+
+
+def enqueue_drain(shard: Optional[int] = None) -> None:
+	"""Enqueue drain job of a shard, or of all shards. Also called by scheduler."""
+	shards = range(QUEUE_SHARDS) if shard is None else [shard]
+	for shard in shards:
+		frappe.enqueue(
+			"ecommerce_integrations.shopify.webhook_queue.drain_webhook_queue",
+			queue="short",
+			timeout=DRAIN_JOB_TIMEOUT,
+			job_id=f"shopify_webhook_queue_drain_{shard}",
+			deduplicate=True,
+			shard=shard,
+		)
+
+
+def drain_webhook_queue(shard: int = 0) -> None:
+	"""Process queued webhooks of a shard in batches.
+
+	A batch is moved to a processing list and every entry is removed from it only after
+	its event is processed, entries left there by a killed job are processed first by
+	the next job."""
+	cache = frappe.cache()
+	lock = cache.lock(cache.make_key(f"{QUEUE_KEY}_lock|{shard}"), timeout=DRAIN_JOB_TIMEOUT)
+	if not lock.acquire(blocking=False):
+		return  # another worker is draining this shard, events must be processed in order
+
+	try:
+		conn = get_redis_conn()
+		processing_key = _processing_key(shard)
+		started = time.monotonic()
+
+		while time.monotonic() - started < DRAIN_TIME_BUDGET:
+			entries = conn.lrange(processing_key, 0, -1) or _move_batch(conn, shard)
+			if not entries:
+				break
+
+			events = _create_logs(entries)
+			frappe.db.commit()
+
+			process_events(events, ack=lambda event: conn.lrem(processing_key, 1, event.entry))
+			# entries that were not valid events
+			conn.delete(processing_key)
+	finally:
+		frappe.flags.request_id = None
+		lock.release()
+
+
+def _move_batch(conn, shard: int) -> List[bytes]:
+	pipe = conn.pipeline()
+	for _ in range(DRAIN_BATCH_SIZE):
+		pipe.lmove(_queue_key(shard), _processing_key(shard), "LEFT", "RIGHT")
+	return [entry for entry in pipe.execute() if entry is not None]
+
+
+def process_events(events: List[_dict], ack=None) -> None:
+	"""Run event handlers of a batch with shared setting, in order of events for each order.
+
+	`ack(event)` is called once an event is processed and committed, failed events
+	have an error log."""
+	frappe.set_user("Administrator")
+	setting = frappe.get_doc(SETTING_DOCTYPE)
+
+	for event in sort_events(events):
+		frappe.flags.request_id = event.log
+		try:
+			handler = frappe.get_attr(EVENT_MAPPER[event.topic])
+			if event.topic in SETTING_HANDLER_TOPICS:
+				handler(event.data, request_id=event.log, setting=setting)
+			else:
+				handler(event.data, request_id=event.log)
+		except Exception as e:
+			create_shopify_log(status="Error", exception=e, rollback=True)
+
+		if ack:
+			# event is removed from queue only once its changes are committed
+			frappe.db.commit()
+			ack(event)
+
+
+def sort_events(events: List[_dict]) -> List[_dict]:
+	"""Group events by order id (in order of arrival), orders/create comes first in each group."""
+	orders = {}
+	for event in events:
+		orders.setdefault(event.data.get("id"), []).append(event)
+
+	return [
+		event
+		for order_events in orders.values()
+		for event in sorted(order_events, key=lambda e: TOPIC_PRIORITY.get(e.topic, 1))
+	]
+
+
+def _create_logs(entries: List[bytes]) -> List[_dict]:
+	events = []
+	for entry in entries:
+		topic, webhook_id, body = parse_entry(entry)
+		try:
+			data = json.loads(body)
+		except ValueError:
+			create_shopify_log(status="Error", request_data=body.decode(errors="replace"), make_new=True)
+			continue
+
+		if topic not in EVENT_MAPPER:
+			continue
+
+		log = create_shopify_log(
+			method=EVENT_MAPPER[topic],
+			request_data=data,
+			make_new=True,
+			external_id=data.get("id"),
+			external_type="Order",
+		)
+		events.append(
+			_dict(topic=topic, webhook_id=webhook_id, data=data, log=log.name, entry=entry)
+		)
+
+	return events
+
+
+def parse_entry(entry: bytes):
+	topic, webhook_id, body = entry.split(b"\n", 2)
+	return topic.decode(), webhook_id.decode() or None, body
+
+
+def _queue_key(shard: int) -> str:
+	return _make_key(f"{QUEUE_KEY}|{shard}")
+
+
+def _processing_key(shard: int) -> str:
+	return _make_key(f"{PROCESSING_KEY}|{shard}")
+
+
+def _make_key(key: str) -> str:
+	return f"{frappe.local.site}|{key}"
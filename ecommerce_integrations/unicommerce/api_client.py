@@ -1,5 +1,6 @@
 import base64
-from typing import Any, Dict, List, Optional, Tuple
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple
 
 import frappe
 import requests
@@ -7,8 +8,11 @@ from frappe import _
 from frappe.utils import cint, cstr, get_datetime
 from pytz import timezone
 
-from ecommerce_integrations.unicommerce.constants import SETTINGS_DOCTYPE
+from ecommerce_integrations.unicommerce.constants import MODULE_NAME, SETTINGS_DOCTYPE
+from ecommerce_integrations.unicommerce.token_manager import get_access_token
 from ecommerce_integrations.unicommerce.utils import create_unicommerce_log
+from ecommerce_integrations.utils.concurrency import prefetch_ordered
+from ecommerce_integrations.utils.http import get_session
 
 JsonDict = Dict[str, Any]
 
@@ -30,8 +34,7 @@ class UnicommerceAPIClient:
 	def __initialize_auth(self):
 		"""Initialize and setup authentication details"""
 		if not self.access_token:
-			self.settings.renew_tokens()
-			self.access_token = self.settings.get_password("access_token")
+			self.access_token = get_access_token()
 
 		self._auth_headers = {"Authorization": f"Bearer {self.access_token}"}
 
@@ -46,25 +49,44 @@ class UnicommerceAPIClient:
 		log_error=True,
 	) -> Tuple[JsonDict, bool]:
 
-		if headers is None:
-			headers = {}
-
-		headers.update(self._auth_headers)
-
-		url = self.base_url + endpoint
-
 		try:
-			response = requests.request(
-				url=url, method=method, headers=headers, json=body, params=params, files=files
+			response = self._send(
+				endpoint=endpoint, method=method, headers=headers, body=body, params=params, files=files
 			)
-			# unicommerce gives useful info in response text, show it in error logs
-			response.reason = cstr(response.reason) + cstr(response.text)
-			response.raise_for_status()
 		except Exception:
 			if log_error:
 				create_unicommerce_log(status="Error", make_new=True)
 			return None, False
 
+		return self._handle_response(response, method)
+
+	def _send(
+		self,
+		endpoint: str,
+		method: str = "POST",
+		headers: Optional[JsonDict] = None,
+		body: Optional[JsonDict] = None,
+		params: Optional[JsonDict] = None,
+		files: Optional[JsonDict] = None,
+	) -> requests.Response:
+		"""Send request and raise for HTTP errors.
+
+		This doesn't touch frappe.local so it's safe to call from worker threads."""
+
+		headers = dict(headers or {})
+		headers.update(self._auth_headers)
+
+		url = self.base_url + endpoint
+
+		response = get_session(MODULE_NAME).request(
+			url=url, method=method, headers=headers, json=body, params=params, files=files
+		)
+		# unicommerce gives useful info in response text, show it in error logs
+		response.reason = cstr(response.reason) + cstr(response.text)
+		response.raise_for_status()
+		return response
+
+	def _handle_response(self, response: requests.Response, method: str) -> Tuple[JsonDict, bool]:
 		if method == "GET" and "application/json" not in response.headers.get("content-type"):
 			return response.content, True
 
@@ -118,6 +140,40 @@ class UnicommerceAPIClient:
 		if status and "saleOrderDTO" in order:
 			return order["saleOrderDTO"]
 
+	def get_sales_orders(
+		self,
+		order_codes: List[str],
+		max_workers: int = 1,
+		rate_limit: Optional[float] = None,
+		failed_codes: Optional[Set[str]] = None,
+	) -> Iterator[JsonDict]:
+		"""Get details for multiple sales orders.
+
+		Orders are fetched concurrently using `max_workers` threads and at most
+		`rate_limit` requests per second, but they are returned in same order as
+		`order_codes`. Orders that fail to fetch are logged, skipped and added to
+		`failed_codes` if it's passed."""
+
+		endpoint = "/services/rest/v1/oms/saleorder/get"
+
+		def fetch(order_code):
+			return self._send(endpoint=endpoint, body={"code": order_code})
+
+		# session reads site config, so it has to be created before starting threads
+		get_session(MODULE_NAME)
+
+		for order_code, future in prefetch_ordered(fetch, order_codes, max_workers, rate_limit):
+			try:
+				order, status = self._handle_response(future.result(), method="POST")
+			except Exception:
+				create_unicommerce_log(status="Error", make_new=True)
+				order, status = None, False
+
+			if status and "saleOrderDTO" in order:
+				yield order["saleOrderDTO"]
+			elif failed_codes is not None:
+				failed_codes.add(order_code)
+
 	def search_sales_order(
 		self,
 		from_date: Optional[str] = None,
@@ -176,6 +232,57 @@ class UnicommerceAPIClient:
 		ref: https://documentation.unicommerce.com/docs/adjust-inventory-bulk.html
 		"""
 
+		response, status = self.request(**self._get_bulk_inventory_request(facility_code, inventory_map))
+		return self._parse_bulk_inventory_response(response, status)
+
+	def bulk_inventory_update_concurrently(
+		self, facility_chunks: Dict[str, Iterable[Dict[str, int]]], max_workers: int = 1
+	) -> Iterator[Tuple[str, Dict[str, int], JsonDict, bool]]:
+		"""Run `bulk_inventory_update` for chunks of multiple facilities in parallel.
+
+		Chunks of same facility are sent one after another, upto `max_workers` facilities
+		are updated at once. Yields (facility_code, inventory_map, response, status) as each
+		chunk completes, next chunk of the facility is only sent after consumer resumes
+		the iterator. Closing the iterator stops sending new chunks."""
+
+		def send(facility_code, inventory_map):
+			return self._send(**self._get_bulk_inventory_request(facility_code, inventory_map))
+
+		# session reads site config, so it has to be created before starting threads
+		get_session(MODULE_NAME)
+
+		chunks = {facility_code: iter(c) for facility_code, c in facility_chunks.items()}
+		in_flight = {}
+		executor = ThreadPoolExecutor(max_workers=max(cint(max_workers), 1))
+
+		def submit_next_chunk(facility_code):
+			inventory_map = next(chunks[facility_code], None)
+			if inventory_map:
+				future = executor.submit(send, facility_code, inventory_map)
+				in_flight[future] = (facility_code, inventory_map)
+
+		try:
+			for facility_code in chunks:
+				submit_next_chunk(facility_code)
+
+			while in_flight:
+				done, _pending = wait(in_flight, return_when=FIRST_COMPLETED)
+				for future in done:
+					facility_code, inventory_map = in_flight.pop(future)
+					try:
+						response = future.result()
+					except Exception:
+						create_unicommerce_log(status="Error", make_new=True)
+						yield facility_code, inventory_map, None, False
+					else:
+						data, status = self._handle_response(response, method="POST")
+						yield (facility_code, inventory_map, *self._parse_bulk_inventory_response(data, status))
+
+					submit_next_chunk(facility_code)
+		finally:
+			executor.shutdown(wait=True, cancel_futures=True)
+
+	def _get_bulk_inventory_request(self, facility_code: str, inventory_map: Dict[str, int]) -> JsonDict:
 		extra_headers = {"Facility": facility_code}
 
 		inventory_adjustments = []
@@ -191,12 +298,13 @@ class UnicommerceAPIClient:
 				}
 			)
 
-		response, status = self.request(
-			endpoint="/services/rest/v1/inventory/adjust/bulk",
-			headers=extra_headers,
-			body={"inventoryAdjustments": inventory_adjustments},
-		)
+		return {
+			"endpoint": "/services/rest/v1/inventory/adjust/bulk",
+			"headers": extra_headers,
+			"body": {"inventoryAdjustments": inventory_adjustments},
+		}
 
+	def _parse_bulk_inventory_response(self, response, status):
 		if not status:
 			return response, status
 		else:
@@ -415,23 +523,26 @@ class UnicommerceAPIClient:
 			return search_results["elements"]
 
 	def create_import_job(
-		self, job_name: str, csv_filename: str, facility_code: str, job_type: str = "CREATE_NEW",
+		self,
+		job_name: str,
+		csv_filename: str,
+		facility_code: Optional[str] = None,
+		job_type: str = "CREATE_NEW",
 	):
 		"""Create import job by specifying job name and CSV file
 
 		args:
 		        job_name: import job code string specified by unicommerce
 		        csv_filename: name of csv file.
-		        facility_code: facility where import should happen
+		        facility_code: facility where import should happen, not required for catalog imports
 		        job_type: create / or update code.
 		"""
 
 		url_params = {"name": job_name, "importOption": job_type}
 
-		extra_headers = {
-			"Facility": facility_code,
-			"cache-control": "no-cache",
-		}
+		extra_headers = {"cache-control": "no-cache"}
+		if facility_code:
+			extra_headers["Facility"] = facility_code
 
 		file_obj = _safe_open_csv(csv_filename)
 		files = [("file", (csv_filename, file_obj, "text/csv"))]
@@ -446,6 +557,26 @@ class UnicommerceAPIClient:
 		file_obj.close()
 		return response
 
+	def get_import_job_status(self, job_code: str) -> Optional[JsonDict]:
+		"""Get status of import job created by `create_import_job`.
+
+		ref: https://documentation.unicommerce.com/docs/import-job-status.html
+		"""
+		response, status = self.request(
+			endpoint="/services/rest/v1/data/import/job/status", body={"jobCode": job_code}
+		)
+		if status:
+			return response
+
+	def download_file(self, url: str) -> bytes:
+		"""Download file generated by Unicommerce e.g. import job logs."""
+		if url.startswith("/"):
+			url = self.base_url + url
+
+		response = get_session(MODULE_NAME).get(url, headers=self._auth_headers)
+		response.raise_for_status()
+		return response.content
+
 
 def _utc_timeformat(datetime) -> str:
 	""" Get datetime in UTC/GMT as required by Unicommerce"""
@@ -38,6 +38,10 @@ PICKLIST_ORDER_DETAILS_FIELD = "order_details"
 
 GRN_STOCK_ENTRY_TYPE = "GRN on Unicommerce"
 
+# Order sync window, in minutes
+MAX_ORDER_SYNC_WINDOW = 24 * 60
+ORDER_SYNC_OVERLAP = 30
+
 
 # Tax -> Unicommerce tax amount field mapping
 TAX_FIELDS_MAPPING = {
@@ -89,7 +89,12 @@ def create_delivery_note(so, sales_invoice):
 		res.unicommerce_shipment_id = sales_invoice.unicommerce_shipping_package_code
 		res.save()
 		res.submit()
-		log = create_unicommerce_log(method="create_delevery_note", make_new=True)
+		log = create_unicommerce_log(
+			method="create_delevery_note",
+			make_new=True,
+			external_id=sales_invoice.unicommerce_order_code,
+			external_type="Order",
+		)
 		frappe.flags.request_id = log.name
 	except Exception as e:
 		create_unicommerce_log(status="Error", exception=e, rollback=True)
@@ -7,6 +7,7 @@ from frappe.utils import now, now_datetime
 
 from ecommerce_integrations.unicommerce.constants import SETTINGS_DOCTYPE
 from ecommerce_integrations.unicommerce.tests.utils import TestCase
+from ecommerce_integrations.unicommerce.token_manager import clear_token_cache, get_access_token
 
 
 class TestUnicommerceSettings(TestCase):
@@ -70,3 +71,26 @@ class TestUnicommerceSettings(TestCase):
 		self.assertEqual(self.settings.token_type, "bearer")
 		self.assertTrue(str(self.settings.expires_on) > now())
 		self.assertTrue(responses.assert_call_count(url, 1))
+
+	@responses.activate
+	def test_token_manager(self):
+		"""requirement: Access token is shared via cache and settings are only saved on rotation."""
+		url = "https://demostaging.unicommerce.com/oauth/token"
+		responses.add(responses.GET, url, json=self.load_fixture("authentication"), status=200)
+
+		settings = frappe.get_doc(SETTINGS_DOCTYPE)
+		settings.unicommerce_site = "demostaging.unicommerce.com"
+		settings.username = "frappe"
+		settings.password = "hunter2"
+		settings.expires_on = now_datetime()
+		settings.flags.ignore_validate = True
+		settings.flags.ignore_mandatory = True
+		settings.save()
+		clear_token_cache()
+
+		for _ in range(3):
+			self.assertEqual(get_access_token(), "1211cf66-d9b3-498b-a8a4-04c76578b72e")
+
+		self.assertEqual(len(responses.calls), 1)
+		self.assertTrue(str(frappe.db.get_single_value(SETTINGS_DOCTYPE, "expires_on")) > now())
+		clear_token_cache()
@@ -4,7 +4,6 @@
 from typing import Dict, List, Optional, Tuple
 
 import frappe
-import requests
 from frappe import _
 from frappe.custom.doctype.custom_field.custom_field import create_custom_fields
 from frappe.utils import add_to_date, get_datetime, now_datetime
@@ -28,6 +27,7 @@ from ecommerce_integrations.unicommerce.constants import (
 	ITEM_SYNC_CHECKBOX,
 	ITEM_WIDTH_FIELD,
 	MANIFEST_GENERATED_CHECK,
+	MODULE_NAME,
 	ORDER_CODE_FIELD,
 	ORDER_INVOICE_STATUS_FIELD,
 	ORDER_ITEM_BATCH_NO,
@@ -44,7 +44,9 @@ from ecommerce_integrations.unicommerce.constants import (
 	TRACKING_CODE_FIELD,
 	UNICOMMERCE_SHIPPING_ID,
 )
+from ecommerce_integrations.unicommerce.token_manager import clear_token_cache
 from ecommerce_integrations.unicommerce.utils import create_unicommerce_log
+from ecommerce_integrations.utils.http import get_session
 
 
 class UnicommerceSettings(SettingController):
@@ -72,13 +74,18 @@ class UnicommerceSettings(SettingController):
 		if not self.flags.ignore_custom_fields:
 			setup_custom_fields(update=False)
 
-	def renew_tokens(self, save=True):
-		if now_datetime() >= get_datetime(self.expires_on):
-			try:
-				self.update_tokens()
-			except Exception as e:
-				create_unicommerce_log(status="Error", message="Failed to authenticate with Unicommerce")
-				raise e
+	def on_update(self):
+		clear_token_cache()
+
+	def renew_tokens(self, save=True, force=False):
+		if not force and now_datetime() < get_datetime(self.expires_on):
+			return
+
+		try:
+			self.update_tokens()
+		except Exception as e:
+			create_unicommerce_log(status="Error", message="Failed to authenticate with Unicommerce")
+			raise e
 		if save:
 			self.flags.ignore_custom_fields = True
 			self.flags.ignore_permissions = True
@@ -95,7 +102,7 @@ class UnicommerceSettings(SettingController):
 		elif grant_type == "refresh_token":
 			params.update({"refresh_token": self.get_password("refresh_token")})
 
-		res = requests.get(url, params=params)
+		res = get_session(MODULE_NAME).get(url, params=params)
 		if res.status_code == 200:
 			res = res.json()
 			self.access_token = res["access_token"]
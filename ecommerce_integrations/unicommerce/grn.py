@@ -9,11 +9,8 @@ from frappe.utils.csvutils import UnicodeWriter
 from frappe.utils.file_manager import save_file
 
 from ecommerce_integrations.unicommerce.api_client import UnicommerceAPIClient
-from ecommerce_integrations.unicommerce.constants import (
-	GRN_STOCK_ENTRY_TYPE,
-	MODULE_NAME,
-	SETTINGS_DOCTYPE,
-)
+from ecommerce_integrations.unicommerce.constants import GRN_STOCK_ENTRY_TYPE, SETTINGS_DOCTYPE
+from ecommerce_integrations.unicommerce.item_snapshot import load_item_snapshot
 from ecommerce_integrations.unicommerce.utils import remove_non_alphanumeric_chars
 
 CSV_HEADER_LINE = (
@@ -142,14 +139,19 @@ def _prepare_grn_import_csv(stock_entry) -> str:
 
 	rows = []
 	vendor_code = frappe.db.get_single_value(SETTINGS_DOCTYPE, "vendor_code")
+	invoice_date = _get_unicommerce_format_date(stock_entry.posting_date)
+
+	snapshot = load_item_snapshot(
+		[item.item_code for item in stock_entry.items],
+		item_fields=["standard_rate"],
+		batch_nos=[item.batch_no for item in stock_entry.items],
+		with_skus=True,
+	)
 
 	for item in stock_entry.items:
-		price = frappe.db.get_value("Item", item.item_code, "standard_rate") or ""
-		invoice_date = _get_unicommerce_format_date(stock_entry.posting_date)
+		price = (snapshot.get_item(item.item_code) or {}).get("standard_rate") or ""
 
-		batch_details = frappe.db.get_value(
-			"Batch", item.batch_no, fieldname=["manufacturing_date", "expiry_date"], as_dict=True
-		)
+		batch_details = snapshot.get_batch(item.batch_no)
 		manufacturing_date = _get_unicommerce_format_date(
 			batch_details.manufacturing_date if batch_details else getdate()
 		)
@@ -157,11 +159,7 @@ def _prepare_grn_import_csv(stock_entry) -> str:
 			batch_details.expiry_date if batch_details else getdate("2099-01-01")
 		)
 
-		sku = frappe.db.get_value(
-			"Ecommerce Item",
-			{"erpnext_item_code": item.item_code, "integration": MODULE_NAME},
-			"integration_item_code",
-		)
+		sku = snapshot.get_sku(item.item_code)
 		if not sku:
 			frappe.throw(_("Item {} does not have associated Unicommerce SKU.").format(item.item_code))
 
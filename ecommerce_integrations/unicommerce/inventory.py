@@ -1,22 +1,34 @@
+import time
 from collections import defaultdict
 from typing import Dict
 
 import frappe
-from frappe.utils import cint, now
+from frappe.utils import cint, create_batch, now
 
 from ecommerce_integrations.controllers.inventory import (
+	bulk_update_inventory_sync_status,
 	get_inventory_levels,
 	get_inventory_levels_of_group_warehouse,
-	update_inventory_sync_status,
 )
 from ecommerce_integrations.controllers.scheduling import need_to_run
 from ecommerce_integrations.unicommerce.api_client import UnicommerceAPIClient
 from ecommerce_integrations.unicommerce.constants import MODULE_NAME, SETTINGS_DOCTYPE
 
 # Note: Undocumented but currently handles ~1000 inventory changes in one request.
-# Remaining to be done in next interval.
+# Larger changes are sent in consecutive requests of this size.
 MAX_INVENTORY_UPDATE_IN_REQUEST = 1000
 
+# Stop sending new requests after this many seconds, remaining items are synced in next interval.
+INVENTORY_SYNC_TIME_BUDGET = 4 * 60
+
+# Number of facilities updated in parallel.
+MAX_PARALLEL_FACILITY_UPDATES = 4
+
+# Progress of current run, used for resuming if the job is killed midway.
+CHECKPOINT_CACHE_KEY = "unicommerce_inventory_sync_checkpoint"
+# a run that is killed releases its lock after this many seconds
+INVENTORY_SYNC_LOCK_TIMEOUT = 15 * 60
+
 
 def update_inventory_on_unicommerce(client=None, force=False):
 	"""Update ERPnext warehouse wise inventory to Unicommerce.
@@ -37,17 +49,36 @@ def update_inventory_on_unicommerce(client=None, force=False):
 	):
 		return
 
+	if client is None:
+		client = UnicommerceAPIClient()
+
+	# forced and scheduled runs share the checkpoint, only one of them can run at a time
+	cache = frappe.cache()
+	lock = cache.lock(
+		cache.make_key(f"{CHECKPOINT_CACHE_KEY}_lock"), timeout=INVENTORY_SYNC_LOCK_TIMEOUT
+	)
+	if not lock.acquire(blocking=False):
+		return
+
+	try:
+		_sync_inventory(settings, client)
+	finally:
+		lock.release()
+
+
+def _sync_inventory(settings, client: UnicommerceAPIClient) -> None:
 	# get configured warehouses
 	warehouses = settings.get_erpnext_warehouses()
 	wh_to_facility_map = settings.get_erpnext_to_integration_wh_mapping()
 
-	if client is None:
-		client = UnicommerceAPIClient()
+	checkpoint = _get_checkpoint()
 
 	# track which ecommerce item was updated successfully
 	success_map: Dict[str, bool] = defaultdict(lambda: True)
-	inventory_synced_on = now()
+	success_map.update(checkpoint["success_map"])
+	inventory_synced_on = checkpoint["synced_on"]
 
+	facility_inventory = {}
 	for warehouse in warehouses:
 		is_group_warehouse = cint(frappe.db.get_value("Warehouse", warehouse, "is_group"))
 
@@ -58,31 +89,84 @@ def update_inventory_on_unicommerce(client=None, force=False):
 		else:
 			erpnext_inventory = get_inventory_levels(warehouses=(warehouse,), integration=MODULE_NAME)
 
-		if not erpnext_inventory:
-			continue
+		facility_code = wh_to_facility_map[warehouse]
+		synced_skus = set(checkpoint["facilities"].get(facility_code, []))
+		erpnext_inventory = [d for d in erpnext_inventory if d.integration_item_code not in synced_skus]
 
-		erpnext_inventory = erpnext_inventory[:MAX_INVENTORY_UPDATE_IN_REQUEST]
+		if erpnext_inventory:
+			facility_inventory[facility_code] = erpnext_inventory
 
-		# TODO: consider reserved qty on both platforms.
-		inventory_map = {d.integration_item_code: cint(d.actual_qty) for d in erpnext_inventory}
-		facility_code = wh_to_facility_map[warehouse]
+	if not facility_inventory:
+		_update_inventory_sync_status(success_map, inventory_synced_on)
+		_clear_checkpoint()
+		return
 
-		response, status = client.bulk_inventory_update(
-			facility_code=facility_code, inventory_map=inventory_map
+	# TODO: consider reserved qty on both platforms.
+	facility_chunks = {
+		facility_code: (
+			{d.integration_item_code: cint(d.actual_qty) for d in chunk}
+			for chunk in create_batch(erpnext_inventory, MAX_INVENTORY_UPDATE_IN_REQUEST)
 		)
+		for facility_code, erpnext_inventory in facility_inventory.items()
+	}
+	sku_to_ecom_item_map = {
+		d.integration_item_code: d.ecom_item for inv in facility_inventory.values() for d in inv
+	}
+	pending_skus = {
+		facility_code: {d.integration_item_code for d in inv}
+		for facility_code, inv in facility_inventory.items()
+	}
+
+	started_at = time.monotonic()
+	results = client.bulk_inventory_update_concurrently(
+		facility_chunks, max_workers=MAX_PARALLEL_FACILITY_UPDATES
+	)
+	for facility_code, inventory_map, response, status in results:
+		pending_skus[facility_code] -= set(inventory_map)
 
 		if status:
 			# update success_map
-			sku_to_ecom_item_map = {d.integration_item_code: d.ecom_item for d in erpnext_inventory}
 			for sku, status in response.items():
 				ecom_item = sku_to_ecom_item_map[sku]
 				# Any one warehouse sync failure should be considered failure
 				success_map[ecom_item] = success_map[ecom_item] and status
+		else:
+			for sku in inventory_map:
+				success_map[sku_to_ecom_item_map[sku]] = False
+
+		checkpoint["facilities"].setdefault(facility_code, []).extend(inventory_map)
+		checkpoint["success_map"] = dict(success_map)
+		_save_checkpoint(checkpoint)
+
+		if time.monotonic() - started_at > INVENTORY_SYNC_TIME_BUDGET:
+			results.close()
+			break
+
+	# items that are not sent to all facilities are synced again in next interval.
+	for skus in pending_skus.values():
+		for sku in skus:
+			success_map[sku_to_ecom_item_map[sku]] = False
 
 	_update_inventory_sync_status(success_map, inventory_synced_on)
+	_clear_checkpoint()
+
+
+def _get_checkpoint() -> Dict:
+	"""Get progress of last incomplete run or start a new one."""
+	checkpoint = frappe.cache().get_value(CHECKPOINT_CACHE_KEY)
+	if not checkpoint:
+		checkpoint = {"synced_on": now(), "facilities": {}, "success_map": {}}
+	return checkpoint
+
+
+def _save_checkpoint(checkpoint: Dict) -> None:
+	frappe.cache().set_value(CHECKPOINT_CACHE_KEY, checkpoint, expires_in_sec=24 * 60 * 60)
+
+
+def _clear_checkpoint() -> None:
+	frappe.cache().delete_value(CHECKPOINT_CACHE_KEY)
 
 
 def _update_inventory_sync_status(ecom_item_success_map: Dict[str, bool], timestamp: str) -> None:
-	for ecom_item, status in ecom_item_success_map.items():
-		if status:
-			update_inventory_sync_status(ecom_item, timestamp)
+	synced_items = [ecom_item for ecom_item, status in ecom_item_success_map.items() if status]
+	bulk_update_inventory_sync_status(synced_items, timestamp)
@@ -4,7 +4,6 @@ from collections import defaultdict
 from typing import Any, Dict, List, NewType, Optional
 
 import frappe
-import requests
 from erpnext.selling.doctype.sales_order.sales_order import make_sales_invoice
 from frappe import _
 from frappe.utils import cint, flt, nowdate
@@ -33,6 +32,7 @@ from ecommerce_integrations.unicommerce.utils import (
 	get_unicommerce_date,
 	remove_non_alphanumeric_chars,
 )
+from ecommerce_integrations.utils.http import get_session
 
 JsonDict = Dict[str, Any]
 SOCode = NewType("SOCode", str)
@@ -551,7 +551,7 @@ def fetch_label_pdf(package, invoicing_response, client, facility_code):
 
 def fetch_pdf_as_base64(link):
 	try:
-		response = requests.get(link)
+		response = get_session(MODULE_NAME).get(link)
 		response.raise_for_status()
 
 		return base64.b64encode(response.content)
@@ -0,0 +1,238 @@
+"""Bulk upload of items to Unicommerce using "Item Master" import job.
+
+Items are written to a CSV file in Unicommerce's item master format and uploaded as a
+single import job. Unicommerce runs the job in background, so the job is stored as a
+queued log and its result is matched back to items by SKU in a later scheduled job."""
+
+import csv
+import io
+import json
+from typing import Dict, Iterable, Optional, Set, Tuple
+
+import frappe
+from frappe.utils import cstr, now, now_datetime, time_diff_in_seconds
+from frappe.utils.csvutils import UnicodeWriter
+from frappe.utils.file_manager import save_file
+
+from ecommerce_integrations.ecommerce_integrations.doctype.ecommerce_integration_log.ecommerce_integration_log import (
+	decompress_payload,
+)
+from ecommerce_integrations.unicommerce.api_client import JsonDict, UnicommerceAPIClient
+from ecommerce_integrations.unicommerce.constants import MODULE_NAME, SETTINGS_DOCTYPE
+from ecommerce_integrations.unicommerce.utils import create_unicommerce_log
+
+ITEM_IMPORT_JOB_NAME = "Item Master"
+ITEM_IMPORT_OPTION = "CREATE_IMPORT_EDIT"
+
+# import jobs are tracked as queued logs of this method
+RESOLVE_METHOD = "ecommerce_integrations.unicommerce.item_import.resolve_item_import_job"
+
+# jobs that are not finished after this are considered failed, their items are uploaded again
+IMPORT_JOB_TIMEOUT = 6 * 60 * 60
+IMPORT_JOB_DONE_STATUSES = ("COMPLETE", "COMPLETED")
+IMPORT_JOB_FAILED_STATUSES = ("FAILED", "CANCELLED", "ABORTED")
+
+SKU_COLUMN = "Product Code*"
+
+# (CSV column, Unicommerce item field)
+ITEM_IMPORT_COLUMNS = [
+	("Category Code*", "categoryCode"),
+	(SKU_COLUMN, "skuCode"),
+	("Name*", "name"),
+	("Description", "description"),
+	("Scan Identifier", "scanIdentifier"),
+	("Length (mm)", "length"),
+	("Width (mm)", "width"),
+	("Height (mm)", "height"),
+	("Weight (gms)", "weight"),
+	("EAN", "ean"),
+	("UPC", "upc"),
+	("Brand", "brand"),
+	("MRP", "maxRetailPrice"),
+	("Cost Price", "costPrice"),
+	("HSN CODE", "hsnCode"),
+	("Image Url", "imageUrl"),
+	("Shelf Life", "shelfLife"),
+	("Batch Group Code", "batchGroupCode"),
+	("Enabled", "enabled"),
+]
+
+# (item_code, item_data, payload_hash)
+ItemPayload = Tuple[str, JsonDict, str]
+
+
+def create_item_import_job(
+	items: Iterable[ItemPayload], client: UnicommerceAPIClient
+) -> Optional[str]:
+	"""Upload items using one import job and return the job code.
+
+	Items are marked synced once the job is finished, see `resolve_item_import_jobs`."""
+	csv_content, uploaded = _get_import_csv(items)
+	if not uploaded:
+		return
+
+	file = save_file(
+		fname=f"unicommerce-items-{now_datetime().strftime('%Y%m%d%H%M%S')}.csv",
+		content=csv_content,
+		dt=SETTINGS_DOCTYPE,
+		dn=SETTINGS_DOCTYPE,
+		is_private=1,
+	)
+
+	response = client.create_import_job(
+		job_name=ITEM_IMPORT_JOB_NAME, csv_filename=file.file_name, job_type=ITEM_IMPORT_OPTION
+	)
+	job_code = response and response.get("jobCode")
+	if not job_code:
+		_delete_file(file.name)
+		create_unicommerce_log(
+			status="Error",
+			response_data=response,
+			message=f"Failed to create item import job for {len(uploaded)} items",
+			make_new=True,
+		)
+		return
+
+	create_unicommerce_log(
+		status="Queued",
+		method=RESOLVE_METHOD,
+		request_data={"job_code": job_code, "file": file.name, "created_on": now(), "items": uploaded},
+		message=f"Item import job {job_code} created for {len(uploaded)} items",
+		make_new=True,
+		external_id=job_code,
+		external_type="Import Job",
+	)
+	# job is running on Unicommerce now, it must not be lost with a rollback
+	frappe.db.commit()
+
+	return job_code
+
+
+def resolve_item_import_jobs(client: Optional[UnicommerceAPIClient] = None) -> None:
+	"""Check item import jobs that are still queued, called by scheduler."""
+	settings = frappe.get_cached_doc(SETTINGS_DOCTYPE)
+	if not settings.is_enabled():
+		return
+
+	jobs = _get_queued_jobs()
+	if not jobs:
+		return
+
+	client = client or UnicommerceAPIClient()
+	for log_name, payload in jobs:
+		resolve_item_import_job(payload, request_id=log_name, client=client)
+
+
+def resolve_item_import_job(
+	payload: JsonDict, request_id: Optional[str] = None, client: Optional[UnicommerceAPIClient] = None
+) -> None:
+	"""Mark items of a finished import job as synced and remove its CSV file.
+
+	Items of failed rows are left unsynced, so they are uploaded again on next run."""
+	from ecommerce_integrations.unicommerce.product import _handle_ecommerce_item
+
+	client = client or UnicommerceAPIClient()
+	job_code = payload["job_code"]
+
+	job = client.get_import_job_status(job_code)
+	status = cstr((job or {}).get("status")).upper()
+	is_finished = status in IMPORT_JOB_DONE_STATUSES or status in IMPORT_JOB_FAILED_STATUSES
+	if not is_finished and time_diff_in_seconds(now(), payload["created_on"]) < IMPORT_JOB_TIMEOUT:
+		return  # still running, checked again in next run
+
+	uploaded = payload["items"]
+	failed_skus = _get_failed_skus(client, job, uploaded)
+
+	synced_items = []
+	for sku, (item_code, payload_hash) in uploaded.items():
+		if sku not in failed_skus:
+			_handle_ecommerce_item(item_code, payload_hash)
+			synced_items.append(item_code)
+
+	_delete_file(payload.get("file"))
+
+	message = f"Item import job {job_code} synced {len(synced_items)} items"
+	if failed_skus:
+		message += f", failed for SKUs: {', '.join(sorted(failed_skus))}"
+
+	frappe.flags.request_id = request_id
+	create_unicommerce_log(
+		status="Error" if failed_skus else "Success",
+		response_data=job,
+		message=message,
+		make_new=not request_id,
+	)
+	frappe.flags.request_id = None
+
+
+def get_pending_import_items() -> Set[str]:
+	"""Item codes that are uploaded by import jobs that are not finished yet."""
+	pending_items = set()
+	for _log, payload in _get_queued_jobs():
+		pending_items.update(item_code for item_code, _hash in payload["items"].values())
+	return pending_items
+
+
+def _get_queued_jobs():
+	logs = frappe.get_all(
+		"Ecommerce Integration Log",
+		filters={"integration": MODULE_NAME, "method": RESOLVE_METHOD, "status": "Queued"},
+		fields=["name", "request_data"],
+		order_by="creation",
+	)
+	return [(log.name, json.loads(decompress_payload(log.request_data))) for log in logs]
+
+
+def _delete_file(file_name: Optional[str]) -> None:
+	if file_name:
+		frappe.delete_doc("File", file_name, ignore_permissions=True, ignore_missing=True)
+
+
+def _get_import_csv(items: Iterable[ItemPayload]) -> Tuple[bytes, Dict[str, Tuple[str, str]]]:
+	"""Write items to CSV as they are built, returns CSV and {sku: (item_code, payload_hash)}."""
+	writer = UnicodeWriter()
+	writer.writerow([column for column, _field in ITEM_IMPORT_COLUMNS])
+
+	uploaded = {}
+	for item_code, item_data, payload_hash in items:
+		writer.writerow(
+			[_get_csv_value(item_data.get(field)) for _column, field in ITEM_IMPORT_COLUMNS]
+		)
+		uploaded[cstr(item_data.get("skuCode"))] = (item_code, payload_hash)
+
+	return writer.getvalue().encode("utf-8"), uploaded
+
+
+def _get_csv_value(value) -> str:
+	if value is None:
+		return ""
+	if isinstance(value, bool):
+		return "true" if value else "false"
+	return cstr(value)
+
+
+def _get_failed_skus(
+	client: UnicommerceAPIClient, job: Optional[JsonDict], uploaded: Dict[str, Tuple[str, str]]
+) -> Set[str]:
+	"""Get SKUs of rows that failed to import.
+
+	Unicommerce reports failed rows in a log CSV with same columns as the uploaded file.
+	If job didn't complete or log can't be read, all rows are considered failed and
+	are uploaded again on next run."""
+	status = cstr((job or {}).get("status")).upper()
+	if status not in IMPORT_JOB_DONE_STATUSES:
+		return set(uploaded)
+
+	if not job.get("failedImportCount"):
+		return set()
+
+	try:
+		log = client.download_file(job["logFilePath"])
+		return get_skus_from_csv(log)
+	except Exception:
+		return set(uploaded)
+
+
+def get_skus_from_csv(content: bytes) -> Set[str]:
+	reader = csv.DictReader(io.StringIO(content.decode("utf-8-sig")))
+	return {cstr(row.get(SKU_COLUMN)).strip() for row in reader if row.get(SKU_COLUMN)}
@@ -0,0 +1,110 @@
+"""In-memory snapshot of item data needed for building Unicommerce payloads.
+
+Builders that work on many items at once (item upload, GRN CSV) load everything they
+need with a few queries per batch of item codes instead of querying every row."""
+
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional
+
+import frappe
+from frappe import _dict
+from frappe.utils import create_batch
+
+from ecommerce_integrations.unicommerce.constants import MODULE_NAME, PRODUCT_CATEGORY_FIELD
+
+# number of names used in one "IN" filter
+QUERY_BATCH_SIZE = 500
+
+
+@dataclass
+class ItemSnapshot:
+	items: Dict[str, _dict] = field(default_factory=dict)
+	barcodes: Dict[str, List[_dict]] = field(default_factory=dict)
+	categories: Dict[str, Optional[str]] = field(default_factory=dict)
+	skus: Dict[str, str] = field(default_factory=dict)
+	batches: Dict[str, _dict] = field(default_factory=dict)
+
+	def get_item(self, item_code: str) -> Optional[_dict]:
+		return self.items.get(item_code)
+
+	def get_barcodes(self, item_code: str) -> List[_dict]:
+		return self.barcodes.get(item_code, [])
+
+	def get_category_code(self, item_code: str) -> Optional[str]:
+		item = self.get_item(item_code)
+		return self.categories.get(item.item_group) if item else None
+
+	def get_sku(self, item_code: str) -> Optional[str]:
+		return self.skus.get(item_code)
+
+	def get_batch(self, batch_no: Optional[str]) -> Optional[_dict]:
+		return self.batches.get(batch_no) if batch_no else None
+
+
+def load_item_snapshot(
+	item_codes: Iterable[str],
+	item_fields: Iterable[str] = (),
+	batch_nos: Iterable[str] = (),
+	with_barcodes: bool = False,
+	with_categories: bool = False,
+	with_skus: bool = False,
+) -> ItemSnapshot:
+	"""Load requested Item fields and related records for all item codes.
+
+	Item fields that don't exist on this site (e.g. fields of uninstalled apps) are skipped."""
+	item_codes = list(dict.fromkeys(item_codes))
+	snapshot = ItemSnapshot()
+
+	meta = frappe.get_meta("Item")
+	fields = ["name", "item_group"] + [f for f in item_fields if meta.has_field(f)]
+	for d in _get_all_in("Item", "name", item_codes, fields=list(dict.fromkeys(fields))):
+		snapshot.items[d.name] = d
+
+	if with_barcodes:
+		barcodes = _get_all_in(
+			"Item Barcode",
+			"parent",
+			item_codes,
+			fields=["parent", "barcode", "barcode_type"],
+			filters={"parenttype": "Item"},
+			order_by="parent, idx",
+		)
+		for d in barcodes:
+			snapshot.barcodes.setdefault(d.parent, []).append(d)
+
+	if with_categories:
+		item_groups = {d.item_group for d in snapshot.items.values() if d.item_group}
+		for d in _get_all_in("Item Group", "name", item_groups, fields=["name", PRODUCT_CATEGORY_FIELD]):
+			snapshot.categories[d.name] = d.get(PRODUCT_CATEGORY_FIELD)
+
+	if with_skus:
+		ecommerce_items = _get_all_in(
+			"Ecommerce Item",
+			"erpnext_item_code",
+			item_codes,
+			fields=["erpnext_item_code", "integration_item_code"],
+			filters={"integration": MODULE_NAME},
+			order_by="creation",
+		)
+		for d in ecommerce_items:
+			snapshot.skus.setdefault(d.erpnext_item_code, d.integration_item_code)
+
+	batch_nos = [b for b in dict.fromkeys(batch_nos) if b]
+	for d in _get_all_in(
+		"Batch", "name", batch_nos, fields=["name", "manufacturing_date", "expiry_date"]
+	):
+		snapshot.batches[d.name] = d
+
+	return snapshot
+
+
+def _get_all_in(doctype, fieldname, values, fields, filters=None, order_by=None) -> List[_dict]:
+	result = []
+	for batch in create_batch(list(values), QUERY_BATCH_SIZE):
+		result += frappe.get_all(
+			doctype,
+			filters={**(filters or {}), fieldname: ("in", batch)},
+			fields=fields,
+			order_by=order_by,
+		)
+	return result
@@ -1,9 +1,11 @@
 import json
 from collections import defaultdict, namedtuple
+from datetime import datetime
 from typing import Any, Dict, Iterator, List, NewType, Optional, Set, Tuple
 
 import frappe
-from frappe.utils import add_to_date, flt
+from frappe.utils import add_to_date, cint, flt, get_datetime, get_system_timezone, now_datetime
+from pytz import timezone
 
 from ecommerce_integrations.controllers.scheduling import need_to_run
 from ecommerce_integrations.ecommerce_integrations.doctype.ecommerce_item import ecommerce_item
@@ -14,11 +16,13 @@ from ecommerce_integrations.unicommerce.constants import (
 	FACILITY_CODE_FIELD,
 	INVOICE_CODE_FIELD,
 	IS_COD_CHECKBOX,
+	MAX_ORDER_SYNC_WINDOW,
 	MODULE_NAME,
 	ORDER_CODE_FIELD,
 	ORDER_ITEM_BATCH_NO,
 	ORDER_ITEM_CODE_FIELD,
 	ORDER_STATUS_FIELD,
+	ORDER_SYNC_OVERLAP,
 	PACKAGE_TYPE_FIELD,
 	SETTINGS_DOCTYPE,
 	TAX_FIELDS_MAPPING,
@@ -49,7 +53,14 @@ def sync_new_orders(client: UnicommerceAPIClient = None, force=False):
 
 	status = "COMPLETE" if settings.only_sync_completed_orders else None
 
-	new_orders = _get_new_orders(client, status=status)
+	channels = _get_channel_watermarks()
+	sync_started_on = now_datetime()
+	# don't move the watermark of a channel past an order that failed to sync,
+	# so it's picked up again in the next run.
+	failed_channels = set()
+	new_orders = _get_new_orders(
+		client, status=status, channels=channels, failed_channels=failed_channels
+	)
 
 	if new_orders is None:
 		return
@@ -57,42 +68,133 @@ def sync_new_orders(client: UnicommerceAPIClient = None, force=False):
 	for order in new_orders:
 		sales_order = create_order(order, client=client)
 
+		if not sales_order:
+			failed_channels.add(order["channel"])
+			continue
+
 		if settings.only_sync_completed_orders:
-			_create_sales_invoices(order, sales_order, client)
+			if not _create_sales_invoices(order, sales_order, client):
+				failed_channels.add(order["channel"])
+
+	_update_channel_watermarks(set(channels) - failed_channels, sync_started_on)
 
 
 def _get_new_orders(
-	client: UnicommerceAPIClient, status: Optional[str]
+	client: UnicommerceAPIClient,
+	status: Optional[str],
+	channels: Optional[Dict[str, Optional[datetime]]] = None,
+	failed_channels: Optional[Set[str]] = None,
 ) -> Optional[Iterator[UnicommerceOrder]]:
 
-	"""Search new sales order from unicommerce."""
+	"""Search new sales order from unicommerce.
+
+	Only orders updated after each channel's watermark (minus a safety overlap) are
+	considered and orders that are already synced are skipped before fetching details.
 
-	updated_since = 24 * 60  # minutes
+	Order details are fetched lazily while orders are being yielded. Channels of orders
+	that could not be fetched are added to `failed_channels` once iterator is consumed."""
+
+	if channels is None:
+		channels = _get_channel_watermarks()
+	if not channels:
+		return
+
+	updated_since = _get_search_window(channels.values())
 	uni_orders = client.search_sales_order(updated_since=updated_since, status=status)
-	configured_channels = {
-		c.channel_id
-		for c in frappe.get_all("Unicommerce Channel", filters={"enabled": 1}, fields="channel_id")
-	}
 	if uni_orders is None:
 		return
 
-	for order in uni_orders:
-		if order["channel"] not in configured_channels:
-			continue
+	order_channels = {
+		order["code"]: order["channel"]
+		for order in uni_orders
+		if order["channel"] in channels and _is_updated_after(order, channels[order["channel"]])
+	}
+	synced_orders = _get_synced_order_codes(list(order_channels), invoiced=status == "COMPLETE")
+	order_codes = [code for code in order_channels if code not in synced_orders]
+
+	settings = frappe.get_cached_doc(SETTINGS_DOCTYPE)
+	failed_codes = set()
+	orders = client.get_sales_orders(
+		order_codes,
+		max_workers=cint(settings.order_fetch_concurrency) or 1,
+		rate_limit=flt(settings.order_fetch_rate_limit),
+		failed_codes=failed_codes,
+	)
+	if failed_channels is None:
+		return orders
+
+	def report_failed_channels():
+		yield from orders
+		failed_channels.update(order_channels[code] for code in failed_codes)
 
-		# In case a sales invoice is not generated for some reason and is skipped, we need to create it manually. Therefore, I have commented out this line of code.
-		order = client.get_sales_order(order_code=order["code"])
-		if order:
-			yield order
+	return report_failed_channels()
 
 
-def _create_sales_invoices(unicommerce_order, sales_order, client: UnicommerceAPIClient):
+def _get_channel_watermarks() -> Dict[str, Optional[datetime]]:
+	"""Get last successful order sync time of all enabled channels."""
+	channels = frappe.get_all(
+		"Unicommerce Channel", filters={"enabled": 1}, fields=["channel_id", "last_order_sync"]
+	)
+	return {c.channel_id: c.last_order_sync for c in channels}
+
+
+def _update_channel_watermarks(channels: Set[str], synced_till: datetime) -> None:
+	for channel in channels:
+		frappe.db.set_value(
+			"Unicommerce Channel", channel, "last_order_sync", synced_till, update_modified=False
+		)
+
+
+def _get_search_window(watermarks) -> int:
+	"""Get `updatedSinceInMinutes` that covers all watermarks, capped at MAX_ORDER_SYNC_WINDOW."""
+	now = now_datetime()
+	window = 0
+	for watermark in watermarks:
+		if not watermark:
+			return MAX_ORDER_SYNC_WINDOW
+		window = max(window, (now - get_datetime(watermark)).total_seconds() // 60)
+
+	return int(min(window + ORDER_SYNC_OVERLAP, MAX_ORDER_SYNC_WINDOW))
+
+
+def _is_updated_after(order: UnicommerceOrder, watermark: Optional[datetime]) -> bool:
+	if not watermark or not order.get("updated"):
+		return True
+
+	updated_on = _get_system_datetime(order["updated"])
+	return updated_on >= add_to_date(get_datetime(watermark), minutes=-ORDER_SYNC_OVERLAP)
+
+
+def _get_system_datetime(timestamp: int) -> datetime:
+	"""Convert unicommerce ms timestamp to naive datetime in system timezone."""
+	system_tz = timezone(get_system_timezone())
+	return datetime.fromtimestamp(timestamp / 1000, tz=system_tz).replace(tzinfo=None)
+
+
+def _get_synced_order_codes(order_codes: List[str], invoiced: bool = False) -> Set[str]:
+	"""Get order codes that are already synced in ERPNext.
+
+	If `invoiced` is set, orders are considered synced only once they are fully billed."""
+	if not order_codes:
+		return set()
+
+	filters = {ORDER_CODE_FIELD: ("in", order_codes), "docstatus": ("!=", 2)}
+	if invoiced:
+		filters["per_billed"] = (">=", 100)
+
+	return set(frappe.get_all("Sales Order", filters=filters, pluck=ORDER_CODE_FIELD))
+
+
+def _create_sales_invoices(unicommerce_order, sales_order, client: UnicommerceAPIClient) -> bool:
 	"""Create sales invoice from sales orders, used when integration is only
-	syncing finshed orders from Unicommerce."""
+	syncing finshed orders from Unicommerce.
+
+	Returns False if invoice of any shipping package failed."""
 	from ecommerce_integrations.unicommerce.invoice import create_sales_invoice
 
 	facility_code = sales_order.get(FACILITY_CODE_FIELD)
 	shipping_packages = unicommerce_order["shippingPackages"]
+	success = True
 	for package in shipping_packages:
 		try:
 			# This code was added because the log statement below was being executed every time.
@@ -105,7 +207,12 @@ def _create_sales_invoices(unicommerce_order, sales_order, client: UnicommerceAP
 			if existing_si:
 				continue
 
-			log = create_unicommerce_log(method="create_sales_invoice", make_new=True)
+			log = create_unicommerce_log(
+				method="create_sales_invoice",
+				make_new=True,
+				external_id=unicommerce_order["code"],
+				external_type="Order",
+			)
 			frappe.flags.request_id = log.name
 
 			warehouse_allocations = _get_warehouse_allocations(sales_order)
@@ -119,10 +226,13 @@ def _create_sales_invoices(unicommerce_order, sales_order, client: UnicommerceAP
 		except Exception as e:
 			create_unicommerce_log(status="Error", exception=e, rollback=True, request_data=invoice_data)
 			frappe.flags.request_id = None
+			success = False
 		else:
 			create_unicommerce_log(status="Success", request_data=invoice_data)
 			frappe.flags.request_id = None
 
+	return success
+
 
 def create_order(payload: UnicommerceOrder, request_id: Optional[str] = None, client=None) -> None:
 
@@ -136,7 +246,10 @@ def create_order(payload: UnicommerceOrder, request_id: Optional[str] = None, cl
 	# If a sales order already exists, then every time it's executed
 	if request_id is None:
 		log = create_unicommerce_log(
-			method="ecommerce_integrations.unicommerce.order.create_order", request_data=payload
+			method="ecommerce_integrations.unicommerce.order.create_order",
+			request_data=payload,
+			external_id=order["code"],
+			external_type="Order",
 		)
 		request_id = log.name
 
@@ -165,10 +278,9 @@ def _sync_order_items(order: UnicommerceOrder, client: UnicommerceAPIClient) ->
 
 	items = {so_item["itemSku"] for so_item in order["saleOrderItems"]}
 
-	for item in items:
-		if ecommerce_item.is_synced(integration=MODULE_NAME, integration_item_code=item):
-			continue
-		else:
+	item_codes = ecommerce_item.resolve_many(MODULE_NAME, [(item, None, None) for item in items])
+	for (item, _variant_id, _sku), item_code in item_codes.items():
+		if not item_code:
 			import_product_from_unicommerce(sku=item, client=client)
 	return items
 
@@ -1,8 +1,8 @@
-from typing import List, NewType
+from typing import List, NewType, Optional
 
 import frappe
 from frappe import _
-from frappe.utils import get_url, now, to_markdown
+from frappe.utils import cint, get_url, now, to_markdown
 from frappe.utils.nestedset import get_root_of
 from stdnum.ean import is_valid as validate_barcode
 
@@ -20,6 +20,11 @@ from ecommerce_integrations.unicommerce.constants import (
 	SETTINGS_DOCTYPE,
 	UNICOMMERCE_SKU_PATTERN,
 )
+from ecommerce_integrations.unicommerce.item_import import (
+	create_item_import_job,
+	get_pending_import_items,
+)
+from ecommerce_integrations.unicommerce.item_snapshot import ItemSnapshot, load_item_snapshot
 from ecommerce_integrations.unicommerce.utils import create_unicommerce_log
 
 ItemCode = NewType("ItemCode", str)
@@ -72,6 +77,8 @@ def import_product_from_unicommerce(sku: str, client: UnicommerceAPIClient = Non
 			make_new=True,
 			exception=e,
 			rollback=True,
+			external_id=sku,
+			external_type="Item",
 		)
 		raise e
 	else:
@@ -80,6 +87,8 @@ def import_product_from_unicommerce(sku: str, client: UnicommerceAPIClient = Non
 			message=f"Successfully imported Item: {sku} from Unicommerce",
 			response_data=response,
 			make_new=True,
+			external_id=sku,
+			external_type="Item",
 		)
 
 
@@ -193,7 +202,8 @@ def upload_new_items(force=False) -> None:
 	"""Upload new items to Unicommerce on hourly basis.
 
 	All the items that have "sync_with_unicommerce" checked but do not have
-	corresponding Ecommerce Item, are pushed to Unicommerce."""
+	corresponding Ecommerce Item, are pushed to Unicommerce. If "update_item_on_unicommerce"
+	is checked, items modified after their last upload are pushed again."""
 
 	settings = frappe.get_cached_doc(SETTINGS_DOCTYPE)
 
@@ -201,6 +211,8 @@ def upload_new_items(force=False) -> None:
 		return
 
 	new_items = _get_new_items()
+	if settings.update_item_on_unicommerce:
+		new_items += _get_modified_items()
 	if not new_items:
 		return
 
@@ -209,13 +221,16 @@ def upload_new_items(force=False) -> None:
 
 	unsynced_items = set(new_items) - set(synced_items)
 
-	log.message = (
-		"Item sync completed\n"
-		f"Synced items: {', '.join(synced_items)}\n"
-		f"Unsynced items: {', '.join(unsynced_items)}"
+	frappe.flags.request_id = log.name
+	create_unicommerce_log(
+		status="Success",
+		message=(
+			"Item sync completed\n"
+			f"Synced items: {', '.join(synced_items)}\n"
+			f"Unsynced items: {', '.join(unsynced_items)}"
+		),
 	)
-	log.status = "Success"
-	log.save()
+	frappe.flags.request_id = None
 
 
 def _get_new_items() -> List[ItemCode]:
@@ -233,35 +248,103 @@ def _get_new_items() -> List[ItemCode]:
 	return [item[0] for item in new_items]
 
 
+def _get_modified_items() -> List[ItemCode]:
+	"""Items that were modified after they were last uploaded to Unicommerce.
+
+	Items whose Unicommerce payload didn't change are skipped by `upload_items_to_unicommerce`."""
+	modified_items = frappe.db.sql(
+		f"""
+			SELECT item.item_code
+			FROM tabItem item
+			INNER JOIN `tabEcommerce Item` ei
+				ON ei.erpnext_item_code = item.item_code
+				WHERE ei.integration = %s
+					AND item.{ITEM_SYNC_CHECKBOX} = 1
+					AND item.modified > ei.item_synced_on
+		""",
+		MODULE_NAME,
+	)
+
+	return [item[0] for item in modified_items]
+
+
 def upload_items_to_unicommerce(
 	item_codes: List[ItemCode], client: UnicommerceAPIClient = None
 ) -> List[ItemCode]:
 	"""Upload multiple items to Unicommerce.
 
+	Items are uploaded one by one, or with a single import job when there are more
+	than "Bulk Upload Threshold" changed items. Items uploaded by an import job are
+	only marked synced once the job is finished, so they are not returned.
 	Return Successfully synced item codes.
 	"""
 	if not client:
 		client = UnicommerceAPIClient()
 
+	# items of unfinished import jobs are uploaded again only if the job fails
+	pending_items = get_pending_import_items()
+	item_codes = [item_code for item_code in item_codes if item_code not in pending_items]
+
 	synced_items = []
+	changed_items = list(_get_changed_items(item_codes, synced_items))
 
-	for item_code in item_codes:
-		item_data = _build_unicommerce_item(item_code)
+	threshold = cint(client.settings.bulk_item_upload_threshold)
+	if threshold and len(changed_items) > threshold:
+		create_item_import_job(changed_items, client)
+		return synced_items
+
+	for item_code, item_data, payload_hash in changed_items:
 		sku = item_data.get("skuCode")
 
 		item_exists = bool(client.get_unicommerce_item(sku, log_error=False))
 		_, status = client.create_update_item(item_data, update=item_exists)
 
 		if status:
-			_handle_ecommerce_item(item_code)
+			_handle_ecommerce_item(item_code, payload_hash)
 			synced_items.append(item_code)
 
 	return synced_items
 
 
-def _build_unicommerce_item(item_code: ItemCode) -> JsonDict:
+def _get_changed_items(item_codes: List[ItemCode], unchanged_items: List[ItemCode]):
+	"""Build items and yield (item_code, item_data, payload_hash) of items that changed.
+
+	Items that are unchanged since last upload are marked synced and added to `unchanged_items`."""
+	synced_hashes = ecommerce_item.get_payload_hashes(MODULE_NAME, item_codes)
+	snapshot = load_unicommerce_item_snapshot(item_codes)
+
+	for item_code in item_codes:
+		item_data = _build_unicommerce_item(item_code, snapshot)
+		payload_hash = ecommerce_item.get_payload_hash(item_data)
+
+		if synced_hashes.get(item_code) == payload_hash:
+			_handle_ecommerce_item(item_code, payload_hash)
+			unchanged_items.append(item_code)
+			continue
+
+		yield item_code, item_data, payload_hash
+
+
+def load_unicommerce_item_snapshot(item_codes: List[ItemCode]) -> ItemSnapshot:
+	"""Load everything required by `_build_unicommerce_item` for all items at once."""
+	return load_item_snapshot(
+		item_codes,
+		item_fields=list(ERPNEXT_TO_UNI_ITEM_MAPPING) + ["disabled"],
+		with_barcodes=True,
+		with_categories=True,
+	)
+
+
+def _build_unicommerce_item(
+	item_code: ItemCode, snapshot: Optional[ItemSnapshot] = None
+) -> JsonDict:
 	"""Build Unicommerce item JSON using an ERPNext item"""
-	item = frappe.get_doc("Item", item_code)
+	if snapshot is None:
+		snapshot = load_unicommerce_item_snapshot([item_code])
+
+	item = snapshot.get_item(item_code)
+	if not item:
+		frappe.throw(_("Item {} not found").format(item_code), frappe.DoesNotExistError)
 
 	item_json = {}
 
@@ -275,7 +358,7 @@ def _build_unicommerce_item(item_code: ItemCode) -> JsonDict:
 	if item_json.get("description"):
 		item_json["description"] = to_markdown(item_json["description"]) or item_json["description"]
 
-	for barcode in item.barcodes:
+	for barcode in snapshot.get_barcodes(item_code):
 		if not item_json.get("scanIdentifier"):
 			# Set first barcode as scan identifier
 			item_json["scanIdentifier"] = barcode.barcode
@@ -284,9 +367,7 @@ def _build_unicommerce_item(item_code: ItemCode) -> JsonDict:
 		elif barcode.barcode_type == "UPC-A":
 			item_json["upc"] = barcode.barcode
 
-	item_json["categoryCode"] = frappe.db.get_value(
-		"Item Group", item.item_group, PRODUCT_CATEGORY_FIELD
-	)
+	item_json["categoryCode"] = snapshot.get_category_code(item_code)
 	# append site prefix to image url
 	item_json["imageUrl"] = get_url(item.image)
 	item_json["maxRetailPrice"] = item.standard_rate
@@ -296,13 +377,15 @@ def _build_unicommerce_item(item_code: ItemCode) -> JsonDict:
 	return item_json
 
 
-def _handle_ecommerce_item(item_code: ItemCode) -> None:
-	ecommerce_item = frappe.db.get_value(
+def _handle_ecommerce_item(item_code: ItemCode, payload_hash: Optional[str] = None) -> None:
+	ecom_item = frappe.db.get_value(
 		"Ecommerce Item", {"integration": MODULE_NAME, "erpnext_item_code": item_code}
 	)
 
-	if ecommerce_item:
-		frappe.db.set_value("Ecommerce Item", ecommerce_item, "item_synced_on", now())
+	if ecom_item:
+		frappe.db.set_value(
+			"Ecommerce Item", ecom_item, {"item_synced_on": now(), "payload_hash": payload_hash}
+		)
 	else:
 		frappe.get_doc(
 			{
@@ -312,6 +395,7 @@ def _handle_ecommerce_item(item_code: ItemCode) -> None:
 				"integration_item_code": item_code,
 				"sku": item_code,
 				"item_synced_on": now(),
+				"payload_hash": payload_hash,
 			}
 		).insert()
 
@@ -117,6 +117,23 @@ class TestUnicommerceClient(TestCaseApiClient):
 		self.assertEqual(order_data["code"], "SO5841")
 		self.assertEqual(order_data["displayOrderCode"], "SINV-00042")
 
+	def test_get_sales_orders(self):
+		"""requirement: orders fetched concurrently are returned in requested order"""
+		order_codes = ["SO5905", "SO5841", "SO5906", "SO5907"]
+		orders = list(self.client.get_sales_orders(order_codes, max_workers=3))
+
+		self.assertEqual([o["code"] for o in orders], order_codes)
+
+	def test_get_sales_orders_reports_failures(self):
+		"""requirement: orders that fail to fetch are skipped and reported"""
+		failed_codes = set()
+		orders = list(
+			self.client.get_sales_orders(["SO5905", "MISSING", "SO5841"], failed_codes=failed_codes)
+		)
+
+		self.assertEqual([o["code"] for o in orders], ["SO5905", "SO5841"])
+		self.assertEqual(failed_codes, {"MISSING"})
+
 	def test_create_update_item(self):
 		item_dict = {"test_dict": True}
 		self.responses.add(
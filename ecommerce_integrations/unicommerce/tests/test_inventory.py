@@ -8,7 +8,10 @@ from erpnext.stock.utils import get_stock_balance
 
 from ecommerce_integrations.ecommerce_integrations.doctype.ecommerce_item import ecommerce_item
 from ecommerce_integrations.unicommerce.constants import MODULE_NAME
-from ecommerce_integrations.unicommerce.inventory import update_inventory_on_unicommerce
+from ecommerce_integrations.unicommerce.inventory import (
+	CHECKPOINT_CACHE_KEY,
+	update_inventory_on_unicommerce,
+)
 from ecommerce_integrations.unicommerce.tests.test_client import TestCaseApiClient
 
 
@@ -91,6 +94,36 @@ class TestUnicommerceProduct(TestCaseApiClient):
 		# responses library should match the correct response and fail if not done so.
 		update_inventory_on_unicommerce(client=self.client, force=True)
 
+	@patch("ecommerce_integrations.unicommerce.inventory.MAX_INVENTORY_UPDATE_IN_REQUEST", 1)
+	def test_inventory_sync_in_chunks(self):
+		"""requirement: All changed items are sent in consecutive requests in same run"""
+		make_stock_entry(item_code="_TestInventoryItemA", qty=1, to_warehouse="Stores - WP", rate=10)
+		make_stock_entry(item_code="_TestInventoryItemB", qty=1, to_warehouse="Stores - WP", rate=10)
+
+		url = "https://demostaging.unicommerce.com/services/rest/v1/inventory/adjust/bulk"
+		self.responses.add(responses.POST, url, status=200, json={"successful": True})
+
+		update_inventory_on_unicommerce(client=self.client, force=True)
+
+		bulk_calls = [c for c in self.responses.calls if c.request.url == url]
+		self.assertEqual(len(bulk_calls), 2)
+		self.assertIsNone(frappe.cache().get_value(CHECKPOINT_CACHE_KEY))
+
+	@patch("ecommerce_integrations.unicommerce.inventory._sync_inventory")
+	def test_concurrent_runs_are_skipped(self, sync_inventory):
+		"""requirement: Runs don't share the checkpoint, a run is skipped while another is running"""
+		cache = frappe.cache()
+		lock = cache.lock(cache.make_key(f"{CHECKPOINT_CACHE_KEY}_lock"), timeout=60)
+		self.assertTrue(lock.acquire(blocking=False))
+		try:
+			update_inventory_on_unicommerce(client=self.client, force=True)
+			sync_inventory.assert_not_called()
+		finally:
+			lock.release()
+
+		update_inventory_on_unicommerce(client=self.client, force=True)
+		sync_inventory.assert_called_once()
+
 
 def make_ecommerce_item(item_code):
 
@@ -0,0 +1,79 @@
+# Copyright (c) 2026, Frappe and Contributors
+# See LICENSE
+
+import unittest
+from unittest.mock import MagicMock, patch
+
+from frappe.utils import add_to_date, now
+
+from ecommerce_integrations.unicommerce.item_import import (
+	SKU_COLUMN,
+	_get_failed_skus,
+	_get_import_csv,
+	get_skus_from_csv,
+	resolve_item_import_job,
+)
+
+
+class TestItemImport(unittest.TestCase):
+	def test_import_csv(self):
+		items = [
+			("ITEM-1", {"skuCode": "SKU-1", "name": "Item, one", "enabled": True}, "h1"),
+			("ITEM-2", {"skuCode": "SKU-2", "name": "Item two", "weight": 0}, "h2"),
+		]
+
+		content, uploaded = _get_import_csv(iter(items))
+
+		self.assertEqual(uploaded, {"SKU-1": ("ITEM-1", "h1"), "SKU-2": ("ITEM-2", "h2")})
+		self.assertEqual(get_skus_from_csv(content), {"SKU-1", "SKU-2"})
+
+		lines = content.decode("utf-8").splitlines()
+		self.assertIn(SKU_COLUMN, lines[0])
+		self.assertIn('"Item, one"', lines[1])
+		self.assertIn("true", lines[1])
+
+	def test_failed_skus(self):
+		uploaded = {"SKU-1": ("ITEM-1", "h1"), "SKU-2": ("ITEM-2", "h2")}
+
+		# incomplete job, everything is uploaded again
+		self.assertEqual(_get_failed_skus(None, {"status": "RUNNING"}, uploaded), set(uploaded))
+		self.assertEqual(_get_failed_skus(None, None, uploaded), set(uploaded))
+
+		done = {"status": "COMPLETE", "failedImportCount": 0}
+		self.assertEqual(_get_failed_skus(None, done, uploaded), set())
+
+	@patch("ecommerce_integrations.unicommerce.item_import.create_unicommerce_log")
+	@patch("ecommerce_integrations.unicommerce.item_import._delete_file")
+	@patch("ecommerce_integrations.unicommerce.product._handle_ecommerce_item")
+	def test_resolve_import_job(self, handle_item, delete_file, create_log):
+		payload = {
+			"job_code": "JOB-1",
+			"file": "FILE-1",
+			"created_on": now(),
+			"items": {"SKU-1": ["ITEM-1", "h1"], "SKU-2": ["ITEM-2", "h2"]},
+		}
+		client = MagicMock()
+
+		# running job is left for next run
+		client.get_import_job_status.return_value = {"status": "RUNNING"}
+		resolve_item_import_job(payload, request_id="LOG-1", client=client)
+		handle_item.assert_not_called()
+		delete_file.assert_not_called()
+
+		# job running for too long is treated as failed
+		stale = {**payload, "created_on": add_to_date(now(), days=-1)}
+		resolve_item_import_job(stale, request_id="LOG-1", client=client)
+		handle_item.assert_not_called()
+		delete_file.assert_called_once_with("FILE-1")
+		self.assertEqual(create_log.call_args.kwargs["status"], "Error")
+
+		delete_file.reset_mock()
+		client.get_import_job_status.return_value = {
+			"status": "COMPLETE",
+			"failedImportCount": 1,
+			"logFilePath": "log.csv",
+		}
+		client.download_file.return_value = f"{SKU_COLUMN}\nSKU-2\n".encode()
+		resolve_item_import_job(payload, request_id="LOG-1", client=client)
+		handle_item.assert_called_once_with("ITEM-1", "h1")
+		delete_file.assert_called_once_with("FILE-1")
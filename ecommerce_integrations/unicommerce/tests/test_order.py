@@ -3,15 +3,20 @@ from copy import deepcopy
 
 import frappe
 from frappe.test_runner import make_test_records
+from frappe.utils import add_to_date, now_datetime
 
 from ecommerce_integrations.unicommerce.constants import (
 	CHANNEL_ID_FIELD,
+	MAX_ORDER_SYNC_WINDOW,
 	ORDER_CODE_FIELD,
 	ORDER_STATUS_FIELD,
+	ORDER_SYNC_OVERLAP,
 )
 from ecommerce_integrations.unicommerce.order import (
 	_get_facility_code,
 	_get_line_items,
+	_get_search_window,
+	_get_synced_order_codes,
 	_sync_order_items,
 	create_order,
 )
@@ -103,3 +108,20 @@ class TestUnicommerceOrder(TestCaseApiClient):
 		amount = sum(item.amount for item in so.items)
 		self.assertEqual(qty, 11)
 		self.assertAlmostEqual(amount, 7028.0)
+
+	def test_get_search_window(self):
+		now = now_datetime()
+
+		self.assertEqual(_get_search_window([None]), MAX_ORDER_SYNC_WINDOW)
+		self.assertEqual(
+			_get_search_window([add_to_date(now, minutes=-5), add_to_date(now, minutes=-10)]),
+			10 + ORDER_SYNC_OVERLAP,
+		)
+		self.assertEqual(_get_search_window([add_to_date(now, days=-3)]), MAX_ORDER_SYNC_WINDOW)
+
+	def test_get_synced_order_codes(self):
+		order = self.load_fixture("order-SO6008-order")
+		create_order(order, client=self.client)
+
+		synced = _get_synced_order_codes([order["code"], "SO-MISSING"])
+		self.assertEqual(synced, {order["code"]})
@@ -2,14 +2,17 @@ import frappe
 import responses
 
 from ecommerce_integrations.ecommerce_integrations.doctype.ecommerce_item import ecommerce_item
-from ecommerce_integrations.unicommerce.constants import MODULE_NAME
+from ecommerce_integrations.unicommerce.constants import ITEM_SYNC_CHECKBOX, MODULE_NAME
 from ecommerce_integrations.unicommerce.product import (
 	_build_unicommerce_item,
 	_get_barcode_data,
 	_get_item_group,
+	_get_modified_items,
 	_validate_create_brand,
 	_validate_field,
 	import_product_from_unicommerce,
+	load_unicommerce_item_snapshot,
+	upload_items_to_unicommerce,
 )
 from ecommerce_integrations.unicommerce.tests.test_client import TestCaseApiClient
 
@@ -109,3 +112,27 @@ class TestUnicommerceProduct(TestCaseApiClient):
 
 		for k, v in uni_item.items():
 			self.assertEqual(actual_item[k], v)
+
+		# bulk loaded snapshot builds the same item
+		snapshot = load_unicommerce_item_snapshot(["TITANIUM_WATCH", "MISSING_ITEM"])
+		self.assertEqual(_build_unicommerce_item("TITANIUM_WATCH", snapshot), uni_item)
+		self.assertEqual(snapshot.get_category_code("MISSING_ITEM"), None)
+
+	def test_unchanged_modified_item_is_not_uploaded(self):
+		code = "TITANIUM_WATCH"
+		import_product_from_unicommerce(code, self.client)
+		payload_hash = ecommerce_item.get_payload_hash(_build_unicommerce_item(code))
+		ecommerce_item.set_payload_hash(MODULE_NAME, code, payload_hash)
+
+		frappe.db.set_value("Item", code, ITEM_SYNC_CHECKBOX, 1)
+		frappe.db.set_value(
+			"Ecommerce Item",
+			{"integration": MODULE_NAME, "erpnext_item_code": code},
+			"item_synced_on",
+			"2021-01-01 00:00:00",
+		)
+		self.assertIn(code, _get_modified_items())
+
+		# no API calls are mocked for upload, unchanged item is marked synced without them
+		self.assertEqual(upload_items_to_unicommerce([code], self.client), [code])
+		self.assertNotIn(code, _get_modified_items())
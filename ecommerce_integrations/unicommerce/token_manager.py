@@ -0,0 +1,78 @@
+"""Shared access token for Unicommerce API clients.
+
+Token is kept in redis along with its expiry, Unicommerce Settings is only
+written to when the token is actually rotated."""
+
+from typing import Optional
+
+import frappe
+from frappe.utils import get_datetime, now_datetime
+
+from ecommerce_integrations.unicommerce.constants import SETTINGS_DOCTYPE
+
+TOKEN_CACHE_KEY = "unicommerce_access_token"
+
+# rotate tokens this many seconds before they expire
+TOKEN_EXPIRY_MARGIN = 120
+
+# seconds to wait for another worker that is already rotating the token
+TOKEN_LOCK_TIMEOUT = 60
+
+
+def get_access_token(force_refresh: bool = False) -> str:
+	"""Get a valid access token, rotating it if required."""
+	if not force_refresh:
+		token = _get_cached_token()
+		if token:
+			return token
+
+	with _token_lock():
+		# another worker might have rotated the token while we were waiting
+		if not force_refresh:
+			token = _get_cached_token()
+			if token:
+				return token
+
+		settings = frappe.get_doc(SETTINGS_DOCTYPE)
+		if force_refresh or _is_expiring(settings.expires_on):
+			settings.renew_tokens(force=True)
+
+		token = settings.get_password("access_token", raise_exception=False)
+		_cache_token(token, settings.expires_on)
+		return token
+
+
+def clear_token_cache() -> None:
+	frappe.cache().delete_value(TOKEN_CACHE_KEY)
+
+
+def _get_cached_token() -> Optional[str]:
+	cached = frappe.cache().get_value(TOKEN_CACHE_KEY)
+	if cached and not _is_expiring(cached.get("expires_on")):
+		return cached.get("access_token")
+
+
+def _cache_token(token: Optional[str], expires_on) -> None:
+	if not token or not expires_on:
+		return
+
+	ttl = int((get_datetime(expires_on) - now_datetime()).total_seconds()) - TOKEN_EXPIRY_MARGIN
+	if ttl > 0:
+		frappe.cache().set_value(
+			TOKEN_CACHE_KEY, {"access_token": token, "expires_on": str(expires_on)}, expires_in_sec=ttl
+		)
+
+
+def _is_expiring(expires_on) -> bool:
+	if not expires_on:
+		return True
+	return (get_datetime(expires_on) - now_datetime()).total_seconds() <= TOKEN_EXPIRY_MARGIN
+
+
+def _token_lock():
+	cache = frappe.cache()
+	return cache.lock(
+		cache.make_key(f"{TOKEN_CACHE_KEY}_lock"),
+		timeout=TOKEN_LOCK_TIMEOUT,
+		blocking_timeout=TOKEN_LOCK_TIMEOUT,
+	)
@@ -0,0 +1,66 @@
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Iterable, Iterator, Optional, Tuple, TypeVar
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+class RateLimiter:
+	"""Thread-safe limiter that spaces out calls to at most `rate` calls per second.
+
+	A falsy rate disables limiting."""
+
+	def __init__(self, rate: Optional[float] = None):
+		self.interval = 1.0 / rate if rate else 0.0
+		self._next_slot = 0.0
+		self._lock = threading.Lock()
+
+	def wait(self) -> None:
+		if not self.interval:
+			return
+
+		with self._lock:
+			now = time.monotonic()
+			slot = max(now, self._next_slot)
+			self._next_slot = slot + self.interval
+
+		if slot > now:
+			time.sleep(slot - now)
+
+
+def prefetch_ordered(
+	func: Callable[[T], R],
+	args: Iterable[T],
+	max_workers: int = 4,
+	rate_limit: Optional[float] = None,
+) -> Iterator[Tuple[T, "Future[R]"]]:
+	"""Call `func` for every arg in a bounded thread pool and yield (arg, future) in input order.
+
+	At most `2 * max_workers` calls are in flight, so results are consumed while
+	later calls are still running. `func` runs outside of frappe's request context,
+	it must not use `frappe.local` (db, cache, logs etc.); do that in the consumer instead.
+	"""
+	max_workers = max(int(max_workers or 1), 1)
+	limiter = RateLimiter(rate_limit)
+
+	def call(arg):
+		limiter.wait()
+		return func(arg)
+
+	executor = ThreadPoolExecutor(max_workers=max_workers)
+	pending = deque()
+	args = iter(args)
+
+	try:
+		for arg in args:
+			pending.append((arg, executor.submit(call, arg)))
+			if len(pending) >= 2 * max_workers:
+				yield pending.popleft()
+
+		while pending:
+			yield pending.popleft()
+	finally:
+		executor.shutdown(wait=True, cancel_futures=True)
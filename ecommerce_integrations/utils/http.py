@@ -0,0 +1,73 @@
+import os
+import threading
+from typing import Dict, Tuple
+
+import frappe
+import requests
+from frappe.utils import cint
+from requests.adapters import HTTPAdapter
+
+# site_config key holding per-integration overrides, e.g.
+# "ecommerce_http_settings": {"unicommerce": {"pool_maxsize": 20, "timeout": 60}}
+HTTP_SETTINGS_KEY = "ecommerce_http_settings"
+
+DEFAULT_HTTP_SETTINGS = {
+	"pool_connections": 4,  # number of hosts to keep pools for
+	"pool_maxsize": 10,  # keep-alive connections per host
+	"max_retries": 0,
+	"timeout": 60,  # seconds, applied when caller doesn't pass one
+}
+
+# (pid, site, integration): session
+_sessions: Dict[Tuple[int, str, str], "IntegrationSession"] = {}
+_lock = threading.Lock()
+
+
+class IntegrationSession(requests.Session):
+	"""requests.Session with a default timeout, used for all outgoing integration calls."""
+
+	def __init__(self, timeout=None):
+		super().__init__()
+		self.timeout = timeout
+
+	def request(self, method, url, **kwargs):
+		if kwargs.get("timeout") is None:
+			kwargs["timeout"] = self.timeout
+		return super().request(method, url, **kwargs)
+
+
+def get_http_settings(integration: str) -> frappe._dict:
+	"""Get transport settings for integration, overrides are read from site config."""
+	overrides = (frappe.conf.get(HTTP_SETTINGS_KEY) or {}).get(integration) or {}
+	settings = frappe._dict(DEFAULT_HTTP_SETTINGS)
+	settings.update(overrides)
+	return settings
+
+
+def get_session(integration: str) -> IntegrationSession:
+	"""Get process-wide session with keep-alive connection pools for specified integration.
+
+	Sessions are created lazily and are never shared across forked processes or sites, as
+	their settings are read from site config."""
+	key = (os.getpid(), frappe.local.site, integration)
+	session = _sessions.get(key)
+	if session:
+		return session
+
+	with _lock:
+		session = _sessions.get(key)
+		if not session:
+			session = _sessions[key] = _make_session(get_http_settings(integration))
+	return session
+
+
+def _make_session(settings: frappe._dict) -> IntegrationSession:
+	session = IntegrationSession(timeout=settings.timeout)
+	adapter = HTTPAdapter(
+		pool_connections=cint(settings.pool_connections),
+		pool_maxsize=cint(settings.pool_maxsize),
+		max_retries=cint(settings.max_retries),
+	)
+	session.mount("https://", adapter)
+	session.mount("http://", adapter)
+	return session
@@ -0,0 +1,33 @@
+# Copyright (c) 2026, Frappe and Contributors
+# See LICENSE
+
+import unittest
+from unittest.mock import patch
+
+import frappe
+import requests
+
+from ecommerce_integrations.utils.http import HTTP_SETTINGS_KEY, get_session
+
+
+class TestHttp(unittest.TestCase):
+	@patch.object(requests.Session, "request")
+	def test_default_timeout(self, request):
+		with patch.dict(frappe.conf, {HTTP_SETTINGS_KEY: {"_test_timeout": {"timeout": 5}}}):
+			session = get_session("_test_timeout")
+
+		session.get("https://example.com")
+		self.assertEqual(request.call_args.kwargs["timeout"], 5)
+
+		# timeout passed by caller is kept
+		session.get("https://example.com", timeout=1)
+		self.assertEqual(request.call_args.kwargs["timeout"], 1)
+
+	def test_session_reuse(self):
+		session = get_session("_test_reuse")
+
+		self.assertIs(get_session("_test_reuse"), session)
+		self.assertIsNot(get_session("_test_other"), session)
+
+		with patch.object(frappe.local, "site", "_test_other_site"):
+			self.assertIsNot(get_session("_test_reuse"), session)
@@ -44,7 +44,9 @@ def process_purchase_order(order, center, error_logs):
 				msg = _("For Order no {}.").format(items["order_number"]) + " " + supplier_err_msg
 				error_logs.append(msg)
 
-			item_err_msg_list = check_for_item(items["item_data"], item_group="Products")
+			item_err_msg_list = check_for_item(
+				items["item_data"], item_group="Products", center=center.name
+			)
 			if len(item_err_msg_list):
 				item_err_msg = "\n".join(err for err in item_err_msg_list)
 				msg = _("For Order no {}.").format(items["order_number"]) + "\n" + item_err_msg
@@ -0,0 +1,52 @@
+# Copyright (c) 2026, Frappe and Contributors
+# See LICENSE
+
+import unittest
+from unittest.mock import patch
+
+import frappe
+
+from ecommerce_integrations.zenoti.utils import CenterCatalog, get_item_details
+
+ITEMS = [
+	{"id": "1", "code": "SRV-1", "name": "Haircut"},
+	{"id": "2", "code": "SRV-1", "name": "Haircut duplicate"},
+	{"id": "3", "name": "Gold"},
+]
+
+
+class TestCenterCatalog(unittest.TestCase):
+	def tearDown(self):
+		frappe.flags.zenoti_catalogs = None
+		frappe.flags.zenoti_refreshed_catalogs = None
+
+	def test_find_by_code(self):
+		catalog = CenterCatalog("Services", ITEMS)
+
+		# first match wins
+		item = catalog.find({"zenoti_item_code": "SRV-1", "item_name": "Gold"})
+		self.assertEqual(item["id"], "1")
+		self.assertIsNone(catalog.find({"zenoti_item_code": "MISSING", "item_name": "Haircut"}))
+
+	def test_find_memberships_by_name(self):
+		catalog = CenterCatalog("Memberships", ITEMS)
+
+		item = catalog.find({"zenoti_item_code": "SRV-1", "item_name": "Gold"})
+		self.assertEqual(item["id"], "3")
+		self.assertIsNone(catalog.find({"zenoti_item_code": "SRV-1", "item_name": "Silver"}))
+
+	@patch("ecommerce_integrations.zenoti.utils.frappe.db.get_single_value", return_value=0)
+	@patch("ecommerce_integrations.zenoti.utils.get_list_of_items_in_a_center")
+	def test_catalog_is_refreshed_once_on_miss(self, get_items, _settings):
+		new_item = {"id": "4", "code": "SRV-2", "name": "Shave"}
+		get_items.side_effect = [ITEMS, ITEMS + [new_item], ITEMS + [new_item]]
+
+		item, center = get_item_details({"zenoti_item_code": "SRV-2"}, "Services", "CENTER")
+		self.assertEqual(item, new_item)
+		self.assertEqual(center, "CENTER")
+		self.assertEqual(get_items.call_count, 2)
+
+		# missing items don't download catalog again in same run
+		item, _ = get_item_details({"zenoti_item_code": "MISSING"}, "Services", "CENTER")
+		self.assertIsNone(item)
+		self.assertEqual(get_items.call_count, 2)
@@ -1,12 +1,14 @@
 import json
 import math
+import time
 
 import frappe
-import requests
 from erpnext.controllers.accounts_controller import add_taxes_from_tax_template
 from frappe import _
 from frappe.utils import cint, flt
 
+from ecommerce_integrations.utils.http import get_session
+
 api_url = "https://api.zenoti.com/v1/"
 
 item_type = {
@@ -20,17 +22,15 @@ item_type = {
 
 def make_api_call(url):
 	headers = get_headers()
-	response = requests.request("GET", url=url, headers=headers)
+	response = get_session("zenoti").get(url, headers=headers)
 	res_headers = dict(response.headers)
 	if res_headers.get("RateLimit-Reset"):
 		frappe.flags.zenoti_rate_limit_reset_time = cint(res_headers.get("RateLimit-Reset"))
 
 	if response.status_code == 429:
 		if not res_headers.get("RateLimit-Remaining"):
-			import time
-
 			time.sleep(frappe.flags.zenoti_rate_limit_reset_time + 1)
-			response = requests.request("GET", url=url, headers=headers)
+			response = get_session("zenoti").get(url, headers=headers)
 
 	if response.status_code != 200:
 		content = json.loads(response._content.decode("utf-8"))
@@ -110,23 +110,69 @@ def create_item(item_dict, item_details, item_group, center):
 
 
 def get_item_details(item_dict, item_group, center):
-	item_found = False
-	list_of_items_in_a_center = get_list_of_items_in_a_center(center, item_group)
-	for item in list_of_items_in_a_center:
-		if item_group == "Memberships":
-			if item_dict["item_name"] == item["name"]:
-				item_found = True
-				break
-		elif "code" in item and item_dict["zenoti_item_code"] == item["code"]:
-			item_found = True
-			break
-
-	if item_found:
+	item = get_center_catalog(center, item_group).find(item_dict)
+	if not item:
+		# item may be created after catalog was cached, download it again once per run
+		if frappe.flags.zenoti_refreshed_catalogs is None:
+			frappe.flags.zenoti_refreshed_catalogs = set()
+		if (center, item_group) not in frappe.flags.zenoti_refreshed_catalogs:
+			frappe.flags.zenoti_refreshed_catalogs.add((center, item_group))
+			item = get_center_catalog(center, item_group, refresh=True).find(item_dict)
+	if item:
 		return item, center
 	else:
 		return None, None
 
 
+class CenterCatalog:
+	"""Items of a center in an item group, indexed by code and by name (for memberships)."""
+
+	def __init__(self, item_group, items):
+		self.item_group = item_group
+		self.built_at = time.monotonic()
+		self.by_code = {}
+		self.by_name = {}
+		for item in items:
+			# first match wins, same as a linear scan
+			if "code" in item:
+				self.by_code.setdefault(item["code"], item)
+			self.by_name.setdefault(item.get("name"), item)
+
+	def find(self, item_dict):
+		if self.item_group == "Memberships":
+			return self.by_name.get(item_dict["item_name"])
+		return self.by_code.get(item_dict["zenoti_item_code"])
+
+	def is_expired(self, expiry):
+		return bool(expiry) and time.monotonic() - self.built_at > expiry
+
+
+def get_center_catalog(center, item_group, refresh=False):
+	"""Get catalog of a center, it is downloaded once and shared by all syncs of the run.
+
+	Downloaded catalog is also cached for "Item Catalog Cache Expiry" minutes, so the
+	following runs don't download it again. Set expiry 0 to download it in every run.
+	Set `refresh` to download it again, ignoring both caches."""
+	if frappe.flags.zenoti_catalogs is None:
+		frappe.flags.zenoti_catalogs = {}
+
+	expiry = cint(frappe.db.get_single_value("Zenoti Settings", "catalog_cache_expiry")) * 60
+	catalog = frappe.flags.zenoti_catalogs.get((center, item_group))
+	if catalog and not refresh and not catalog.is_expired(expiry):
+		return catalog
+
+	cache_key = f"zenoti_catalog|{center}|{item_group}"
+	items = frappe.cache().get_value(cache_key) if expiry and not refresh else None
+	if items is None:
+		items = get_list_of_items_in_a_center(center, item_group)
+		if expiry and items:
+			frappe.cache().set_value(cache_key, items, expires_in_sec=expiry)
+
+	catalog = CenterCatalog(item_group, items)
+	frappe.flags.zenoti_catalogs[(center, item_group)] = catalog
+	return catalog
+
+
 def get_all_centers():
 	url = api_url + "centers"
 	all_center = make_api_call(url)
@@ -162,7 +208,7 @@ def get_list_of_items_in_a_center(center, item_group):
 						+ "/"
 						+ item_type[item_group]
 						+ "?size=100"
-						+ "page="
+						+ "&page="
 						+ str(pg)
 					)
 					pagewise_items_in_center = make_api_call(url)